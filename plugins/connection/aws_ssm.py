@@ -65,6 +65,60 @@ options:
     type: integer
     vars:
     - name: ansible_aws_ssm_timeout
+  session_pool:
+    description:
+    - Keep SSM sessions open in a controller side broker process and reuse them for later tasks
+      and playbook runs against the same instance, region, profile and credentials instead of calling
+      C(StartSession) and starting session-manager-plugin for every task.
+    - The broker listens on a Unix socket in I(session_pool_dir) and exits once all of its
+      sessions have expired.
+    - Requires Python 3 on the controller.
+    type: boolean
+    default: false
+    vars:
+    - name: ansible_aws_ssm_session_pool
+    version_added: 1.3.0
+  session_pool_ttl:
+    description:
+    - Seconds an unused pooled session is kept open before the broker closes it. The value of the
+      connection that last released the session applies.
+    - Once it has no sessions left, the broker exits after the I(session_pool_ttl) of the connection
+      that started it.
+    default: 300
+    type: integer
+    vars:
+    - name: ansible_aws_ssm_session_pool_ttl
+    version_added: 1.3.0
+  session_pool_dir:
+    description: Directory holding the session broker socket.
+    default: '~/.ansible/cp'
+    type: path
+    vars:
+    - name: ansible_aws_ssm_session_pool_dir
+    version_added: 1.3.0
+  transfer_batch:
+    description:
+    - Defer file uploads until the next command is run on the host and send all of them, for example
+      a module and its arguments file, as a single archive through the S3 bucket.
+    - Only files up to 8MB are deferred, larger files are transferred straight away.
+    - Not supported on Windows hosts, where files are always transferred straight away.
+    - The remote Linux instance must have tar installed.
+    type: boolean
+    default: false
+    vars:
+    - name: ansible_aws_ssm_transfer_batch
+    version_added: 1.3.0
+  inband_transfer_threshold:
+    description:
+    - Files up to this size in bytes are sent base64 encoded through the SSM session itself instead of
+      through the S3 bucket. C(0) disables in-band transfers.
+    - Fetching files in-band is only supported on Linux hosts, which must have base64 installed.
+    - Keep this small on Windows hosts, the encoded file has to fit in a single PowerShell command line.
+    type: integer
+    default: 0
+    vars:
+    - name: ansible_aws_ssm_inband_transfer_threshold
+    version_added: 1.3.0
 '''
 
 EXAMPLES = r'''
@@ -159,16 +213,18 @@ EXAMPLES = r'''
 # The playbook tasks will get executed on the instance ids returned from the dynamic inventory plugin using ssm connection.
 '''
 
+import base64
 import os
 import getpass
+import hashlib
 import json
 import os
 import pty
 import random
 import re
-import select
 import string
 import subprocess
+import tarfile
 import time
 
 try:
@@ -178,16 +234,21 @@ except ImportError as e:
     HAS_BOTO_3_ERROR = str(e)
     HAS_BOTO_3 = False
 
+from collections import OrderedDict
 from functools import wraps
 from ansible import constants as C
+from ansible.compat import selectors
 from ansible.errors import AnsibleConnectionFailure, AnsibleError, AnsibleFileNotFound
 from ansible.module_utils.basic import missing_required_lib
-from ansible.module_utils.six import PY3
+from ansible.module_utils.six import PY3, BytesIO
 from ansible.module_utils.six.moves import xrange
 from ansible.module_utils._text import to_bytes, to_native, to_text
 from ansible.plugins.connection import ConnectionBase
 from ansible.plugins.shell.powershell import _common_args
 from ansible.utils.display import Display
+from ansible_collections.community.aws.plugins.module_utils.ssm_session_broker import BrokerClient
+from ansible_collections.community.aws.plugins.module_utils.ssm_session_broker import BrokerError
+from ansible_collections.community.aws.plugins.module_utils.ssm_session_broker import HAS_FD_PASSING
 
 display = Display()
 
@@ -231,7 +292,7 @@ def _ssm_retry(func):
                     time.sleep(pause)
 
                     # Do not attempt to reuse the existing session on retries
-                    self.close()
+                    self._close_session(discard=True)
 
                     continue
 
@@ -239,6 +300,78 @@ def _ssm_retry(func):
     return wrapped
 
 
+class _BotoClientCache(object):
+    """
+    Process wide cache of boto3 clients.
+
+    botocore loads the service model from disk every time a client is built, so
+    clients are shared by every connection in a worker process.  Clients are keyed
+    by their credentials as well as the service, region and endpoint, so hosts
+    reached with different credentials each keep their own client, and rotated
+    credentials get a new one.  At most ``max_sessions`` sets of credentials are
+    kept; the least recently used is dropped together with its clients.
+    Credentials resolved by boto3 itself (no explicit STS token) are refreshed by
+    botocore when they expire.  Functions in ``hooks`` are called with
+    (service, region_name, seconds) whenever a client has to be built.
+    """
+
+    def __init__(self, max_sessions=16):
+        self.hooks = []
+        self.construction_times = {}
+        self.max_sessions = max_sessions
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._sessions = OrderedDict()
+        self._clients = {}
+
+    def _session(self, credentials):
+        session = self._sessions.pop(credentials, None)
+        if session is None:
+            aws_access_key_id, aws_secret_access_key, aws_session_token = credentials
+            session = boto3.session.Session(
+                aws_access_key_id=aws_access_key_id,
+                aws_secret_access_key=aws_secret_access_key,
+                aws_session_token=aws_session_token)
+            while len(self._sessions) >= self.max_sessions:
+                evicted = self._sessions.popitem(last=False)[0]
+                for key in [key for key in self._clients if key[0] == evicted]:
+                    del self._clients[key]
+        # most recently used last
+        self._sessions[credentials] = session
+        return session
+
+    def client(self, service, region_name, credentials, endpoint_url=None):
+        # Connections to sockets held by the parent are not safe to use after a fork
+        if self._pid != os.getpid():
+            self._reset()
+
+        key = (credentials, service, region_name, endpoint_url)
+        client = self._clients.get(key)
+        if client is not None:
+            self._sessions[credentials] = self._sessions.pop(credentials)
+            return client
+
+        start = time.time()
+        client = self._session(credentials).client(service, region_name=region_name, endpoint_url=endpoint_url)
+        elapsed = time.time() - start
+
+        self._clients[key] = client
+        self.construction_times[(service, region_name, endpoint_url)] = elapsed
+        for hook in self.hooks:
+            hook(service, region_name, elapsed)
+        return client
+
+
+def _log_client_construction(service, region_name, elapsed):
+    display.vvvv(u"BOTO3 CLIENT {0} ({1}) built in {2:.1f}ms".format(service, region_name, elapsed * 1000))
+
+
+boto_client_cache = _BotoClientCache()
+boto_client_cache.hooks.append(_log_client_construction)
+
+
 def chunks(lst, n):
     """Yield successive n-sized chunks from lst."""
     for i in range(0, len(lst), n):
@@ -258,7 +391,15 @@ class Connection(ConnectionBase):
     _stdout = None
     _session_id = ''
     _timeout = False
+    _stdout_buffer = None
+    _stdout_eof = False
+    _stderr_chunks = None
+    _selector = None
+    _broker = None
+    _s3_client = None
     MARK_LENGTH = 26
+    READ_CHUNK_SIZE = 65536
+    TRANSFER_BATCH_MAX_SIZE = 8 * 1024 * 1024
 
     def __init__(self, *args, **kwargs):
         if not HAS_BOTO_3:
@@ -266,6 +407,7 @@ class Connection(ConnectionBase):
 
         super(Connection, self).__init__(*args, **kwargs)
         self.host = self._play_context.remote_addr
+        self._pending_puts = []
 
         if getattr(self._shell, "SHELL_FAMILY", '') == 'powershell':
             self.delegate = None
@@ -306,6 +448,19 @@ class Connection(ConnectionBase):
         ssm_parameters = dict()
         client = self._get_boto_client('ssm', region_name=region_name)
         self._client = client
+
+        pool_key = None
+        if self.get_option('session_pool'):
+            self._broker = self._get_session_broker()
+            pool_key = self._session_pool_key(region_name)
+            leased = self._broker_call(self._broker.acquire, pool_key)
+            if leased is not None:
+                self._session_id, session, stdout_r = leased
+                display.vvv(u"SSM SESSION POOL HIT: {0}".format(self._session_id), host=self.host)
+                self._attach_session(session, stdout_r)
+                return session
+            display.vvv(u"SSM SESSION POOL MISS: {0}".format(pool_key), host=self.host)
+
         response = client.start_session(Target=self.instance_id, Parameters=ssm_parameters)
         self._session_id = response['SessionId']
 
@@ -321,21 +476,21 @@ class Connection(ConnectionBase):
 
         display.vvvv(u"SSM COMMAND: {0}".format(to_text(cmd)), host=self.host)
 
-        stdout_r, stdout_w = pty.openpty()
-        session = subprocess.Popen(
-            cmd,
-            stdin=subprocess.PIPE,
-            stdout=stdout_w,
-            stderr=subprocess.PIPE,
-            close_fds=True,
-            bufsize=0,
-        )
-
-        os.close(stdout_w)
-        self._stdout = os.fdopen(stdout_r, 'rb', 0)
-        self._session = session
-        self._poll_stdout = select.poll()
-        self._poll_stdout.register(self._stdout, select.POLLIN)
+        if self._broker is not None:
+            session, stdout_r = self._broker_call(self._broker.spawn, pool_key, cmd, self._session_id)
+        else:
+            stdout_r, stdout_w = pty.openpty()
+            session = subprocess.Popen(
+                cmd,
+                stdin=subprocess.PIPE,
+                stdout=stdout_w,
+                stderr=subprocess.PIPE,
+                close_fds=True,
+                bufsize=0,
+            )
+            os.close(stdout_w)
+
+        self._attach_session(session, stdout_r)
 
         # Disable command echo and prompt.
         self._prepare_terminal()
@@ -344,12 +499,55 @@ class Connection(ConnectionBase):
 
         return session
 
+    def _attach_session(self, session, stdout_r):
+        ''' wire up the session-manager-plugin process and its pty '''
+
+        self._stdout = os.fdopen(stdout_r, 'rb', 0)
+        self._stdout_buffer = bytearray()
+        self._stderr_chunks = []
+        self._session = session
+
+        # A single selector covers both streams so the exec loop sleeps until either has data
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self._stdout, selectors.EVENT_READ, 'stdout')
+        self._selector.register(session.stderr, selectors.EVENT_READ, 'stderr')
+
+    def _get_session_broker(self):
+        ''' return a client for the controller side session broker '''
+
+        if not HAS_FD_PASSING:
+            raise AnsibleError("ansible_aws_ssm_session_pool requires Python 3 on the controller")
+
+        pool_dir = os.path.expanduser(self.get_option('session_pool_dir'))
+        if not os.path.isdir(pool_dir):
+            os.makedirs(pool_dir, 0o700)
+        socket_path = os.path.join(pool_dir, 'aws-ssm-broker-%d.sock' % os.getuid())
+        return BrokerClient(socket_path, self.get_option('session_pool_ttl'))
+
+    def _session_pool_key(self, region_name):
+        ''' sessions are only shared between identical instance, region, profile and credentials '''
+
+        # boto3 falls back to the profile from the environment when no credentials are set
+        profile = os.environ.get('AWS_PROFILE') or os.environ.get('AWS_DEFAULT_PROFILE') or ''
+        credentials = self._get_boto_credentials()
+        identity = hashlib.sha256(to_bytes(json.dumps([profile, credentials]), errors='surrogate_or_strict')).hexdigest()
+        return "/".join([self.instance_id, region_name, profile, identity])
+
+    def _broker_call(self, method, *args):
+        try:
+            return method(*args)
+        except (BrokerError, EnvironmentError) as e:
+            raise AnsibleConnectionFailure("SSM session broker failure: %s" % to_native(e))
+
     @_ssm_retry
     def exec_command(self, cmd, in_data=None, sudoable=True):
         ''' run a command on the ssm host '''
 
         super(Connection, self).exec_command(cmd, in_data=in_data, sudoable=sudoable)
 
+        # Deferred uploads have to land before anything can use them
+        self._flush_puts()
+
         display.vvv(u"EXEC {0}".format(to_text(cmd)), host=self.host)
 
         session = self._session
@@ -370,45 +568,113 @@ class Connection(ConnectionBase):
             session.stdin.write(to_bytes(chunk, errors='surrogate_or_strict'))
 
         # Read stdout between the markers
-        stdout = ''
+        stdout = []
         win_line = ''
         begin = False
-        stop_time = int(round(time.time())) + self.get_option('ssm_timeout')
+        returncode = None
+        stop_time = time.time() + self.get_option('ssm_timeout')
         while session.poll() is None:
-            remaining = stop_time - int(round(time.time()))
-            if remaining < 1:
+            remaining = stop_time - time.time()
+            if remaining <= 0:
                 self._timeout = True
-                display.vvvv(u"EXEC timeout stdout: {0}".format(to_text(stdout)), host=self.host)
+                display.vvvv(u"EXEC timeout stdout: {0}".format(to_text(''.join(stdout))), host=self.host)
                 raise AnsibleConnectionFailure("SSM exec_command timeout on host: %s"
                                                % self.instance_id)
-            if self._poll_stdout.poll(1000):
-                line = self._filter_ansi(self._stdout.readline())
+            lines = self._select_output(remaining)
+            if not lines:
+                display.vvvv(u"EXEC remaining: {0:.0f}".format(remaining), host=self.host)
+                continue
+
+            for idx, line in enumerate(lines):
+                line = self._filter_ansi(line)
                 display.vvvv(u"EXEC stdout line: {0}".format(to_text(line)), host=self.host)
+
+                if not begin and self.is_windows:
+                    win_line = win_line + line
+                    line = win_line
+
+                if mark_start in line:
+                    begin = True
+                    if not line.startswith(mark_start):
+                        stdout = []
+                    continue
+                if begin:
+                    if mark_end in line:
+                        # Hand anything read past the end marker back to the buffer
+                        self._stdout_buffer[0:0] = b''.join(lines[idx + 1:])
+                        break
+                    stdout.append(line)
             else:
-                display.vvvv(u"EXEC remaining: {0}".format(remaining), host=self.host)
                 continue
 
-            if not begin and self.is_windows:
-                win_line = win_line + line
-                line = win_line
+            stdout = ''.join(stdout)
+            display.vvvv(u"POST_PROCESS: {0}".format(to_text(stdout)), host=self.host)
+            returncode, stdout = self._post_process(stdout, mark_begin)
+            break
 
-            if mark_start in line:
-                begin = True
-                if not line.startswith(mark_start):
-                    stdout = ''
-                continue
-            if begin:
-                if mark_end in line:
-                    display.vvvv(u"POST_PROCESS: {0}".format(to_text(stdout)), host=self.host)
-                    returncode, stdout = self._post_process(stdout, mark_begin)
-                    break
-                else:
-                    stdout = stdout + line
+        if returncode is None:
+            raise AnsibleConnectionFailure("SSM session to host %s exited while running a command"
+                                           % self.instance_id)
 
         stderr = self._flush_stderr(session)
 
         return (returncode, stdout, stderr)
 
+    def _select_output(self, timeout):
+        ''' wait up to timeout seconds for output, collect any stderr and return complete stdout lines '''
+
+        if not self._selector.get_map():
+            # Both streams are closed, wait briefly for the plugin process to exit
+            time.sleep(min(timeout, 0.1))
+            return []
+
+        lines = []
+        for key, event in self._selector.select(timeout):
+            if key.data == 'stdout':
+                lines = self._read_stdout_lines()
+                if not lines and self._stdout_eof:
+                    # Nothing more will arrive, only keep an eye on the process from now on
+                    self._selector.unregister(key.fileobj)
+            else:
+                self._collect_stderr(key)
+
+        return lines
+
+    def _collect_stderr(self, key):
+        data = self._read_fd(key.fileobj)
+        if data:
+            self._stderr_chunks.append(data)
+        else:
+            self._selector.unregister(key.fileobj)
+
+    def _read_fd(self, fileobj):
+        ''' read whatever is available from a readable stream, b'' on EOF '''
+
+        try:
+            return os.read(fileobj.fileno(), self.READ_CHUNK_SIZE)
+        except OSError:
+            # the pty raises EIO once the plugin has closed its end
+            return b''
+
+    def _read_stdout_lines(self):
+        ''' read all available bytes from the pty and return the complete lines '''
+
+        data = self._read_fd(self._stdout)
+        self._stdout_eof = not data
+
+        if self._stdout_buffer is None:
+            self._stdout_buffer = bytearray()
+        self._stdout_buffer.extend(data)
+
+        # Keep any trailing partial line buffered until the rest arrives
+        end = self._stdout_buffer.rfind(b'\n')
+        if end == -1:
+            return []
+        complete = bytes(self._stdout_buffer[:end + 1])
+        del self._stdout_buffer[:end + 1]
+
+        return [line + b'\n' for line in complete.split(b'\n')[:-1]]
+
     def _prepare_terminal(self):
         ''' perform any one-time terminal settings '''
 
@@ -479,29 +745,27 @@ class Connection(ConnectionBase):
         return line
 
     def _flush_stderr(self, subprocess):
-        ''' read and return stderr with minimal blocking '''
+        ''' return the stderr collected so far plus anything available right now, without blocking '''
 
-        poll_stderr = select.poll()
-        poll_stderr.register(subprocess.stderr, select.POLLIN)
-        stderr = ''
+        if self._selector is not None and subprocess.poll() is None:
+            for key, event in self._selector.select(0):
+                if key.data == 'stderr':
+                    self._collect_stderr(key)
 
-        while subprocess.poll() is None:
-            if poll_stderr.poll(1):
-                line = subprocess.stderr.readline()
-                display.vvvv(u"stderr line: {0}".format(to_text(line)), host=self.host)
-                stderr = stderr + line
-            else:
-                break
+        stderr = b''.join(self._stderr_chunks or [])
+        self._stderr_chunks = []
+        if stderr:
+            display.vvvv(u"stderr: {0}".format(to_text(stderr)), host=self.host)
 
-        return stderr
+        return to_text(stderr, errors='surrogate_or_strict')
 
     def _get_url(self, client_method, bucket_name, out_path, http_method):
         ''' Generate URL for get_object / put_object '''
-        client = self._get_boto_client('s3')
+        client = self._get_s3_client()
         return client.generate_presigned_url(client_method, Params={'Bucket': bucket_name, 'Key': out_path}, ExpiresIn=3600, HttpMethod=http_method)
 
-    def _get_boto_client(self, service, region_name=None):
-        ''' Gets a boto3 client based on the STS token '''
+    def _get_boto_credentials(self):
+        ''' Gets the STS credentials from the connection options or the environment '''
 
         aws_access_key_id = self.get_option('access_key_id')
         aws_secret_access_key = self.get_option('secret_access_key')
@@ -510,13 +774,19 @@ class Connection(ConnectionBase):
             aws_access_key_id = os.environ.get("AWS_ACCESS_KEY_ID", None)
             aws_secret_access_key = os.environ.get("AWS_SECRET_ACCESS_KEY", None)
             aws_session_token = os.environ.get("AWS_SESSION_TOKEN", None)
-        client = boto3.client(
-            service,
-            aws_access_key_id=aws_access_key_id,
-            aws_secret_access_key=aws_secret_access_key,
-            aws_session_token=aws_session_token,
-            region_name=region_name)
-        return client
+        return (aws_access_key_id, aws_secret_access_key, aws_session_token)
+
+    def _get_boto_client(self, service, region_name=None):
+        ''' Gets a boto3 client based on the STS token '''
+
+        return boto_client_cache.client(service, region_name, self._get_boto_credentials())
+
+    def _get_s3_client(self):
+        ''' Gets the S3 client used for file transfers, creating it on first use '''
+
+        if self._s3_client is None:
+            self._s3_client = self._get_boto_client('s3')
+        return self._s3_client
 
     @_ssm_retry
     def _file_transport_command(self, in_path, out_path, ssm_action):
@@ -537,7 +807,7 @@ class Connection(ConnectionBase):
             get_command = "curl '%s' -o '%s'" % (
                 self._get_url('get_object', self.get_option('bucket_name'), s3_path, 'GET'), out_path)
 
-        client = self._get_boto_client('s3')
+        client = self._get_s3_client()
         if ssm_action == 'get':
             (returncode, stdout, stderr) = self.exec_command(put_command, in_data=None, sudoable=False)
             with open(to_bytes(out_path, errors='surrogate_or_strict'), 'wb') as data:
@@ -557,6 +827,110 @@ class Connection(ConnectionBase):
             raise AnsibleError("failed to transfer file to %s %s:\n%s\n%s" %
                                (to_native(in_path), to_native(out_path), to_native(stdout), to_native(stderr)))
 
+    def _flush_puts(self):
+        ''' transfer all deferred uploads to the host as a single archive '''
+
+        pending, self._pending_puts = self._pending_puts, []
+        if not pending:
+            return
+
+        display.vvv(u"PUT BATCH OF {0} FILES".format(len(pending)), host=self.host)
+        archive = BytesIO()
+        tar = tarfile.open(fileobj=archive, mode='w')
+        try:
+            for out_path, data in pending:
+                info = tarfile.TarInfo(out_path.lstrip('/'))
+                info.size = len(data)
+                info.mode = 0o600
+                info.mtime = int(time.time())
+                tar.addfile(info, BytesIO(data))
+        finally:
+            tar.close()
+        archive.seek(0)
+
+        bucket_name = self.get_option('bucket_name')
+        batch_name = "".join([random.choice(string.ascii_letters) for i in xrange(self.MARK_LENGTH)])
+        s3_path = "{0}/{1}.tar".format(self.instance_id, batch_name)
+        get_command = "curl '%s' | tar --no-same-owner -xf - -C /" % (
+            self._get_url('get_object', bucket_name, s3_path, 'GET'))
+
+        # The queue is emptied up front as exec_command flushes it too.  It is put back if the
+        # files do not arrive, so a retry of the command that triggered this flush sends them again.
+        try:
+            client = self._get_s3_client()
+            client.upload_fileobj(archive, bucket_name, s3_path)
+            try:
+                (returncode, stdout, stderr) = self.exec_command(get_command, in_data=None, sudoable=False)
+            finally:
+                client.delete_object(Bucket=bucket_name, Key=s3_path)
+
+            if returncode != 0:
+                raise AnsibleError("failed to transfer files to %s:\n%s\n%s" %
+                                   (", ".join(to_native(out_path) for out_path, data in pending),
+                                    to_native(stdout), to_native(stderr)))
+        except Exception:
+            self._pending_puts[0:0] = pending
+            raise
+
+    def _defer_put(self, in_path, out_path):
+        ''' queue a small upload for the next batch, returns False if it has to go now '''
+
+        if self.is_windows or not out_path.startswith('/'):
+            return False
+        b_in_path = to_bytes(in_path, errors='surrogate_or_strict')
+        if os.path.getsize(b_in_path) > self.TRANSFER_BATCH_MAX_SIZE:
+            return False
+
+        # The caller may remove in_path as soon as we return, so keep the content
+        with open(b_in_path, 'rb') as data:
+            self._pending_puts.append((out_path, data.read()))
+        return True
+
+    def _use_inband(self, in_path=None):
+        ''' whether in-band transfers are enabled, and in_path is small enough for one '''
+
+        threshold = self.get_option('inband_transfer_threshold')
+        if threshold <= 0:
+            return False
+        return in_path is None or os.path.getsize(to_bytes(in_path, errors='surrogate_or_strict')) <= threshold
+
+    def _inband_put(self, in_path, out_path):
+        ''' write a small file on the host by sending it through the session as base64 '''
+
+        with open(to_bytes(in_path, errors='surrogate_or_strict'), 'rb') as data:
+            encoded = to_text(base64.b64encode(data.read()))
+
+        if self.is_windows:
+            put_command = "[IO.File]::WriteAllBytes('%s', [Convert]::FromBase64String('%s'))" % (out_path, encoded)
+        else:
+            eof_mark = "".join([random.choice(string.ascii_letters) for i in xrange(self.MARK_LENGTH)])
+            put_command = "base64 -d > '%s' <<'%s'\n%s\n%s" % (
+                out_path, eof_mark, "\n".join(chunks(encoded, 76)), eof_mark)
+
+        (returncode, stdout, stderr) = self.exec_command(put_command, in_data=None, sudoable=False)
+        if returncode != 0:
+            raise AnsibleError("failed to transfer file to %s %s:\n%s\n%s" %
+                               (to_native(in_path), to_native(out_path), to_native(stdout), to_native(stderr)))
+        return (returncode, stdout, stderr)
+
+    def _inband_fetch(self, in_path, out_path):
+        ''' read a small file from the host through the session, returns None if it is too large '''
+
+        too_large = "".join([random.choice(string.ascii_letters) for i in xrange(self.MARK_LENGTH)])
+        get_command = "if [ $(wc -c < '%s') -le %d ]; then base64 '%s'; else echo %s; fi" % (
+            in_path, self.get_option('inband_transfer_threshold'), in_path, too_large)
+
+        (returncode, stdout, stderr) = self.exec_command(get_command, in_data=None, sudoable=False)
+        if returncode != 0:
+            raise AnsibleError("failed to transfer file to %s %s:\n%s\n%s" %
+                               (to_native(in_path), to_native(out_path), to_native(stdout), to_native(stderr)))
+        if too_large in stdout:
+            return None
+
+        with open(to_bytes(out_path, errors='surrogate_or_strict'), 'wb') as data:
+            data.write(base64.b64decode(to_bytes(stdout, errors='surrogate_or_strict')))
+        return (returncode, stdout, stderr)
+
     def put_file(self, in_path, out_path):
         ''' transfer a file from local to remote '''
 
@@ -566,6 +940,13 @@ class Connection(ConnectionBase):
         if not os.path.exists(to_bytes(in_path, errors='surrogate_or_strict')):
             raise AnsibleFileNotFound("file or module does not exist: {0}".format(to_native(in_path)))
 
+        if self._use_inband(in_path):
+            return self._inband_put(in_path, out_path)
+        if self.get_option('transfer_batch') and self._defer_put(in_path, out_path):
+            display.vvvv(u"PUT DEFERRED {0}".format(out_path), host=self.host)
+            return (0, '', '')
+
+        self._flush_puts()
         return self._file_transport_command(in_path, out_path, 'put')
 
     def fetch_file(self, in_path, out_path):
@@ -574,11 +955,37 @@ class Connection(ConnectionBase):
         super(Connection, self).fetch_file(in_path, out_path)
 
         display.vvv(u"FETCH {0} TO {1}".format(in_path, out_path), host=self.host)
+        self._flush_puts()
+        if not self.is_windows and self._use_inband():
+            result = self._inband_fetch(in_path, out_path)
+            if result is not None:
+                return result
         return self._file_transport_command(in_path, out_path, 'get')
 
     def close(self):
         ''' terminate the connection '''
         if self._session_id:
+            self._flush_puts()
+        self._close_session(discard=False)
+
+    def _close_session(self, discard):
+        ''' terminate the session, or hand it back to the session broker for reuse '''
+        if self._session_id:
+
+            if self._broker is not None:
+                if discard or self._timeout:
+                    display.vvv(u"DISCARDING POOLED SSM SESSION: {0}".format(self._session_id), host=self.host)
+                    self._broker_call(self._broker.discard, self._session_id)
+                    self._client.terminate_session(SessionId=self._session_id)
+                else:
+                    display.vvv(u"RELEASING POOLED SSM SESSION: {0}".format(self._session_id), host=self.host)
+                    self._broker_call(self._broker.release, self._session_id)
+                    display.vvv(u"SSM SESSION POOL STATS: {0}".format(self._broker_call(self._broker.stats)), host=self.host)
+                self._selector.close()
+                self._session.detach()
+                self._stdout.close()
+                self._session_id = ''
+                return
 
             display.vvv(u"CLOSING SSM CONNECTION TO: {0}".format(self.instance_id), host=self.host)
             if self._timeout:
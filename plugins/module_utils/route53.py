@@ -0,0 +1,75 @@
+# Copyright: (c) 2020, Ansible Project
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+"""
+Helpers shared by the Route 53 modules of community.aws.
+
+Changes to record sets and hosted zones are applied asynchronously, the API returns a
+ChangeInfo that is C(PENDING) until the change has reached every Route 53 DNS server
+and then C(INSYNC), which usually takes between 30 and 60 seconds.
+"""
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import time
+from collections import OrderedDict
+
+from ansible_collections.amazon.aws.plugins.module_utils.ec2 import AWSRetry
+
+from ansible_collections.community.aws.plugins.module_utils.waiters import WAIT_BACKOFF
+from ansible_collections.community.aws.plugins.module_utils.waiters import WAIT_MAX_DELAY
+from ansible_collections.community.aws.plugins.module_utils.waiters import WAIT_MIN_DELAY
+from ansible_collections.community.aws.plugins.module_utils.waiters import next_delay
+
+
+def decode_name(name):
+    # Due to a bug in either AWS or Boto, "special" characters are returned as octals, preventing round
+    # tripping of things like * and @.
+    return name.encode().decode('unicode_escape')
+
+
+def change_id(change):
+    ''' the bare id of a ChangeInfo or of a /change/ path '''
+    if isinstance(change, dict):
+        change = change['Id']
+    return change.replace('/change/', '')
+
+
+@AWSRetry.jittered_backoff()
+def get_change(client, change):
+    return client.get_change(Id=change_id(change))['ChangeInfo']
+
+
+def wait_for_changes(client, change_ids, timeout, min_delay=WAIT_MIN_DELAY, max_delay=WAIT_MAX_DELAY,
+                     backoff=WAIT_BACKOFF, clock=None, sleep=None):
+    '''
+    Poll many changes together until all of them are INSYNC or timeout seconds have passed.
+
+    Every round calls GetChange once for each change that is still pending, the delay between
+    rounds grows from min_delay by backoff up to max_delay. Returns a report with the last status
+    of every change, whether all of them are in sync, the number of rounds and the time taken.
+    '''
+    clock = clock or time.time
+    sleep = sleep or time.sleep
+    started = clock()
+    deadline = started + timeout
+    statuses = OrderedDict((change_id(c), 'PENDING') for c in change_ids)
+    delay = min_delay
+    polls = 0
+    while True:
+        polls += 1
+        for pending in [c for c, status in statuses.items() if status != 'INSYNC']:
+            statuses[pending] = get_change(client, pending)['Status']
+        in_sync = all(status == 'INSYNC' for status in statuses.values())
+        now = clock()
+        if in_sync or now >= deadline:
+            break
+        sleep(min(delay, deadline - now))
+        delay = next_delay(delay, backoff, max_delay)
+    return dict(
+        changes=[dict(id=c, status=status) for c, status in statuses.items()],
+        in_sync=in_sync,
+        polls=polls,
+        seconds=round(clock() - started, 3),
+    )
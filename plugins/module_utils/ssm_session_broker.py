@@ -0,0 +1,395 @@
+# Copyright: (c) 2020, Ansible Project
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+"""
+Controller side broker used by the community.aws.aws_ssm connection plugin.
+
+Each Ansible worker normally calls ``StartSession`` and spawns its own
+session-manager-plugin process.  The broker is a small daemon listening on a
+Unix socket that owns those plugin processes instead, lends them (by passing
+the pty and pipe file descriptors over the socket) to one connection at a time
+and keeps them warm for later tasks and playbook runs until they have been idle
+for the TTL given by the connection that released them.  The broker itself exits
+once it has no sessions left and has been idle for the ``idle_ttl`` it was
+started with.
+
+This file only depends on the standard library so it can be started directly
+with ``python ssm_session_broker.py <socket_path> <idle_ttl>``.
+"""
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import array
+import errno
+import fcntl
+import json
+import os
+import pty
+import select
+import socket
+import subprocess
+import sys
+import time
+
+HAS_FD_PASSING = hasattr(socket.socket, 'sendmsg') and hasattr(socket, 'SCM_RIGHTS')
+
+MAX_FDS = 3
+MAX_MESSAGE = 65536
+REQUEST_TIMEOUT = 10
+
+
+class BrokerError(Exception):
+    pass
+
+
+def _send_message(sock, message, fds=None):
+    data = json.dumps(message).encode('utf-8')
+    if fds:
+        ancillary = [(socket.SOL_SOCKET, socket.SCM_RIGHTS, array.array('i', fds))]
+        sent = sock.sendmsg([data], ancillary)
+    else:
+        sent = sock.send(data)
+    if sent < len(data):
+        sock.sendall(data[sent:])
+    sock.shutdown(socket.SHUT_WR)
+
+
+def _recv_message(sock):
+    fds = array.array('i')
+    chunks = []
+    while True:
+        data, ancillary, flags, address = sock.recvmsg(MAX_MESSAGE, socket.CMSG_SPACE(MAX_FDS * fds.itemsize))
+        for level, kind, cmsg_data in ancillary:
+            if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+                fds.frombytes(cmsg_data[:len(cmsg_data) - (len(cmsg_data) % fds.itemsize)])
+        if not data:
+            break
+        chunks.append(data)
+    if not chunks:
+        raise BrokerError('empty message from ssm session broker')
+    return json.loads(b''.join(chunks).decode('utf-8')), list(fds)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except OSError as e:
+        return e.errno == errno.EPERM
+    return True
+
+
+class PooledSession(object):
+    ''' a session-manager-plugin process owned by the broker '''
+
+    def __init__(self, key, session_id, process, stdout_fd):
+        self.key = key
+        self.session_id = session_id
+        self.process = process
+        self.stdout_fd = stdout_fd
+        self.lessee = None
+        self.last_used = time.time()
+        self.idle_ttl = None
+
+    def fds(self):
+        return [self.stdout_fd, self.process.stdin.fileno(), self.process.stderr.fileno()]
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def close(self, grace=5):
+        if self.alive():
+            try:
+                self.process.stdin.write(b"\nexit\n")
+            except (IOError, OSError):
+                pass
+            deadline = time.time() + grace
+            while self.alive() and time.time() < deadline:
+                time.sleep(0.1)
+            if self.alive():
+                self.process.kill()
+                self.process.wait()
+        for stream in (self.process.stdin, self.process.stderr):
+            try:
+                stream.close()
+            except (IOError, OSError):
+                pass
+        try:
+            os.close(self.stdout_fd)
+        except OSError:
+            pass
+
+
+class SessionBroker(object):
+    ''' hands out warm SSM sessions keyed by instance, region and credentials '''
+
+    def __init__(self, socket_path, idle_ttl):
+        self.socket_path = socket_path
+        self.idle_ttl = idle_ttl
+        self.idle = {}
+        self.leased = {}
+        self.stats = dict(hits=0, misses=0, spawned=0, released=0, discarded=0, expired=0)
+        self.last_activity = time.time()
+        self._sock = None
+
+    def bind(self):
+        ''' bind the broker socket, returns False if another broker already owns it '''
+
+        with open(self.socket_path + '.lock', 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            if os.path.exists(self.socket_path):
+                probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                try:
+                    probe.connect(self.socket_path)
+                    return False
+                except socket.error:
+                    os.unlink(self.socket_path)
+                finally:
+                    probe.close()
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            old_umask = os.umask(0o177)
+            try:
+                sock.bind(self.socket_path)
+            finally:
+                os.umask(old_umask)
+            sock.listen(64)
+            self._sock = sock
+        return True
+
+    def serve(self):
+        ''' run until every pooled session has expired and the broker has been idle for idle_ttl '''
+
+        if self._sock is None and not self.bind():
+            return
+        try:
+            while True:
+                readable = select.select([self._sock], [], [], 1)[0]
+                if readable:
+                    conn, address = self._sock.accept()
+                    try:
+                        self._handle(conn)
+                    except (BrokerError, socket.error, ValueError):
+                        pass
+                    finally:
+                        conn.close()
+                    self.last_activity = time.time()
+                self.reap()
+                if not self.idle and not self.leased and time.time() - self.last_activity > self.idle_ttl:
+                    break
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        for session in list(self.leased.values()):
+            session.close()
+        for sessions in self.idle.values():
+            for session in sessions:
+                session.close()
+        self.idle = {}
+        self.leased = {}
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+            try:
+                os.unlink(self.socket_path)
+            except OSError:
+                pass
+
+    def reap(self):
+        ''' drop dead or expired idle sessions and sessions whose lessee has gone away '''
+
+        now = time.time()
+        for key in list(self.idle):
+            keep = []
+            for session in self.idle[key]:
+                if not session.alive():
+                    session.close()
+                elif now - session.last_used > session.idle_ttl:
+                    self.stats['expired'] += 1
+                    session.close()
+                else:
+                    keep.append(session)
+            if keep:
+                self.idle[key] = keep
+            else:
+                del self.idle[key]
+        for session_id, session in list(self.leased.items()):
+            if not session.alive() or not _pid_alive(session.lessee):
+                self.stats['discarded'] += 1
+                del self.leased[session_id]
+                session.close()
+
+    def _handle(self, conn):
+        conn.settimeout(REQUEST_TIMEOUT)
+        request = _recv_message(conn)[0]
+        op = request.get('op')
+        handler = getattr(self, '_op_%s' % op, None)
+        if handler is None:
+            _send_message(conn, dict(status='error', msg='unknown op %s' % op))
+            return
+        reply, fds = handler(request)
+        _send_message(conn, reply, fds)
+
+    def _op_acquire(self, request):
+        sessions = self.idle.get(request['key'], [])
+        while sessions:
+            session = sessions.pop()
+            if session.alive():
+                session.lessee = request['pid']
+                self.leased[session.session_id] = session
+                self.stats['hits'] += 1
+                return dict(status='hit', session_id=session.session_id, pid=session.process.pid), session.fds()
+            session.close()
+        self.stats['misses'] += 1
+        return dict(status='miss'), None
+
+    def _op_spawn(self, request):
+        stdout_r, stdout_w = pty.openpty()
+        try:
+            process = subprocess.Popen(
+                request['cmd'],
+                stdin=subprocess.PIPE,
+                stdout=stdout_w,
+                stderr=subprocess.PIPE,
+                close_fds=True,
+                bufsize=0,
+            )
+        except OSError as e:
+            os.close(stdout_r)
+            return dict(status='error', msg='failed to start %s: %s' % (request['cmd'][0], e)), None
+        finally:
+            os.close(stdout_w)
+        session = PooledSession(request['key'], request['session_id'], process, stdout_r)
+        session.lessee = request['pid']
+        self.leased[session.session_id] = session
+        self.stats['spawned'] += 1
+        return dict(status='spawned', session_id=session.session_id, pid=process.pid), session.fds()
+
+    def _op_release(self, request):
+        session = self.leased.pop(request['session_id'], None)
+        if session is None or not session.alive():
+            return dict(status='unknown'), None
+        session.lessee = None
+        session.last_used = time.time()
+        session.idle_ttl = request.get('ttl', self.idle_ttl)
+        self.idle.setdefault(session.key, []).append(session)
+        self.stats['released'] += 1
+        return dict(status='released'), None
+
+    def _op_discard(self, request):
+        session = self.leased.pop(request['session_id'], None)
+        if session is None:
+            return dict(status='unknown'), None
+        session.close(grace=0)
+        self.stats['discarded'] += 1
+        return dict(status='discarded'), None
+
+    def _op_stats(self, request):
+        stats = dict(self.stats)
+        stats['idle'] = sum(len(sessions) for sessions in self.idle.values())
+        stats['leased'] = len(self.leased)
+        return dict(status='ok', stats=stats), None
+
+
+class BrokeredSession(object):
+    ''' stand-in for the subprocess.Popen object of a session owned by the broker '''
+
+    def __init__(self, pid, stdin_fd, stderr_fd):
+        self.pid = pid
+        self.stdin = os.fdopen(stdin_fd, 'wb', 0)
+        self.stderr = os.fdopen(stderr_fd, 'rb', 0)
+        self.returncode = None
+
+    def poll(self):
+        if self.returncode is None and not _pid_alive(self.pid):
+            self.returncode = -1
+        return self.returncode
+
+    def detach(self):
+        ''' drop our copies of the descriptors, the broker keeps its own '''
+        self.stdin.close()
+        self.stderr.close()
+
+
+class BrokerClient(object):
+    ''' talks to a SessionBroker, starting one if none is listening '''
+
+    def __init__(self, socket_path, idle_ttl, python=None):
+        self.socket_path = socket_path
+        self.idle_ttl = idle_ttl
+        self.python = python or sys.executable
+
+    def request(self, message, start=True):
+        message = dict(message, pid=os.getpid())
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(REQUEST_TIMEOUT)
+        try:
+            try:
+                sock.connect(self.socket_path)
+            except socket.error:
+                if not start:
+                    raise BrokerError('ssm session broker is not running at %s' % self.socket_path)
+                sock.close()
+                self.start()
+                return self.request(message, start=False)
+            _send_message(sock, message)
+            reply, fds = _recv_message(sock)
+        finally:
+            sock.close()
+        if reply.get('status') == 'error':
+            for fd in fds:
+                os.close(fd)
+            raise BrokerError(reply.get('msg'))
+        return reply, fds
+
+    def start(self, timeout=10):
+        ''' launch a detached broker process and wait for its socket '''
+
+        with open(os.devnull, 'r+b') as devnull:
+            subprocess.Popen(
+                [self.python, os.path.abspath(__file__.replace('.pyc', '.py')), self.socket_path, str(self.idle_ttl)],
+                stdin=devnull, stdout=devnull, stderr=devnull,
+                close_fds=True, start_new_session=True,
+            )
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.socket_path)
+                return
+            except socket.error:
+                time.sleep(0.05)
+            finally:
+                probe.close()
+        raise BrokerError('timed out waiting for the ssm session broker at %s' % self.socket_path)
+
+    def acquire(self, key):
+        ''' returns (session_id, BrokeredSession, stdout_fd) or None on a pool miss '''
+        reply, fds = self.request(dict(op='acquire', key=key))
+        if reply['status'] != 'hit':
+            return None
+        return reply['session_id'], BrokeredSession(reply['pid'], fds[1], fds[2]), fds[0]
+
+    def spawn(self, key, cmd, session_id):
+        ''' start session-manager-plugin inside the broker and lease it to us '''
+        reply, fds = self.request(dict(op='spawn', key=key, cmd=cmd, session_id=session_id))
+        return BrokeredSession(reply['pid'], fds[1], fds[2]), fds[0]
+
+    def release(self, session_id):
+        ''' hand a session back, the broker keeps it for our idle_ttl '''
+        return self.request(dict(op='release', session_id=session_id, ttl=self.idle_ttl), start=False)[0]['status']
+
+    def discard(self, session_id):
+        return self.request(dict(op='discard', session_id=session_id), start=False)[0]['status']
+
+    def stats(self):
+        return self.request(dict(op='stats'), start=False)[0]['stats']
+
+
+def main(argv):
+    broker = SessionBroker(argv[1], int(argv[2]))
+    broker.serve()
+
+
+if __name__ == '__main__':
+    main(sys.argv)
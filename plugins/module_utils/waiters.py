@@ -0,0 +1,22 @@
+# Copyright: (c) 2020, Ansible Project
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+"""
+Backoff settings shared by the hand written pollers of community.aws.
+
+The pollers in ec2_asg, ec2_instance, kinesis_stream and the Route 53 modules start
+polling WAIT_MIN_DELAY seconds apart and grow the delay by WAIT_BACKOFF after every
+poll that did not finish, up to WAIT_MAX_DELAY seconds.
+"""
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+WAIT_MIN_DELAY = 2
+WAIT_MAX_DELAY = 20
+WAIT_BACKOFF = 1.5
+
+
+def next_delay(delay, backoff=WAIT_BACKOFF, max_delay=WAIT_MAX_DELAY):
+    ''' The delay to sleep before the next poll, given the delay before this one. '''
+    return min(delay * backoff, max_delay)
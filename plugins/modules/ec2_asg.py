@@ -26,8 +26,133 @@ options:
   name:
     description:
       - Unique name for group to be created or deleted.
-    required: true
+      - Required unless I(groups) is used.
     type: str
+  groups:
+    description:
+      - Reconcile many groups in one run instead of the single group named by I(name).
+      - Only the named groups are described, 50 names per call, the differences are computed locally
+        and the changes are applied concurrently, see I(batch_concurrency) and I(batch_rate_limit).
+      - Groups are created, updated or force deleted; the module does not wait for instances and
+        does not replace them in this mode, and options outside of the ones below are ignored.
+    type: list
+    elements: dict
+    version_added: 1.3.0
+    suboptions:
+      name:
+        description:
+          - Name of the group.
+        required: true
+        type: str
+      state:
+        description:
+          - Whether the group should exist. Absent groups are deleted with their instances.
+        choices: ['present', 'absent']
+        default: present
+        type: str
+      launch_config_name:
+        description:
+          - As the top level I(launch_config_name).
+        type: str
+      launch_template:
+        description:
+          - As the top level I(launch_template).
+        type: dict
+        suboptions:
+          version:
+            description:
+              - The version number of the launch template to use, defaults to the latest version.
+            type: str
+          launch_template_name:
+            description:
+              - The name of the launch template.
+            type: str
+          launch_template_id:
+            description:
+              - The id of the launch template.
+            type: str
+      mixed_instances_policy:
+        description:
+          - As the top level I(mixed_instances_policy).
+        type: dict
+        suboptions:
+          instance_types:
+            description:
+              - A list of instance_types.
+            type: list
+            elements: str
+      min_size:
+        description:
+          - Minimum number of instances in the group. Required to create it.
+        type: int
+      max_size:
+        description:
+          - Maximum number of instances in the group. Required to create it.
+        type: int
+      desired_capacity:
+        description:
+          - Desired number of instances in the group.
+        type: int
+      max_instance_lifetime:
+        description:
+          - As the top level I(max_instance_lifetime).
+        type: int
+      availability_zones:
+        description:
+          - As the top level I(availability_zones).
+        type: list
+        elements: str
+      vpc_zone_identifier:
+        description:
+          - As the top level I(vpc_zone_identifier).
+        type: list
+        elements: str
+      load_balancers:
+        description:
+          - Classic load balancers the group should be attached to, others are detached.
+        type: list
+        elements: str
+      target_group_arns:
+        description:
+          - Target groups the group should be attached to, others are detached.
+        type: list
+        elements: str
+      health_check_period:
+        description:
+          - As the top level I(health_check_period).
+        type: int
+      health_check_type:
+        description:
+          - As the top level I(health_check_type).
+        choices: ['EC2', 'ELB']
+        type: str
+      default_cooldown:
+        description:
+          - As the top level I(default_cooldown).
+        type: int
+      termination_policies:
+        description:
+          - As the top level I(termination_policies).
+        type: list
+        elements: str
+      tags:
+        description:
+          - As the top level I(tags).
+        type: list
+        elements: dict
+  batch_concurrency:
+    description:
+      - With I(groups), how many groups are changed at the same time.
+    default: 10
+    type: int
+    version_added: 1.3.0
+  batch_rate_limit:
+    description:
+      - With I(groups), the maximum number of create, update, attach, detach, tag and delete calls per second across all groups.
+      - C(0) removes the limit.
+    default: 5
+    type: float
+    version_added: 1.3.0
   load_balancers:
     description:
       - List of ELB names to use for the group. Use for classic load balancers.
@@ -175,6 +300,15 @@ options:
         instances have a lifecycle_state of  "InService" and  a health_status of "Healthy".
     default: true
     type: bool
+  watch_scaling_activities:
+    description:
+      - While waiting, also poll the group's scaling activities with a single lightweight
+        C(DescribeScalingActivities) call every few seconds and re-check the group as soon as an
+        activity starts or changes status.
+      - Between activity changes the group, its load balancers and target groups are polled less and less often.
+    default: false
+    type: bool
+    version_added: 1.3.0
   termination_policies:
     description:
         - An ordered list of criteria used for selecting instances to be removed from the Auto Scaling group when reducing capacity.
@@ -346,6 +480,26 @@ EXAMPLES = r'''
     tags:
       - environment: production
         propagate_at_launch: no
+
+# Reconcile many groups at once
+
+- community.aws.ec2_asg:
+    batch_concurrency: 20
+    batch_rate_limit: 8
+    groups:
+      - name: web-blue
+        launch_template:
+          launch_template_name: web
+        min_size: 2
+        max_size: 10
+        target_group_arns: [ 'arn:aws:elasticloadbalancing:us-east-1:123456789012:targetgroup/web/0123456789abcdef' ]
+      - name: web-green
+        launch_template:
+          launch_template_name: web
+          version: '3'
+        desired_capacity: 0
+      - name: legacy
+        state: absent
 '''
 
 RETURN = r'''
@@ -523,10 +677,44 @@ metrics_collection:
             "Metric": "GroupInServiceInstances"
         }
     ]
+group_results:
+    description: With I(groups), one entry per group in the order they were given.
+    returned: when I(groups) is used
+    type: list
+    version_added: 1.3.0
+    sample: [
+        {
+            "name": "web-blue",
+            "action": "updated",
+            "changed": true,
+            "changes": ["MaxSize", "TargetGroupARNs"],
+            "failed": false,
+            "properties": {"auto_scaling_group_name": "web-blue", "max_size": 10}
+        }
+    ]
+waits:
+    description: One entry for every time the module waited on the group, its load balancers or target groups.
+    returned: success
+    type: list
+    version_added: 1.3.0
+    sample: [
+        {
+            "name": "new_instances",
+            "seconds": 63.2,
+            "polls": 7,
+            "api_calls": 12,
+            "throttled": 0,
+            "activity_changes": 2
+        }
+    ]
 '''
 
+import random
+import threading
 import time
 import traceback
+from functools import partial
+from multiprocessing.pool import ThreadPool
 
 from ansible.module_utils._text import to_native
 from ansible_collections.amazon.aws.plugins.module_utils.core import AnsibleAWSModule
@@ -534,6 +722,10 @@ from ansible_collections.amazon.aws.plugins.module_utils.ec2 import (
     AWSRetry,
     camel_dict_to_snake_dict
 )
+from ansible_collections.community.aws.plugins.module_utils.waiters import WAIT_BACKOFF
+from ansible_collections.community.aws.plugins.module_utils.waiters import WAIT_MAX_DELAY
+from ansible_collections.community.aws.plugins.module_utils.waiters import WAIT_MIN_DELAY
+from ansible_collections.community.aws.plugins.module_utils.waiters import next_delay
 
 try:
     import botocore
@@ -551,6 +743,181 @@ INSTANCE_ATTRIBUTES = ('instance_id', 'health_status', 'lifecycle_state', 'launc
 backoff_params = dict(tries=10, delay=3, backoff=1.5)
 
 
+class ResourceCache(object):
+    ''' Memoises lookups of resources an ASG refers to (clients, target group names,
+        launch configurations and templates) for the duration of one module run.
+        Entries are keyed by (kind, key) and dropped with invalidate() whenever
+        the module changes what they describe.  Batch mode shares the cache between
+        threads, so entries are only touched while holding the lock; loaders run
+        outside of it and two threads may occasionally load the same entry. '''
+
+    def __init__(self):
+        self.entries = dict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, kind, key, loader):
+        with self._lock:
+            if (kind, key) in self.entries:
+                self.hits += 1
+                return self.entries[(kind, key)]
+            self.misses += 1
+        value = loader()
+        with self._lock:
+            self.entries[(kind, key)] = value
+        return value
+
+    def get_many(self, kind, keys, loader):
+        ''' loader is called once with the keys that are not cached yet and returns a dict '''
+        with self._lock:
+            found = dict((key, self.entries[(kind, key)]) for key in keys if (kind, key) in self.entries)
+            missing = [key for key in keys if key not in found]
+            self.hits += len(found)
+            self.misses += len(missing)
+        if missing:
+            loaded = loader(missing)
+            with self._lock:
+                for key, value in loaded.items():
+                    self.entries[(kind, key)] = value
+            found.update(loaded)
+        return [found[key] for key in keys if key in found]
+
+    def invalidate(self, kind, keys=None):
+        with self._lock:
+            for entry in list(self.entries):
+                if entry[0] == kind and (keys is None or entry[1] in keys):
+                    del self.entries[entry]
+
+
+resource_cache = ResourceCache()
+
+THROTTLING_ERROR_CODES = ('Throttling', 'ThrottlingException', 'RequestLimitExceeded', 'TooManyRequestsException')
+
+
+class ApiCallCounter(object):
+    ''' counts the requests made by every client handed out by get_client() '''
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, **kwargs):
+        with self._lock:
+            self.count += 1
+
+
+api_calls = ApiCallCounter()
+wait_log = []
+
+
+class ScalingActivities(object):
+    ''' reports whether the group's most recent scaling activities changed since the last look '''
+
+    def __init__(self, connection, group_name):
+        self.connection = connection
+        self.group_name = group_name
+        self.seen = None
+
+    def changed(self):
+        activities = describe_scaling_activities(self.connection, self.group_name)
+        state = dict((a['ActivityId'], a['StatusCode']) for a in activities)
+        changed = self.seen is not None and state != self.seen
+        self.seen = state
+        return changed
+
+
+class Waiter(object):
+    ''' Polls check() until it returns something truthy or timeout seconds have passed.
+
+        The first polls come quickly and the delay then grows by backoff up to max_delay,
+        randomised by +/- jitter.  A throttled poll doubles the delay.  When given a
+        ScalingActivities the waiter looks at the activities every activity_interval
+        seconds while it sleeps and polls straight away, back at min_delay, when they change. '''
+
+    def __init__(self, name, timeout, min_delay=WAIT_MIN_DELAY, max_delay=WAIT_MAX_DELAY, backoff=WAIT_BACKOFF, jitter=0.2,
+                 activities=None, activity_interval=5, clock=None, sleep=None):
+        self.name = name
+        self.timeout = timeout
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.backoff = backoff
+        self.jitter = jitter
+        self.activities = activities
+        self.activity_interval = activity_interval
+        self.clock = clock or time.time
+        self.sleep = sleep or time.sleep
+        self.stats = dict(name=name, seconds=0, polls=0, api_calls=0, throttled=0, activity_changes=0)
+
+    def wait(self, check, msg):
+        start = self.clock()
+        deadline = start + self.timeout
+        first_call = api_calls.count
+        delay = self.min_delay
+        if self.activities:
+            self._activities_changed()
+        try:
+            while True:
+                self.stats['polls'] += 1
+                try:
+                    result = check()
+                except botocore.exceptions.ClientError as e:
+                    if e.response.get('Error', {}).get('Code') not in THROTTLING_ERROR_CODES:
+                        raise
+                    self.stats['throttled'] += 1
+                    result = None
+                    delay = min(delay * 2, self.max_delay * 2)
+                if result:
+                    return result
+                if self.clock() >= deadline:
+                    # waiting took too long
+                    module.fail_json(msg="%s. %s" % (msg, time.asctime()))
+                if self._sleep(delay, deadline):
+                    delay = self.min_delay
+                else:
+                    delay = next_delay(delay, self.backoff, self.max_delay)
+        finally:
+            self.stats['seconds'] = round(self.clock() - start, 1)
+            self.stats['api_calls'] = api_calls.count - first_call
+            wait_log.append(self.stats)
+
+    def _sleep(self, delay, deadline):
+        ''' sleep for about delay seconds, returns True if the scaling activities changed meanwhile '''
+        if self.jitter:
+            delay *= random.uniform(1 - self.jitter, 1 + self.jitter)
+        wake = min(self.clock() + delay, deadline)
+        while True:
+            remaining = wake - self.clock()
+            if remaining <= 0:
+                return False
+            if not self.activities:
+                self.sleep(remaining)
+                return False
+            self.sleep(min(remaining, self.activity_interval))
+            if self._activities_changed():
+                return True
+
+    def _activities_changed(self):
+        try:
+            changed = self.activities.changed()
+        except (botocore.exceptions.ClientError, botocore.exceptions.BotoCoreError) as e:
+            module.debug("Not watching scaling activities of %s any more: %s" % (self.activities.group_name, to_native(e)))
+            self.activities = None
+            return False
+        if changed:
+            self.stats['activity_changes'] += 1
+        return changed
+
+
+def get_waiter(connection, group_name, name, timeout=None, watch_activities=True):
+    if timeout is None:
+        timeout = module.params.get('wait_timeout')
+    activities = None
+    if watch_activities and module.params.get('watch_scaling_activities'):
+        activities = ScalingActivities(connection, group_name)
+    return Waiter(name, timeout, activities=activities)
+
+
 @AWSRetry.backoff(**backoff_params)
 def describe_autoscaling_groups(connection, group_name):
     pg = connection.get_paginator('describe_auto_scaling_groups')
@@ -558,8 +925,25 @@ def describe_autoscaling_groups(connection, group_name):
 
 
 @AWSRetry.backoff(**backoff_params)
-def deregister_lb_instances(connection, lb_name, instance_id):
-    connection.deregister_instances_from_load_balancer(LoadBalancerName=lb_name, Instances=[dict(InstanceId=instance_id)])
+def describe_named_autoscaling_groups(connection, group_names):
+    ''' describes the named groups, AutoScalingGroupNames takes at most 50 names per request '''
+    pg = connection.get_paginator('describe_auto_scaling_groups')
+    groups = []
+    for i in range(0, len(group_names), 50):
+        result = pg.paginate(AutoScalingGroupNames=group_names[i:i + 50]).build_full_result()
+        groups.extend(result.get('AutoScalingGroups', []))
+    return groups
+
+
+@AWSRetry.backoff(**backoff_params)
+def describe_scaling_activities(connection, group_name):
+    return connection.describe_scaling_activities(AutoScalingGroupName=group_name, MaxRecords=20)['Activities']
+
+
+@AWSRetry.backoff(**backoff_params)
+def deregister_lb_instances(connection, lb_name, instance_ids):
+    connection.deregister_instances_from_load_balancer(LoadBalancerName=lb_name,
+                                                       Instances=[dict(InstanceId=i) for i in instance_ids])
 
 
 @AWSRetry.backoff(**backoff_params)
@@ -642,16 +1026,22 @@ def detach_load_balancers(connection, asg_name, load_balancers):
 @AWSRetry.backoff(**backoff_params)
 def attach_lb_target_groups(connection, asg_name, target_group_arns):
     connection.attach_load_balancer_target_groups(AutoScalingGroupName=asg_name, TargetGroupARNs=target_group_arns)
+    resource_cache.invalidate('target_group', target_group_arns)
 
 
 @AWSRetry.backoff(**backoff_params)
 def detach_lb_target_groups(connection, asg_name, target_group_arns):
     connection.detach_load_balancer_target_groups(AutoScalingGroupName=asg_name, TargetGroupARNs=target_group_arns)
+    resource_cache.invalidate('target_group', target_group_arns)
 
 
 @AWSRetry.backoff(**backoff_params)
 def update_asg(connection, **params):
     connection.update_auto_scaling_group(**params)
+    if 'LaunchConfigurationName' in params or 'LaunchTemplate' in params or 'MixedInstancesPolicy' in params:
+        # a template referenced without a version resolves to its latest one, look it up again next time
+        resource_cache.invalidate('launch_configuration')
+        resource_cache.invalidate('launch_template')
 
 
 @AWSRetry.backoff(catch_extra_error_codes=['ScalingActivityInProgress'], **backoff_params)
@@ -659,12 +1049,40 @@ def delete_asg(connection, asg_name, force_delete):
     connection.delete_auto_scaling_group(AutoScalingGroupName=asg_name, ForceDelete=force_delete)
 
 
+@AWSRetry.jittered_backoff()
+def delete_asg_tags(connection, tags):
+    connection.delete_tags(Tags=tags)
+
+
+@AWSRetry.jittered_backoff()
+def create_or_update_asg_tags(connection, tags):
+    connection.create_or_update_tags(Tags=tags)
+
+
 @AWSRetry.backoff(**backoff_params)
 def terminate_asg_instance(connection, instance_id, decrement_capacity):
     connection.terminate_instance_in_auto_scaling_group(InstanceId=instance_id,
                                                         ShouldDecrementDesiredCapacity=decrement_capacity)
 
 
+def get_client(service):
+    def connect():
+        client = module.client(service)
+        client.meta.events.register('before-call', api_calls)
+        return client
+
+    return resource_cache.get('client', service, connect)
+
+
+def describe_target_group_names(target_group_arns):
+    def load(arns):
+        tg_paginator = get_client('elbv2').get_paginator('describe_target_groups')
+        tg_result = tg_paginator.paginate(TargetGroupArns=arns).build_full_result()
+        return dict((tg['TargetGroupArn'], tg['TargetGroupName']) for tg in tg_result['TargetGroups'])
+
+    return resource_cache.get_many('target_group', target_group_arns, load)
+
+
 def enforce_required_arguments_for_create():
     ''' As many arguments are not required for autoscale group deletion
         they cannot be mandatory arguments for the module, so we enforce
@@ -752,33 +1170,26 @@ def get_properties(autoscaling_group):
     properties['metrics_collection'] = metrics
 
     if properties['target_group_arns']:
-        elbv2_connection = module.client('elbv2')
-        tg_paginator = elbv2_connection.get_paginator('describe_target_groups')
-        tg_result = tg_paginator.paginate(
-            TargetGroupArns=properties['target_group_arns']
-        ).build_full_result()
-        target_groups = tg_result['TargetGroups']
+        properties['target_group_names'] = describe_target_group_names(properties['target_group_arns'])
     else:
-        target_groups = []
-
-    properties['target_group_names'] = [
-        tg['TargetGroupName']
-        for tg in target_groups
-    ]
+        properties['target_group_names'] = []
 
     return properties
 
 
 def get_launch_object(connection, ec2_connection):
+    return resolve_launch_object(connection, ec2_connection, module.params.get('launch_config_name'),
+                                 module.params.get('launch_template'), module.params.get('mixed_instances_policy'))
+
+
+def resolve_launch_object(connection, ec2_connection, launch_config_name, launch_template, mixed_instances_policy):
     launch_object = dict()
-    launch_config_name = module.params.get('launch_config_name')
-    launch_template = module.params.get('launch_template')
-    mixed_instances_policy = module.params.get('mixed_instances_policy')
     if launch_config_name is None and launch_template is None:
         return launch_object
     elif launch_config_name:
         try:
-            launch_configs = describe_launch_configurations(connection, launch_config_name)
+            launch_configs = resource_cache.get('launch_configuration', launch_config_name,
+                                                lambda: describe_launch_configurations(connection, launch_config_name))
         except (botocore.exceptions.ClientError, botocore.exceptions.BotoCoreError) as e:
             module.fail_json(msg="Failed to describe launch configurations",
                              exception=traceback.format_exc())
@@ -787,7 +1198,9 @@ def get_launch_object(connection, ec2_connection):
         launch_object = {"LaunchConfigurationName": launch_configs['LaunchConfigurations'][0]['LaunchConfigurationName']}
         return launch_object
     elif launch_template:
-        lt = describe_launch_templates(ec2_connection, launch_template)['LaunchTemplates'][0]
+        lt_key = (launch_template['launch_template_id'], launch_template['launch_template_name'])
+        lt = resource_cache.get('launch_template', lt_key,
+                                lambda: describe_launch_templates(ec2_connection, launch_template))['LaunchTemplates'][0]
         if launch_template['version'] is not None:
             launch_object = {"LaunchTemplate": {"LaunchTemplateId": lt['LaunchTemplateId'], "Version": launch_template['version']}}
         else:
@@ -809,33 +1222,41 @@ def get_launch_object(connection, ec2_connection):
         return launch_object
 
 
-def elb_dreg(asg_connection, group_name, instance_id):
+def elb_dreg(asg_connection, group_name, instance_ids):
+    ''' De-register a batch of instances from the group's classic ELBs and wait for them to drain.
+        Each load balancer gets a single de-registration call and a single health poll per
+        iteration covering every instance in the batch. '''
+    if not instance_ids:
+        return
     as_group = describe_autoscaling_groups(asg_connection, group_name)[0]
     wait_timeout = module.params.get('wait_timeout')
-    count = 1
     if as_group['LoadBalancerNames'] and as_group['HealthCheckType'] == 'ELB':
-        elb_connection = module.client('elb')
+        elb_connection = get_client('elb')
     else:
         return
 
+    pending = dict()
     for lb in as_group['LoadBalancerNames']:
-        deregister_lb_instances(elb_connection, lb, instance_id)
-        module.debug("De-registering %s from ELB %s" % (instance_id, lb))
+        deregister_lb_instances(elb_connection, lb, instance_ids)
+        module.debug("De-registering %s from ELB %s" % (", ".join(instance_ids), lb))
+        pending[lb] = set(instance_ids)
 
-    wait_timeout = time.time() + wait_timeout
-    while wait_timeout > time.time() and count > 0:
-        count = 0
-        for lb in as_group['LoadBalancerNames']:
+    def drained():
+        for lb in list(pending):
             lb_instances = describe_instance_health(elb_connection, lb, [])
+            in_service = set()
             for i in lb_instances['InstanceStates']:
-                if i['InstanceId'] == instance_id and i['State'] == "InService":
-                    count += 1
+                if i['InstanceId'] in pending[lb] and i['State'] == "InService":
+                    in_service.add(i['InstanceId'])
                     module.debug("%s: %s, %s" % (i['InstanceId'], i['State'], i['Description']))
-        time.sleep(10)
+            if in_service:
+                pending[lb] = in_service
+            else:
+                del pending[lb]
+        return not pending
 
-    if wait_timeout <= time.time():
-        # waiting took too long
-        module.fail_json(msg="Waited too long for instance to deregister. {0}".format(time.asctime()))
+    get_waiter(asg_connection, group_name, 'elb_deregistration', wait_timeout).wait(
+        drained, "Waited too long for instances to deregister")
 
 
 def elb_healthy(asg_connection, elb_connection, group_name):
@@ -915,19 +1336,16 @@ def wait_for_elb(asg_connection, group_name):
 
     if as_group.get('LoadBalancerNames') and as_group.get('HealthCheckType') == 'ELB':
         module.debug("Waiting for ELB to consider instances healthy.")
-        elb_connection = module.client('elb')
-
-        wait_timeout = time.time() + wait_timeout
-        healthy_instances = elb_healthy(asg_connection, elb_connection, group_name)
+        elb_connection = get_client('elb')
 
-        while healthy_instances < as_group.get('MinSize') and wait_timeout > time.time():
-            healthy_instances = elb_healthy(asg_connection, elb_connection, group_name)
+        def healthy():
+            healthy_instances = elb_healthy(asg_connection, elb_connection, group_name) or 0
             module.debug("ELB thinks %s instances are healthy." % healthy_instances)
-            time.sleep(10)
-        if wait_timeout <= time.time():
-            # waiting took too long
-            module.fail_json(msg="Waited too long for ELB instances to be healthy. %s" % time.asctime())
-        module.debug("Waiting complete. ELB thinks %s instances are healthy." % healthy_instances)
+            return healthy_instances >= as_group.get('MinSize')
+
+        get_waiter(asg_connection, group_name, 'elb_health', wait_timeout).wait(
+            healthy, "Waited too long for ELB instances to be healthy")
+        module.debug("Waiting complete. ELB thinks at least %s instances are healthy." % as_group.get('MinSize'))
 
 
 def wait_for_target_group(asg_connection, group_name):
@@ -939,19 +1357,16 @@ def wait_for_target_group(asg_connection, group_name):
 
     if as_group.get('TargetGroupARNs') and as_group.get('HealthCheckType') == 'ELB':
         module.debug("Waiting for Target Group to consider instances healthy.")
-        elbv2_connection = module.client('elbv2')
-
-        wait_timeout = time.time() + wait_timeout
-        healthy_instances = tg_healthy(asg_connection, elbv2_connection, group_name)
+        elbv2_connection = get_client('elbv2')
 
-        while healthy_instances < as_group.get('MinSize') and wait_timeout > time.time():
-            healthy_instances = tg_healthy(asg_connection, elbv2_connection, group_name)
+        def healthy():
+            healthy_instances = tg_healthy(asg_connection, elbv2_connection, group_name) or 0
             module.debug("Target Group thinks %s instances are healthy." % healthy_instances)
-            time.sleep(10)
-        if wait_timeout <= time.time():
-            # waiting took too long
-            module.fail_json(msg="Waited too long for ELB instances to be healthy. %s" % time.asctime())
-        module.debug("Waiting complete. Target Group thinks %s instances are healthy." % healthy_instances)
+            return healthy_instances >= as_group.get('MinSize')
+
+        get_waiter(asg_connection, group_name, 'target_group_health', wait_timeout).wait(
+            healthy, "Waited too long for ELB instances to be healthy")
+        module.debug("Waiting complete. Target Group thinks at least %s instances are healthy." % as_group.get('MinSize'))
 
 
 def suspend_processes(ec2_connection, as_group):
@@ -976,6 +1391,19 @@ def suspend_processes(ec2_connection, as_group):
     return True
 
 
+def build_asg_tags(set_tags, group_name):
+    asg_tags = []
+    for tag in set_tags:
+        for k, v in tag.items():
+            if k != 'propagate_at_launch':
+                asg_tags.append(dict(Key=k,
+                                     Value=to_native(v),
+                                     PropagateAtLaunch=bool(tag.get('propagate_at_launch', True)),
+                                     ResourceType='auto-scaling-group',
+                                     ResourceId=group_name))
+    return asg_tags
+
+
 def create_autoscaling_group(connection):
     group_name = module.params.get('name')
     load_balancers = module.params['load_balancers']
@@ -1009,20 +1437,12 @@ def create_autoscaling_group(connection):
         module.fail_json(msg="Failed to describe auto scaling groups.",
                          exception=traceback.format_exc())
 
-    ec2_connection = module.client('ec2')
+    ec2_connection = get_client('ec2')
 
     if vpc_zone_identifier:
         vpc_zone_identifier = ','.join(vpc_zone_identifier)
 
-    asg_tags = []
-    for tag in set_tags:
-        for k, v in tag.items():
-            if k != 'propagate_at_launch':
-                asg_tags.append(dict(Key=k,
-                                     Value=to_native(v),
-                                     PropagateAtLaunch=bool(tag.get('propagate_at_launch', True)),
-                                     ResourceType='auto-scaling-group',
-                                     ResourceId=group_name))
+    asg_tags = build_asg_tags(set_tags, group_name)
     if not as_groups:
         if not vpc_zone_identifier and not availability_zones:
             availability_zones = module.params['availability_zones'] = [zone['ZoneName'] for
@@ -1316,25 +1736,17 @@ def delete_autoscaling_group(connection):
         else:
             updated_params = dict(AutoScalingGroupName=group_name, MinSize=0, MaxSize=0, DesiredCapacity=0)
             update_asg(connection, **updated_params)
-            instances = True
-            while instances and wait_for_instances and wait_timeout >= time.time():
+
+            def instances_gone():
                 tmp_groups = describe_autoscaling_groups(connection, group_name)
-                if tmp_groups:
-                    tmp_group = tmp_groups[0]
-                    if not tmp_group.get('Instances'):
-                        instances = False
-                time.sleep(10)
+                return bool(tmp_groups) and not tmp_groups[0].get('Instances')
 
-            if wait_timeout <= time.time():
-                # waiting took too long
-                module.fail_json(msg="Waited too long for old instances to terminate. %s" % time.asctime())
+            get_waiter(connection, group_name, 'instances_gone', wait_timeout - time.time()).wait(
+                instances_gone, "Waited too long for old instances to terminate")
 
             delete_asg(connection, group_name, force_delete=False)
-        while describe_autoscaling_groups(connection, group_name) and wait_timeout >= time.time():
-            time.sleep(5)
-        if wait_timeout <= time.time():
-            # waiting took too long
-            module.fail_json(msg="Waited too long for ASG to delete. %s" % time.asctime())
+        get_waiter(connection, group_name, 'group_deleted', wait_timeout - time.time(), watch_activities=False).wait(
+            lambda: not describe_autoscaling_groups(connection, group_name), "Waited too long for ASG to delete")
         return True
 
     return False
@@ -1611,8 +2023,8 @@ def terminate_batch(connection, replace_instances, initial_instances, leftovers=
 
     module.debug("decrementing capacity: %s" % decrement_capacity)
 
+    elb_dreg(connection, group_name, instances_to_terminate)
     for instance_id in instances_to_terminate:
-        elb_dreg(connection, group_name, instance_id)
         module.debug("terminating instance: %s" % instance_id)
         terminate_asg_instance(connection, instance_id, decrement_capacity)
 
@@ -1623,12 +2035,9 @@ def terminate_batch(connection, replace_instances, initial_instances, leftovers=
 
 
 def wait_for_term_inst(connection, term_instances):
-    wait_timeout = module.params.get('wait_timeout')
     group_name = module.params.get('name')
-    as_group = describe_autoscaling_groups(connection, group_name)[0]
-    count = 1
-    wait_timeout = time.time() + wait_timeout
-    while wait_timeout > time.time() and count > 0:
+
+    def terminated():
         module.debug("waiting for instances to terminate")
         count = 0
         as_group = describe_autoscaling_groups(connection, group_name)[0]
@@ -1641,28 +2050,23 @@ def wait_for_term_inst(connection, term_instances):
             module.debug("Instance %s has state of %s,%s" % (i, lifecycle, health))
             if lifecycle.startswith('Terminating') or health == 'Unhealthy':
                 count += 1
-        time.sleep(10)
+        return count == 0
 
-    if wait_timeout <= time.time():
-        # waiting took too long
-        module.fail_json(msg="Waited too long for old instances to terminate. %s" % time.asctime())
+    get_waiter(connection, group_name, 'terminated_instances').wait(
+        terminated, "Waited too long for old instances to terminate")
 
 
 def wait_for_new_inst(connection, group_name, wait_timeout, desired_size, prop):
-    # make sure we have the latest stats after that last loop.
-    as_group = describe_autoscaling_groups(connection, group_name)[0]
-    props = get_properties(as_group)
-    module.debug("Waiting for %s = %s, currently %s" % (prop, desired_size, props[prop]))
-    # now we make sure that we have enough instances in a viable state
-    wait_timeout = time.time() + wait_timeout
-    while wait_timeout > time.time() and desired_size > props[prop]:
-        module.debug("Waiting for %s = %s, currently %s" % (prop, desired_size, props[prop]))
-        time.sleep(10)
+    def reached():
         as_group = describe_autoscaling_groups(connection, group_name)[0]
         props = get_properties(as_group)
-    if wait_timeout <= time.time():
-        # waiting took too long
-        module.fail_json(msg="Waited too long for new instances to become viable. %s" % time.asctime())
+        module.debug("Waiting for %s = %s, currently %s" % (prop, desired_size, props[prop]))
+        if desired_size <= props[prop]:
+            return props
+
+    # now we make sure that we have enough instances in a viable state
+    props = get_waiter(connection, group_name, 'new_instances', wait_timeout).wait(
+        reached, "Waited too long for new instances to become viable")
     module.debug("Reached %s: %s" % (prop, desired_size))
     return props
 
@@ -1673,9 +2077,270 @@ def asg_exists(connection):
     return bool(len(as_group))
 
 
+class RateLimiter(object):
+    ''' spaces calls at least 1 / rate seconds apart, across threads '''
+
+    def __init__(self, rate, clock=None, sleep=None):
+        self.interval = 1.0 / rate if rate else 0
+        self.clock = clock or time.time
+        self.sleep = sleep or time.sleep
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = self.clock()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            self.sleep(start - now)
+
+
+# group spec keys that map directly onto UpdateAutoScalingGroup parameters
+BATCH_SCALAR_ATTRIBUTES = (
+    ('min_size', 'MinSize'),
+    ('max_size', 'MaxSize'),
+    ('desired_capacity', 'DesiredCapacity'),
+    ('max_instance_lifetime', 'MaxInstanceLifetime'),
+    ('health_check_period', 'HealthCheckGracePeriod'),
+    ('health_check_type', 'HealthCheckType'),
+    ('default_cooldown', 'DefaultCooldown'),
+)
+
+
+def launch_object_changed(as_group, launch_object):
+    if 'LaunchConfigurationName' in launch_object:
+        return as_group.get('LaunchConfigurationName') != launch_object['LaunchConfigurationName']
+    if 'MixedInstancesPolicy' in launch_object:
+        have = as_group.get('MixedInstancesPolicy', {}).get('LaunchTemplate', {})
+        want = launch_object['MixedInstancesPolicy']['LaunchTemplate']
+        have_spec = have.get('LaunchTemplateSpecification', {})
+        want_spec = want['LaunchTemplateSpecification']
+        return (
+            have_spec.get('LaunchTemplateId') != want_spec['LaunchTemplateId']
+            or have_spec.get('Version') != want_spec['Version']
+            or set(o['InstanceType'] for o in have.get('Overrides', [])) != set(o['InstanceType'] for o in want.get('Overrides', []))
+        )
+    have = as_group.get('LaunchTemplate') or {}
+    want = launch_object['LaunchTemplate']
+    return have.get('LaunchTemplateId') != want['LaunchTemplateId'] or have.get('Version') != want['Version']
+
+
+def plan_group_changes(connection, spec, as_group, launch_object, default_zones):
+    ''' Compare a group spec with the described group, without calling AWS.
+        Returns the action, the names of the changed attributes and the calls making the changes. '''
+    group_name = spec['name']
+    calls = []
+    changes = []
+
+    if spec['state'] == 'absent':
+        if as_group is None:
+            return 'unchanged', changes, calls
+        calls.append(partial(delete_asg, connection, group_name, force_delete=True))
+        return 'deleted', ['AutoScalingGroup'], calls
+
+    asg_tags = build_asg_tags(spec['tags'] or [], group_name)
+    vpc_zone_identifier = ','.join(spec['vpc_zone_identifier'] or []) or None
+
+    if as_group is None:
+        missing = [arg for arg in ('min_size', 'max_size') if spec[arg] is None]
+        if missing:
+            raise ValueError("Missing required arguments for autoscaling group create: %s" % ",".join(missing))
+        if not launch_object:
+            raise ValueError("Missing either launch_config_name or launch_template for autoscaling group create")
+        ag = dict(AutoScalingGroupName=group_name, Tags=asg_tags)
+        for option, attribute in BATCH_SCALAR_ATTRIBUTES:
+            if spec[option] is not None:
+                ag[attribute] = spec[option]
+        ag.setdefault('DesiredCapacity', spec['min_size'])
+        if spec['termination_policies']:
+            ag['TerminationPolicies'] = spec['termination_policies']
+        if vpc_zone_identifier:
+            ag['VPCZoneIdentifier'] = vpc_zone_identifier
+        elif spec['availability_zones']:
+            ag['AvailabilityZones'] = spec['availability_zones']
+        else:
+            ag['AvailabilityZones'] = default_zones()
+        if spec['load_balancers']:
+            ag['LoadBalancerNames'] = spec['load_balancers']
+        if spec['target_group_arns']:
+            ag['TargetGroupARNs'] = spec['target_group_arns']
+        if 'MixedInstancesPolicy' in launch_object:
+            ag['MixedInstancesPolicy'] = launch_object['MixedInstancesPolicy']
+        else:
+            ag.update(launch_object)
+        calls.append(partial(create_asg, connection, **ag))
+        return 'created', ['AutoScalingGroup'], calls
+
+    ag = dict()
+    for option, attribute in BATCH_SCALAR_ATTRIBUTES:
+        if spec[option] is not None and as_group.get(attribute) != spec[option]:
+            ag[attribute] = spec[option]
+    if spec['termination_policies'] and as_group.get('TerminationPolicies') != spec['termination_policies']:
+        ag['TerminationPolicies'] = spec['termination_policies']
+    if vpc_zone_identifier and set(as_group.get('VPCZoneIdentifier', '').split(',')) != set(vpc_zone_identifier.split(',')):
+        ag['VPCZoneIdentifier'] = vpc_zone_identifier
+    if spec['availability_zones'] and set(as_group.get('AvailabilityZones', [])) != set(spec['availability_zones']):
+        ag['AvailabilityZones'] = spec['availability_zones']
+    if launch_object and launch_object_changed(as_group, launch_object):
+        if 'MixedInstancesPolicy' in launch_object:
+            ag['MixedInstancesPolicy'] = launch_object['MixedInstancesPolicy']
+        else:
+            ag.update(launch_object)
+    if ag:
+        changes.extend(sorted(ag))
+        calls.append(partial(update_asg, connection, AutoScalingGroupName=group_name, **ag))
+
+    for option, attribute, attach, detach in (
+            ('load_balancers', 'LoadBalancerNames', attach_load_balancers, detach_load_balancers),
+            ('target_group_arns', 'TargetGroupARNs', attach_lb_target_groups, detach_lb_target_groups)):
+        if spec[option] is None:
+            continue
+        have = set(as_group.get(attribute) or [])
+        want = set(spec[option])
+        if have != want:
+            changes.append(attribute)
+        if have - want:
+            calls.append(partial(detach, connection, group_name, sorted(have - want)))
+        if want - have:
+            calls.append(partial(attach, connection, group_name, sorted(want - have)))
+
+    if asg_tags:
+        have_tags = dict((t['Key'], (t['Value'], t['PropagateAtLaunch'])) for t in as_group.get('Tags', []))
+        want_tags = dict((t['Key'], (t['Value'], t['PropagateAtLaunch'])) for t in asg_tags)
+        dead_tags = [dict(ResourceId=group_name, ResourceType='auto-scaling-group', Key=k)
+                     for k in sorted(set(have_tags) - set(want_tags))]
+        updated_tags = any(have_tags.get(k) != v for k, v in want_tags.items())
+        if dead_tags:
+            # tag calls of many groups at once are the most likely to be throttled
+            calls.append(partial(delete_asg_tags, connection, dead_tags))
+        if updated_tags:
+            calls.append(partial(create_or_update_asg_tags, connection, asg_tags))
+        if dead_tags or updated_tags:
+            changes.append('Tags')
+
+    return ('updated' if calls else 'unchanged'), changes, calls
+
+
+def batch_reconcile(connection):
+    ''' Reconcile every group in the groups option, returns (changed, group_results) '''
+    specs = module.params.get('groups')
+    limiter = RateLimiter(module.params.get('batch_rate_limit'))
+    ec2_connection = get_client('ec2')
+
+    names = [spec['name'] for spec in specs]
+    duplicates = sorted(set(name for name in names if names.count(name) > 1))
+    if duplicates:
+        module.fail_json(msg="Groups given more than once: %s" % ", ".join(duplicates))
+    for spec in specs:
+        if spec['launch_config_name'] and spec['launch_template']:
+            module.fail_json(msg="Group %s: launch_config_name and launch_template are mutually exclusive" % spec['name'])
+        if spec['max_instance_lifetime'] is not None and not module.botocore_at_least('1.13.21'):
+            module.fail_json(msg='Botocore needs to be version 1.13.21 or higher to use max_instance_lifetime.')
+        if spec['mixed_instances_policy'] is not None and not module.botocore_at_least('1.12.45'):
+            module.fail_json(msg='Botocore needs to be version 1.12.45 or higher to use mixed_instances_policy.')
+
+    try:
+        existing = dict((g['AutoScalingGroupName'], g) for g in describe_named_autoscaling_groups(connection, names))
+    except (botocore.exceptions.ClientError, botocore.exceptions.BotoCoreError) as e:
+        module.fail_json_aws(e, msg="Failed to describe auto scaling groups")
+
+    def default_zones():
+        return resource_cache.get('availability_zones', None, lambda: [
+            zone['ZoneName'] for zone in ec2_connection.describe_availability_zones()['AvailabilityZones']])
+
+    results = []
+    plans = []
+    for spec in specs:
+        result = dict(name=spec['name'], changed=False, failed=False, changes=[])
+        results.append(result)
+        try:
+            launch_object = None
+            if spec['state'] == 'present':
+                launch_object = resolve_launch_object(connection, ec2_connection, spec['launch_config_name'],
+                                                      spec['launch_template'], spec['mixed_instances_policy'])
+            action, changes, calls = plan_group_changes(connection, spec, existing.get(spec['name']), launch_object, default_zones)
+        except (ValueError, botocore.exceptions.ClientError, botocore.exceptions.BotoCoreError) as e:
+            result.update(failed=True, action='failed', msg=to_native(e))
+            continue
+        result.update(action=action, changes=changes)
+        if calls:
+            plans.append((result, calls))
+
+    def apply(plan):
+        result, calls = plan
+        try:
+            for call in calls:
+                limiter.wait()
+                call()
+                # a failure part way through still leaves the earlier changes in place
+                result['changed'] = True
+        except (botocore.exceptions.ClientError, botocore.exceptions.BotoCoreError) as e:
+            result.update(failed=True, msg=to_native(e))
+        return result
+
+    if plans:
+        pool = ThreadPool(max(1, min(module.params.get('batch_concurrency'), len(plans))))
+        try:
+            for result in pool.imap_unordered(apply, plans):
+                module.debug("Group %s %s: %s" % (result['name'], result['action'], ", ".join(result['changes'])))
+        finally:
+            pool.close()
+            pool.join()
+        try:
+            existing = dict((g['AutoScalingGroupName'], g) for g in describe_named_autoscaling_groups(connection, names))
+        except (botocore.exceptions.ClientError, botocore.exceptions.BotoCoreError) as e:
+            module.fail_json_aws(e, msg="Failed to describe auto scaling groups after applying changes",
+                                 changed=any(result['changed'] for result in results), group_results=results)
+
+    for result in results:
+        if result['name'] in existing:
+            result['properties'] = get_properties(existing[result['name']])
+
+    return any(result['changed'] for result in results), results
+
+
 def main():
     argument_spec = dict(
-        name=dict(required=True, type='str'),
+        name=dict(type='str'),
+        groups=dict(
+            type='list',
+            elements='dict',
+            options=dict(
+                name=dict(type='str', required=True),
+                state=dict(default='present', choices=['present', 'absent']),
+                launch_config_name=dict(type='str'),
+                launch_template=dict(
+                    type='dict',
+                    options=dict(
+                        version=dict(type='str'),
+                        launch_template_name=dict(type='str'),
+                        launch_template_id=dict(type='str'),
+                    )
+                ),
+                mixed_instances_policy=dict(
+                    type='dict',
+                    options=dict(
+                        instance_types=dict(type='list', elements='str'),
+                    )
+                ),
+                min_size=dict(type='int'),
+                max_size=dict(type='int'),
+                desired_capacity=dict(type='int'),
+                max_instance_lifetime=dict(type='int'),
+                availability_zones=dict(type='list', elements='str'),
+                vpc_zone_identifier=dict(type='list', elements='str'),
+                load_balancers=dict(type='list', elements='str'),
+                target_group_arns=dict(type='list', elements='str'),
+                health_check_period=dict(type='int'),
+                health_check_type=dict(choices=['EC2', 'ELB']),
+                default_cooldown=dict(type='int'),
+                termination_policies=dict(type='list', elements='str'),
+                tags=dict(type='list', elements='dict'),
+            )
+        ),
+        batch_concurrency=dict(type='int', default=10),
+        batch_rate_limit=dict(type='float', default=5),
         load_balancers=dict(type='list', elements='str'),
         target_group_arns=dict(type='list', elements='str'),
         availability_zones=dict(type='list', elements='str'),
@@ -1717,6 +2382,7 @@ def main():
         health_check_type=dict(default='EC2', choices=['EC2', 'ELB']),
         default_cooldown=dict(type='int', default=300),
         wait_for_instances=dict(type='bool', default=True),
+        watch_scaling_activities=dict(type='bool', default=False),
         termination_policies=dict(type='list', default='Default', elements='str'),
         notification_topic=dict(type='str', default=None),
         notification_types=dict(
@@ -1748,12 +2414,17 @@ def main():
         )
     )
 
-    global module
+    global module, resource_cache, api_calls, wait_log
+    resource_cache = ResourceCache()
+    api_calls = ApiCallCounter()
+    wait_log = []
     module = AnsibleAWSModule(
         argument_spec=argument_spec,
+        required_one_of=[['name', 'groups']],
         mutually_exclusive=[
             ['replace_all_instances', 'replace_instances'],
-            ['launch_config_name', 'launch_template']
+            ['launch_config_name', 'launch_template'],
+            ['name', 'groups'],
         ]
     )
 
@@ -1777,7 +2448,15 @@ def main():
     replace_instances = module.params.get('replace_instances')
     replace_all_instances = module.params.get('replace_all_instances')
 
-    connection = module.client('autoscaling')
+    connection = get_client('autoscaling')
+    if module.params.get('groups') is not None:
+        changed, group_results = batch_reconcile(connection)
+        failed = [result['name'] for result in group_results if result['failed']]
+        if failed:
+            module.fail_json(msg="Failed to reconcile auto scaling groups: %s" % ", ".join(failed),
+                             changed=changed, group_results=group_results)
+        module.exit_json(changed=changed, group_results=group_results)
+
     changed = create_changed = replace_changed = False
     exists = asg_exists(connection)
 
@@ -1785,7 +2464,7 @@ def main():
         create_changed, asg_properties = create_autoscaling_group(connection)
     elif state == 'absent':
         changed = delete_autoscaling_group(connection)
-        module.exit_json(changed=changed)
+        module.exit_json(changed=changed, waits=wait_log)
 
     # Only replace instances if asg existed at start of call
     if (
@@ -1798,7 +2477,7 @@ def main():
     if create_changed or replace_changed:
         changed = True
 
-    module.exit_json(changed=changed, **asg_properties)
+    module.exit_json(changed=changed, waits=wait_log, **asg_properties)
 
 
 if __name__ == '__main__':
@@ -42,6 +42,15 @@ options:
       - How long to wait (in seconds) for the instance to finish booting/terminating.
     default: 600
     type: int
+  wait_quorum:
+    description:
+      - Percentage of the instances that have to reach the desired state before the module stops waiting.
+      - For example with I(wait_quorum=90) a launch of 100 instances returns once 90 of them are running.
+      - The module also stops waiting, with a warning, once too many instances are in a state from which
+        they cannot reach the desired one for the quorum to be met.
+    default: 100
+    type: int
+    version_added: 1.3.0
   instance_type:
     description:
       - Instance type to use for the instance, see U(https://docs.aws.amazon.com/AWSEC2/latest/UserGuide/instance-types.html)
@@ -82,6 +91,16 @@ options:
         This means you have to specify all the desired tags on each task affecting an instance.
     default: false
     type: bool
+  reconcile_all:
+    description:
+      - When more than one existing instance matches, apply I(ebs_optimized), I(termination_protection), the security groups,
+        I(network.source_dest_check) and I(instance_role) to every match instead of only the first one.
+      - The matches and their attributes are read with batched describe calls, the differences are computed locally and the
+        modifications are applied grouped by type, with tags applied with one call per distinct change.
+      - I(network.interfaces) is still only attached to the first match.
+    default: false
+    type: bool
+    version_added: 1.3.0
   image:
     description:
       - An image to use for the instance. The M(amazon.aws.ec2_ami_info) module may be used to retrieve images.
@@ -793,14 +812,42 @@ instances:
             returned: always
             type: dict
             sample: vpc-0011223344
+waits:
+    description: One entry for every time the module waited on instances, with the state of each instance when it stopped waiting.
+    returned: when I(wait=true)
+    type: list
+    version_added: 1.3.0
+    sample: [
+        {
+            "state": "RUNNING",
+            "quorum": 90,
+            "total": 3,
+            "reached": 3,
+            "seconds": 21.4,
+            "polls": 6,
+            "instances": {"i-0123456789abcdef0": "running", "i-0123456789abcdef1": "running", "i-0123456789abcdef2": "running"}
+        }
+    ]
+changes_by_type:
+    description: With I(reconcile_all), the attribute modifications made to existing instances grouped by the kind of change.
+    returned: when I(reconcile_all=true) and instances matched
+    type: dict
+    version_added: 1.3.0
+    sample: {
+        "termination_protection": [{"InstanceId": "i-0123456789abcdef0", "DisableApiTermination": {"Value": true}}],
+        "security_groups": [{"InstanceId": "i-0123456789abcdef1", "Groups": ["sg-0123456789abcdef0"]}]
+    }
 '''
 
+import math
 import re
 import uuid
 import string
 import textwrap
 import time
+from collections import OrderedDict
 from collections import namedtuple
+from multiprocessing.pool import ThreadPool
 
 try:
     import boto3
@@ -821,9 +868,35 @@ from ansible_collections.amazon.aws.plugins.module_utils.ec2 import boto3_tag_li
 from ansible_collections.amazon.aws.plugins.module_utils.ec2 import ansible_dict_to_boto3_tag_list
 from ansible_collections.amazon.aws.plugins.module_utils.ec2 import camel_dict_to_snake_dict
 from ansible_collections.amazon.aws.plugins.module_utils.ec2 import snake_dict_to_camel_dict
+from ansible_collections.community.aws.plugins.module_utils.waiters import WAIT_MAX_DELAY
+from ansible_collections.community.aws.plugins.module_utils.waiters import WAIT_MIN_DELAY
+from ansible_collections.community.aws.plugins.module_utils.waiters import next_delay
 
 module = None
 
+# DescribeInstances and CreateTags accept up to 1000 ids per call
+INSTANCE_ID_BATCH = 1000
+ATTRIBUTE_CONCURRENCY = 10
+
+# for every state await_instances can wait for: whether an instance status has reached it
+# (None when the instance could not be found) and the instance states it can no longer be reached from
+WAIT_STATES = {
+    'OK': (lambda s: s is not None and s.get('InstanceStatus', {}).get('Status') == 'ok', ('shutting-down', 'terminated', 'stopping', 'stopped')),
+    'RUNNING': (lambda s: s is not None and s['InstanceState']['Name'] == 'running', ('shutting-down', 'terminated', 'stopping')),
+    'STOPPED': (lambda s: s is not None and s['InstanceState']['Name'] == 'stopped', ('pending', 'terminated')),
+    'TERMINATED': (lambda s: s is None or s['InstanceState']['Name'] == 'terminated', ('pending',)),
+    'EXISTS': (lambda s: s is not None, ()),
+}
+
+wait_reports = []
+
+CHANGE_TYPES = OrderedDict([
+    ('EbsOptimized', 'ebs_optimized'),
+    ('DisableApiTermination', 'termination_protection'),
+    ('Groups', 'security_groups'),
+    ('SourceDestCheck', 'source_dest_check'),
+])
+
 
 def tower_callback_script(tower_conf, windows=False, passwd=None):
     script_url = 'https://raw.githubusercontent.com/ansible/ansible/devel/examples/scripts/ConfigureRemotingForAnsible.ps1'
@@ -910,6 +983,33 @@ def manage_tags(match, new_tags, purge_tags, ec2):
     return changed
 
 
+def manage_tags_bulk(matches, new_tags, purge_tags, ec2):
+    """ like manage_tags, with one call per distinct set of tags to set or delete across all matches """
+    to_set = OrderedDict()
+    to_delete = OrderedDict()
+    for match in matches:
+        old_tags = boto3_tag_list_to_ansible_dict(match['Tags'])
+        tags_to_set, tags_to_delete = compare_aws_tags(old_tags, new_tags, purge_tags=purge_tags)
+        if tags_to_set:
+            to_set.setdefault(tuple(sorted(tags_to_set.items())), []).append(match['InstanceId'])
+        if tags_to_delete:
+            delete_with_current_values = tuple(sorted((k, old_tags.get(k)) for k in tags_to_delete))
+            to_delete.setdefault(delete_with_current_values, []).append(match['InstanceId'])
+    if module.check_mode:
+        return bool(to_set or to_delete)
+    for tags, instance_ids in to_set.items():
+        for offset in range(0, len(instance_ids), INSTANCE_ID_BATCH):
+            ec2.create_tags(
+                Resources=instance_ids[offset:offset + INSTANCE_ID_BATCH],
+                Tags=ansible_dict_to_boto3_tag_list(dict(tags)))
+    for tags, instance_ids in to_delete.items():
+        for offset in range(0, len(instance_ids), INSTANCE_ID_BATCH):
+            ec2.delete_tags(
+                Resources=instance_ids[offset:offset + INSTANCE_ID_BATCH],
+                Tags=ansible_dict_to_boto3_tag_list(dict(tags)))
+    return bool(to_set or to_delete)
+
+
 def build_volume_spec(params):
     volumes = params.get('volumes') or []
     for volume in volumes:
@@ -1280,7 +1380,45 @@ def build_run_instance_spec(params, ec2=None):
     return spec
 
 
-def await_instances(ids, state='OK'):
+def describe_instance_states(ec2, ids):
+    """ {instance id: DescribeInstanceStatus entry, or None for instances that do not exist (yet)} """
+    statuses = dict((i, None) for i in ids)
+    paginator = ec2.get_paginator('describe_instance_status')
+    remaining = list(ids)
+    while remaining:
+        try:
+            result = AWSRetry.jittered_backoff()(paginator.paginate(
+                InstanceIds=remaining, IncludeAllInstances=True
+            ).build_full_result)()
+        except botocore.exceptions.ClientError as e:
+            if e.response['Error']['Code'] != 'InvalidInstanceID.NotFound':
+                raise
+            # one unknown id fails the whole call, drop the ids named in the error and ask again
+            missing = set(re.findall(r'i-[0-9a-f]+', e.response['Error'].get('Message', ''))) & set(remaining)
+            if not missing:
+                raise
+            remaining = [i for i in remaining if i not in missing]
+            continue
+        for status in result.get('InstanceStatuses', []):
+            statuses[status['InstanceId']] = status
+        break
+    return statuses
+
+
+def describe_instance_states_concurrently(ec2, ids, pool):
+    statuses = {}
+    batches = [ids[offset:offset + INSTANCE_ID_BATCH] for offset in range(0, len(ids), INSTANCE_ID_BATCH)]
+    for batch_statuses in pool.imap_unordered(lambda batch: describe_instance_states(ec2, batch), batches):
+        statuses.update(batch_statuses)
+    return statuses
+
+
+def await_instances(ids, state='OK', quorum=None):
+    """ Poll DescribeInstanceStatus, batches of up to 1000 ids at a time and concurrently,
+    until quorum percent of the instances have reached state.
+
+    Polls start every WAIT_MIN_DELAY seconds, back off to WAIT_MAX_DELAY while nothing
+    changes and come back to WAIT_MIN_DELAY as soon as another instance gets there. """
     if not module.params.get('wait', True):
         # the user asked not to wait for anything
         return
@@ -1289,39 +1427,99 @@ def await_instances(ids, state='OK'):
         # In check mode, there is no change even if you wait.
         return
 
-    state_opts = {
-        'OK': 'instance_status_ok',
-        'STOPPED': 'instance_stopped',
-        'TERMINATED': 'instance_terminated',
-        'EXISTS': 'instance_exists',
-        'RUNNING': 'instance_running',
-    }
-    if state not in state_opts:
+    if state not in WAIT_STATES:
         module.fail_json(msg="Cannot wait for state {0}, invalid state".format(state))
-    waiter = module.client('ec2').get_waiter(state_opts[state])
+    reached_state, failure_states = WAIT_STATES[state]
+    if quorum is None:
+        quorum = module.params.get('wait_quorum') or 100
+    needed = int(math.ceil(len(ids) * quorum / 100.0))
+
+    ec2 = module.client('ec2')
+    start = time.time()
+    deadline = start + module.params.get('wait_timeout', 600)
+    delay = WAIT_MIN_DELAY
+    report = dict(state=state, quorum=quorum, total=len(ids), reached=0, seconds=0, polls=0, instances={})
+    wait_reports.append(report)
+    pool = ThreadPool(min(ATTRIBUTE_CONCURRENCY, int(math.ceil(len(ids) / float(INSTANCE_ID_BATCH))) or 1))
     try:
-        waiter.wait(
-            InstanceIds=ids,
-            WaiterConfig={
-                'Delay': 15,
-                'MaxAttempts': module.params.get('wait_timeout', 600) // 15,
-            }
-        )
-    except botocore.exceptions.WaiterConfigError as e:
-        module.fail_json(msg="{0}. Error waiting for instances {1} to reach state {2}".format(
-            to_native(e), ', '.join(ids), state))
-    except botocore.exceptions.WaiterError as e:
-        module.warn("Instances {0} took too long to reach state {1}. {2}".format(
-            ', '.join(ids), state, to_native(e)))
+        while True:
+            try:
+                statuses = describe_instance_states_concurrently(ec2, ids, pool)
+            except (botocore.exceptions.ClientError, botocore.exceptions.BotoCoreError) as e:
+                module.fail_json_aws(e, msg="Error waiting for instances {0} to reach state {1}".format(', '.join(ids), state))
+            report['polls'] += 1
+            reached = [i for i in ids if reached_state(statuses[i])]
+            failed = [i for i in ids if statuses[i] is not None and statuses[i]['InstanceState']['Name'] in failure_states]
+            for i in ids:
+                if statuses[i] is None:
+                    report['instances'][i] = 'missing'
+                elif state == 'OK':
+                    report['instances'][i] = '{0}/{1}'.format(statuses[i]['InstanceState']['Name'],
+                                                              statuses[i].get('InstanceStatus', {}).get('Status'))
+                else:
+                    report['instances'][i] = statuses[i]['InstanceState']['Name']
+            report['seconds'] = round(time.time() - start, 1)
+            module.debug("{0} of {1} instances reached {2}, {3} needed".format(len(reached), len(ids), state, needed))
+
+            if reached and len(reached) > report['reached']:
+                delay = WAIT_MIN_DELAY
+            else:
+                delay = next_delay(delay)
+            report['reached'] = len(reached)
+
+            if len(reached) >= needed:
+                return report
+            if len(ids) - len(failed) < needed:
+                module.warn("Only {0} of {1} instances can still reach state {2}, {3} are {4}".format(
+                    len(ids) - len(failed), len(ids), state, ', '.join(failed), '/'.join(failure_states)))
+                return report
+            if time.time() >= deadline:
+                module.warn("Instances {0} took too long to reach state {1}".format(
+                    ', '.join(i for i in ids if i not in reached), state))
+                return report
+            time.sleep(min(delay, max(deadline - time.time(), 0)))
+    finally:
+        pool.terminate()
+
+
+def expected_security_groups(params, ec2):
+    if params.get('vpc_subnet_id'):
+        subnet_id = params.get('vpc_subnet_id')
+    else:
+        default_vpc = get_default_vpc(ec2)
+        if default_vpc is None:
+            module.fail_json(
+                msg="No default subnet could be found - you must include a VPC subnet ID (vpc_subnet_id parameter) to modify security groups.")
+        else:
+            sub = get_default_subnet(ec2, default_vpc)
+            subnet_id = sub['SubnetId']
+
+    groups = discover_security_groups(
+        group=params.get('security_group'),
+        groups=params.get('security_groups'),
+        subnet_id=subnet_id,
+        ec2=ec2
+    )
+    return [g['GroupId'] for g in groups]
+
 
+def diff_instance_and_params(instance, params, ec2=None, skip=None, attributes=None, expected_groups=None):
+    """boto3 instance obj, module params
 
-def diff_instance_and_params(instance, params, ec2=None, skip=None):
-    """boto3 instance obj, module params"""
+    attributes and expected_groups may carry values looked up in advance
+    (see reconcile_instances), anything missing is described here"""
     if ec2 is None:
         ec2 = module.client('ec2')
 
     if skip is None:
         skip = []
+    if attributes is None:
+        attributes = {}
+
+    def describe_attribute(name):
+        if name not in attributes:
+            attributes[name] = AWSRetry.jittered_backoff()(ec2.describe_instance_attribute)(Attribute=name, InstanceId=id_)
+        return attributes[name]
 
     changes_to_apply = []
     id_ = instance['InstanceId']
@@ -1344,7 +1542,7 @@ def diff_instance_and_params(instance, params, ec2=None, skip=None):
         if mapping.instance_key in skip:
             continue
 
-        value = AWSRetry.jittered_backoff()(ec2.describe_instance_attribute)(Attribute=mapping.attribute_name, InstanceId=id_)
+        value = describe_attribute(mapping.attribute_name)
         if value[mapping.instance_key]['Value'] != params.get(mapping.param_key):
             arguments = dict(
                 InstanceId=instance['InstanceId'],
@@ -1354,26 +1552,10 @@ def diff_instance_and_params(instance, params, ec2=None, skip=None):
             changes_to_apply.append(arguments)
 
     if params.get('security_group') or params.get('security_groups'):
-        value = AWSRetry.jittered_backoff()(ec2.describe_instance_attribute)(Attribute="groupSet", InstanceId=id_)
+        value = describe_attribute("groupSet")
         # managing security groups
-        if params.get('vpc_subnet_id'):
-            subnet_id = params.get('vpc_subnet_id')
-        else:
-            default_vpc = get_default_vpc(ec2)
-            if default_vpc is None:
-                module.fail_json(
-                    msg="No default subnet could be found - you must include a VPC subnet ID (vpc_subnet_id parameter) to modify security groups.")
-            else:
-                sub = get_default_subnet(ec2, default_vpc)
-                subnet_id = sub['SubnetId']
-
-        groups = discover_security_groups(
-            group=params.get('security_group'),
-            groups=params.get('security_groups'),
-            subnet_id=subnet_id,
-            ec2=ec2
-        )
-        expected_groups = [g['GroupId'] for g in groups]
+        if expected_groups is None:
+            expected_groups = expected_security_groups(params, ec2)
         instance_groups = [g['GroupId'] for g in value['Groups']]
         if set(instance_groups) != set(expected_groups):
             changes_to_apply.append(dict(
@@ -1393,6 +1575,73 @@ def diff_instance_and_params(instance, params, ec2=None, skip=None):
     return changes_to_apply
 
 
+def primary_interface_groups(instance):
+    """ The security groups of the instance's primary network interface.
+
+    DescribeInstances' SecurityGroups is the union over all interfaces, while
+    the groupSet attribute only covers the primary one. """
+    for eni in instance.get('NetworkInterfaces', []):
+        if eni.get('Attachment', {}).get('DeviceIndex') == 0:
+            return eni.get('Groups', [])
+    return instance.get('SecurityGroups', [])
+
+
+def prefetch_instance_attributes(instances, params, ec2):
+    """ Attributes diff_instance_and_params needs for every instance, keyed by instance id.
+
+    EbsOptimized and the security groups come with DescribeInstances, only
+    disableApiTermination needs a DescribeInstanceAttribute call per instance
+    and those run concurrently. """
+    attributes = dict((i['InstanceId'], dict(
+        ebsOptimized=dict(EbsOptimized=dict(Value=i.get('EbsOptimized', False))),
+        groupSet=dict(Groups=[dict(GroupId=g['GroupId']) for g in primary_interface_groups(i)]),
+    )) for i in instances)
+
+    if params.get('termination_protection') is not None and instances:
+        describe = AWSRetry.jittered_backoff()(ec2.describe_instance_attribute)
+
+        def termination_protection(instance_id):
+            return instance_id, describe(Attribute='disableApiTermination', InstanceId=instance_id)
+
+        pool = ThreadPool(min(ATTRIBUTE_CONCURRENCY, len(instances)))
+        try:
+            for instance_id, value in pool.imap_unordered(termination_protection, list(attributes)):
+                attributes[instance_id]['disableApiTermination'] = value
+        finally:
+            pool.terminate()
+    return attributes
+
+
+def reconcile_instances(instances, params, ec2):
+    """ Diff every instance against params in memory and apply the changes grouped by type.
+
+    Returns an OrderedDict of change type to the modify_instance_attribute arguments. """
+    attributes = prefetch_instance_attributes(instances, params, ec2)
+    expected_groups = None
+    if params.get('security_group') or params.get('security_groups'):
+        expected_groups = expected_security_groups(params, ec2)
+
+    changes_by_type = OrderedDict((t, []) for t in CHANGE_TYPES.values())
+    for instance in instances:
+        for change in diff_instance_and_params(instance, params, ec2, attributes=attributes[instance['InstanceId']],
+                                               expected_groups=expected_groups):
+            change_type = [t for k, t in CHANGE_TYPES.items() if k in change][0]
+            changes_by_type[change_type].append(change)
+    changes_by_type = OrderedDict((t, changes) for t, changes in changes_by_type.items() if changes)
+
+    if module.check_mode:
+        return changes_by_type
+
+    modify = AWSRetry.jittered_backoff()(ec2.modify_instance_attribute)
+    for change_type, changes in changes_by_type.items():
+        pool = ThreadPool(min(ATTRIBUTE_CONCURRENCY, len(changes)))
+        try:
+            list(pool.imap_unordered(lambda c: modify(**c), changes))
+        finally:
+            pool.terminate()
+    return changes_by_type
+
+
 def change_network_attachments(instance, params, ec2):
     if (params.get('network') or {}).get('interfaces') is not None:
         new_ids = []
@@ -1417,9 +1666,12 @@ def change_network_attachments(instance, params, ec2):
 def find_instances(ec2, ids=None, filters=None):
     paginator = ec2.get_paginator('describe_instances')
     if ids:
-        return list(paginator.paginate(
-            InstanceIds=ids,
-        ).search('Reservations[].Instances[]'))
+        instances = []
+        for offset in range(0, len(ids), INSTANCE_ID_BATCH):
+            instances.extend(paginator.paginate(
+                InstanceIds=ids[offset:offset + INSTANCE_ID_BATCH],
+            ).search('Reservations[].Instances[]'))
+        return instances
     elif filters is None:
         module.fail_json(msg="No filters provided when they were required")
     elif filters is not None:
@@ -1480,11 +1732,14 @@ def ensure_instance_state(state, ec2=None):
             changed=bool(len(changed)),
             reboot_failed=[],
             instances=[pretty_instance(i) for i in instances],
+            waits=wait_reports,
         )
     elif state in ('restarted', 'rebooted'):
+        # every instance has to be stopped before they can all be started again
         changed, failed, instances, failure_reason = change_instance_state(
             filters=module.params.get('filters'),
-            desired_state='STOPPED')
+            desired_state='STOPPED',
+            quorum=100)
         changed, failed, instances, failure_reason = change_instance_state(
             filters=module.params.get('filters'),
             desired_state='RUNNING')
@@ -1501,6 +1756,7 @@ def ensure_instance_state(state, ec2=None):
             changed=bool(len(changed)),
             reboot_failed=[],
             instances=[pretty_instance(i) for i in instances],
+            waits=wait_reports,
         )
     elif state in ('stopped',):
         changed, failed, instances, failure_reason = change_instance_state(
@@ -1519,6 +1775,7 @@ def ensure_instance_state(state, ec2=None):
             changed=bool(len(changed)),
             stop_failed=[],
             instances=[pretty_instance(i) for i in instances],
+            waits=wait_reports,
         )
     elif state in ('absent', 'terminated'):
         terminated, terminate_failed, instances, failure_reason = change_instance_state(
@@ -1536,11 +1793,12 @@ def ensure_instance_state(state, ec2=None):
             changed=bool(len(terminated)),
             terminate_failed=[],
             instances=[pretty_instance(i) for i in instances],
+            waits=wait_reports,
         )
 
 
 @AWSRetry.jittered_backoff()
-def change_instance_state(filters, desired_state, ec2=None):
+def change_instance_state(filters, desired_state, ec2=None, quorum=None):
     """Takes STOPPED/RUNNING/TERMINATED"""
     if ec2 is None:
         ec2 = module.client('ec2')
@@ -1587,7 +1845,7 @@ def change_instance_state(filters, desired_state, ec2=None):
                 failure_reason = to_native(e)
 
     if changed:
-        await_instances(ids=list(changed) + list(unchanged), state=desired_state)
+        await_instances(ids=list(changed) + list(unchanged), state=desired_state, quorum=quorum)
 
     change_failed = list(to_change - changed)
 
@@ -1624,20 +1882,31 @@ def handle_existing(existing_matches, changed, ec2, state):
             changed=bool(len(ins_changed)) or changed,
             instances=[pretty_instance(i) for i in instances],
             instance_ids=[i['InstanceId'] for i in instances],
+            waits=wait_reports,
         )
-    changes = diff_instance_and_params(existing_matches[0], module.params)
-    for c in changes:
-        AWSRetry.jittered_backoff()(ec2.modify_instance_attribute)(**c)
+    if module.params.get('reconcile_all'):
+        changes_by_type = reconcile_instances(existing_matches, module.params, ec2)
+        changes = [c for type_changes in changes_by_type.values() for c in type_changes]
+        for match in existing_matches:
+            changed |= add_or_update_instance_profile(match, module.params.get('instance_role'))
+    else:
+        changes_by_type = None
+        changes = diff_instance_and_params(existing_matches[0], module.params)
+        for c in changes:
+            AWSRetry.jittered_backoff()(ec2.modify_instance_attribute)(**c)
+        changed |= add_or_update_instance_profile(existing_matches[0], module.params.get('instance_role'))
     changed |= bool(changes)
-    changed |= add_or_update_instance_profile(existing_matches[0], module.params.get('instance_role'))
     changed |= change_network_attachments(existing_matches[0], module.params, ec2)
     altered = find_instances(ec2, ids=[i['InstanceId'] for i in existing_matches])
-    module.exit_json(
+    result = dict(
         changed=bool(len(changes)) or changed,
         instances=[pretty_instance(i) for i in altered],
         instance_ids=[i['InstanceId'] for i in altered],
         changes=changes,
     )
+    if changes_by_type is not None:
+        result['changes_by_type'] = changes_by_type
+    module.exit_json(**result)
 
 
 def ensure_present(existing_matches, changed, ec2, state):
@@ -1686,6 +1955,7 @@ def ensure_present(existing_matches, changed, ec2, state):
             instances=[pretty_instance(i) for i in instances],
             instance_ids=instance_ids,
             spec=instance_spec,
+            waits=wait_reports,
         )
     except (botocore.exceptions.BotoCoreError, botocore.exceptions.ClientError) as e:
         module.fail_json_aws(e, msg="Failed to create new EC2 instance")
@@ -1707,10 +1977,13 @@ def run_instances(ec2, **instance_spec):
 
 def main():
     global module
+    global wait_reports
+    wait_reports = []
     argument_spec = dict(
         state=dict(default='present', choices=['present', 'started', 'running', 'stopped', 'restarted', 'rebooted', 'terminated', 'absent']),
         wait=dict(default=True, type='bool'),
         wait_timeout=dict(default=600, type='int'),
+        wait_quorum=dict(default=100, type='int'),
         # count=dict(default=1, type='int'),
         image=dict(type='dict'),
         image_id=dict(type='str'),
@@ -1726,6 +1999,7 @@ def main():
         name=dict(type='str'),
         tags=dict(type='dict'),
         purge_tags=dict(type='bool', default=False),
+        reconcile_all=dict(type='bool', default=False),
         filters=dict(type='dict', default=None),
         launch_template=dict(type='dict'),
         key_name=dict(type='str'),
@@ -1805,6 +2079,9 @@ def main():
 
         module.params['filters'] = filters
 
+    if not 0 < module.params.get('wait_quorum') <= 100:
+        module.fail_json(msg="wait_quorum must be between 1 and 100")
+
     if module.params.get('cpu_options') and not module.botocore_at_least('1.10.16'):
         module.fail_json(msg="cpu_options is only supported with botocore >= 1.10.16")
 
@@ -1812,14 +2089,17 @@ def main():
     changed = False
 
     if state not in ('terminated', 'absent') and existing_matches:
+        tags = module.params.get('tags') or {}
+        name = module.params.get('name')
+        if name:
+            tags['Name'] = name
         for match in existing_matches:
             warn_if_public_ip_assignment_changed(match)
             warn_if_cpu_options_changed(match)
-            tags = module.params.get('tags') or {}
-            name = module.params.get('name')
-            if name:
-                tags['Name'] = name
-            changed |= manage_tags(match, tags, module.params.get('purge_tags', False), ec2)
+            if not module.params.get('reconcile_all'):
+                changed |= manage_tags(match, tags, module.params.get('purge_tags', False), ec2)
+        if module.params.get('reconcile_all'):
+            changed |= manage_tags_bulk(existing_matches, tags, module.params.get('purge_tags', False), ec2)
 
     if state in ('present', 'running', 'started'):
         ensure_present(existing_matches=existing_matches, changed=changed, ec2=ec2, state=state)
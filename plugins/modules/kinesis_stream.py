@@ -16,6 +16,8 @@ description:
     - Update the retention period of a Kinesis Stream.
     - Update Tags on a Kinesis Stream.
     - Enable/disable server side encryption on a Kinesis Stream.
+    - Reshard a Kinesis Stream, with as many uniform scaling steps as needed and with explicit splits
+      and merges of individual shards.
 requirements: [ boto3 ]
 author: Allen Sanabria (@linuxdynasty)
 options:
@@ -28,7 +30,45 @@ options:
     description:
       - The number of shards you want to have with this stream.
       - This is required when I(state=present)
+      - A single C(UpdateShardCount) call can at most double or halve the number of open shards, larger
+        changes are made in several steps, waiting for the stream to become C(ACTIVE) between them.
+      - AWS allows 10 C(UpdateShardCount) calls per stream in a rolling 24 hours, changes that need more
+        steps than that fail before any step is taken.
     type: int
+  shard_operations:
+    description:
+      - Splits and merges of individual shards, for example to spread a hot shard, made in order
+        before the number of shards is compared with I(shards).
+      - The hash key ranges of the shards are read with C(ListShards) to validate the operations.
+      - Operations on shards that are already closed, usually by an earlier run of the same task, are skipped.
+      - The stream has to become C(ACTIVE) after every operation, so the module always waits for it
+        regardless of I(wait).
+    type: list
+    elements: dict
+    version_added: 1.3.0
+    suboptions:
+      action:
+        description:
+          - C(split) divides I(shard_id) in two at I(new_starting_hash_key).
+          - C(merge) merges I(shard_id) with I(adjacent_shard_id).
+        required: true
+        choices: [ 'split', 'merge' ]
+        type: str
+      shard_id:
+        description:
+          - The ID of the shard to split or merge.
+        required: true
+        type: str
+      adjacent_shard_id:
+        description:
+          - The ID of the shard to merge with, its hash key range has to be adjacent to the one of I(shard_id).
+          - Required when I(action=merge).
+        type: str
+      new_starting_hash_key:
+        description:
+          - The first hash key of the second of the two new shards, as a decimal string.
+          - Defaults to the middle of the hash key range of I(shard_id).
+        type: str
   retention_period:
     description:
       - The length of time (in hours) data records are accessible after they are added to
@@ -114,6 +154,23 @@ EXAMPLES = '''
     wait_timeout: 600
   register: test_stream
 
+# Resharding example, 64 shards are doubled three times to reach 512:
+- name: Scale Kinesis Stream test-stream to 512 shards
+  community.aws.kinesis_stream:
+    name: test-stream
+    shards: 512
+    wait_timeout: 3600
+  register: test_stream
+
+# Split a hot shard in the middle of its hash key range:
+- name: Split shard 3 of test-stream
+  community.aws.kinesis_stream:
+    name: test-stream
+    shards: 11
+    shard_operations:
+      - action: split
+        shard_id: shardId-000000000003
+
 # Basic delete example:
 - name: Delete Kinesis Stream test-stream and wait for it to finish deleting.
   community.aws.kinesis_stream:
@@ -179,11 +236,37 @@ tags:
       "Name": "Splunk",
       "Env": "development"
   }
+resharding_steps:
+  description:
+    - The split, merge and C(UpdateShardCount) operations made on the stream, in order.
+    - I(seconds) is the time from the call to the stream becoming C(ACTIVE) again, I(polls) the number
+      of times its status was checked.
+  returned: when the shards of the stream were changed.
+  type: list
+  elements: dict
+  version_added: 1.3.0
+  sample: [
+      {
+          "operation": "update_shard_count",
+          "current_count": 64,
+          "target_count": 128,
+          "seconds": 61.5,
+          "polls": 7
+      },
+      {
+          "operation": "split_shard",
+          "shard_id": "shardId-000000000003",
+          "new_starting_hash_key": "85070591730234615865843651857942052864",
+          "seconds": 31.2,
+          "polls": 5
+      }
+  ]
 '''
 
 import re
 import datetime
 import time
+from functools import partial
 from functools import reduce
 
 try:
@@ -194,6 +277,14 @@ except ImportError:
 from ansible.module_utils._text import to_native
 
 from ansible_collections.amazon.aws.plugins.module_utils.core import AnsibleAWSModule
+from ansible_collections.community.aws.plugins.module_utils.waiters import WAIT_BACKOFF
+from ansible_collections.community.aws.plugins.module_utils.waiters import WAIT_MAX_DELAY
+from ansible_collections.community.aws.plugins.module_utils.waiters import WAIT_MIN_DELAY
+from ansible_collections.community.aws.plugins.module_utils.waiters import next_delay
+
+# UpdateShardCount can be called 10 times per stream in a rolling 24 hours
+MAX_SHARD_COUNT_UPDATES = 10
+MAX_SHARDS = 10000
 
 
 def convert_to_lower(data):
@@ -829,8 +920,401 @@ def update_shard_count(client, stream_name, number_of_shards=1, check_mode=False
     return success, err_msg
 
 
+def plan_shard_count_steps(current_count, target_count):
+    """Plan the UpdateShardCount calls that take a stream from one number of open shards to another.
+    A single call can at most double or halve the number of open shards, so large changes are
+    made in several steps, each of them as large as allowed.
+    Args:
+        current_count (int): The number of open shards of the stream.
+        target_count (int): The number of open shards wanted.
+
+    Basic Usage:
+        >>> plan_shard_count_steps(64, 512)
+        [128, 256, 512]
+        >>> plan_shard_count_steps(100, 30)
+        [50, 30]
+
+    Returns:
+        List
+    """
+    steps = list()
+    count = current_count
+    while count != target_count:
+        if target_count > count:
+            count = min(count * 2, target_count)
+        else:
+            count = max((count + 1) // 2, target_count)
+        steps.append(count)
+
+    return steps
+
+
+def wait_for_active(client, stream_name, wait_timeout=300, min_delay=WAIT_MIN_DELAY, max_delay=WAIT_MAX_DELAY,
+                    backoff=WAIT_BACKOFF, clock=None, sleep=None):
+    """Wait for a Kinesis Stream to become ACTIVE after a resharding operation.
+    The status is read with DescribeStreamSummary, which does not page through the shards, and
+    the delay between polls grows from min_delay by backoff up to max_delay.
+    Args:
+        client (botocore.client.EC2): Boto3 client.
+        stream_name (str): The name of the kinesis stream.
+
+    Kwargs:
+        wait_timeout (int): Number of seconds to wait, until this timeout is reached.
+        min_delay (int): Seconds to wait after the first poll.
+        max_delay (int): Longest wait between two polls.
+        backoff (float): How much the delay grows after every poll.
+
+    Basic Usage:
+        >>> client = boto3.client('kinesis')
+        >>> wait_for_active(client, 'test-stream', 600)
+
+    Returns:
+        Tuple (bool, str, dict)
+    """
+    clock = clock or time.time
+    sleep = sleep or time.sleep
+    started = clock()
+    deadline = started + wait_timeout
+    delay = min_delay
+    polls = 0
+    status = None
+    err_msg = ''
+    while True:
+        polls += 1
+        try:
+            status = (
+                client.describe_stream_summary(StreamName=stream_name)
+                ['StreamDescriptionSummary']['StreamStatus']
+            )
+        except botocore.exceptions.ClientError as e:
+            err_msg = to_native(e)
+            break
+        now = clock()
+        if status == 'ACTIVE' or now >= deadline:
+            break
+        sleep(min(delay, deadline - now))
+        delay = next_delay(delay, backoff, max_delay)
+
+    if status != 'ACTIVE' and not err_msg:
+        err_msg = (
+            'Wait time out reached, while waiting for {0} to become ACTIVE. Current status is {1}'
+            .format(stream_name, status)
+        )
+
+    return status == 'ACTIVE', err_msg, dict(polls=polls, seconds=round(clock() - started, 3))
+
+
+def run_resharding_step(client, stream_name, step, action, steps, wait=True, deadline=None, check_mode=False):
+    """Run one resharding operation, optionally wait for the stream to become ACTIVE again and
+    record how long it took in steps.
+    Args:
+        client (botocore.client.EC2): Boto3 client.
+        stream_name (str): The name of the kinesis stream.
+        step (dict): The description of the operation that is returned.
+        action (callable): Makes the call, returns Tuple (bool, str).
+        steps (list): The operations made so far, step is appended once the call succeeded.
+
+    Kwargs:
+        wait (bool): Wait until Stream is ACTIVE.
+            default=True
+        deadline (float): When all the resharding operations have to be finished by.
+        check_mode (bool): This will pass DryRun as one of the parameters to the aws api.
+            default=False
+
+    Returns:
+        Tuple (bool, str)
+    """
+    started = time.time()
+    success, err_msg = action()
+    if not success:
+        return success, err_msg
+
+    step['polls'] = 0
+    if wait and not check_mode:
+        success, err_msg, stats = (
+            wait_for_active(client, stream_name, max(deadline - time.time(), 0))
+        )
+        step['polls'] = stats['polls']
+    step['seconds'] = round(time.time() - started, 3)
+    steps.append(step)
+
+    return success, err_msg
+
+
+def reshard(client, stream_name, current_count, target_count, wait=False, wait_timeout=300,
+            check_mode=False):
+    """Change the number of open shards of a Kinesis Stream with as many UpdateShardCount calls as needed.
+    Every step but the last waits for the stream to become ACTIVE, as UpdateShardCount can only be
+    called on an ACTIVE stream.
+    Args:
+        client (botocore.client.EC2): Boto3 client.
+        stream_name (str): The name of the kinesis stream.
+        current_count (int): The number of open shards of the stream.
+        target_count (int): The number of open shards wanted.
+
+    Kwargs:
+        wait (bool): Wait until Stream is ACTIVE after the last step.
+            default=False
+        wait_timeout (int): How long all the steps together can take.
+            default=300
+        check_mode (bool): This will pass DryRun as one of the parameters to the aws api.
+            default=False
+
+    Basic Usage:
+        >>> client = boto3.client('kinesis')
+        >>> reshard(client, 'test-stream', 64, 512, wait=True, wait_timeout=3600)
+
+    Returns:
+        Tuple (bool, str, list)
+    """
+    steps = list()
+    if target_count > MAX_SHARDS:
+        return False, 'A Kinesis Stream can not have more than {0} shards.'.format(MAX_SHARDS), steps
+
+    counts = plan_shard_count_steps(current_count, target_count)
+    if len(counts) > MAX_SHARD_COUNT_UPDATES:
+        return False, (
+            'Changing {0} from {1} to {2} shards takes {3} UpdateShardCount calls, '
+            'only {4} are allowed per stream in 24 hours.'
+            .format(stream_name, current_count, target_count, len(counts), MAX_SHARD_COUNT_UPDATES)
+        ), steps
+
+    deadline = time.time() + wait_timeout
+    for n, count in enumerate(counts):
+        step = dict(operation='update_shard_count', current_count=current_count, target_count=count)
+        success, err_msg = run_resharding_step(
+            client, stream_name, step,
+            partial(update_shard_count, client, stream_name, count, check_mode=check_mode), steps,
+            wait=wait or n < len(counts) - 1, deadline=deadline, check_mode=check_mode
+        )
+        if not success:
+            return success, 'Failed to change the number of shards from {0} to {1}: {2}'.format(
+                current_count, count, err_msg
+            ), steps
+        current_count = count
+
+    return True, '', steps
+
+
+def list_shards(client, stream_name):
+    """Retrieve all the shards of a Kinesis Stream, with their hash key ranges.
+    Args:
+        client (botocore.client.EC2): Boto3 client.
+        stream_name (str): The name of the kinesis stream.
+
+    Basic Usage:
+        >>> client = boto3.client('kinesis')
+        >>> list_shards(client, 'test-stream')
+
+    Returns:
+        Tuple (bool, str, list)
+    """
+    shards = list()
+    params = {
+        'StreamName': stream_name,
+    }
+    try:
+        while True:
+            response = client.list_shards(**params)
+            shards.extend(response['Shards'])
+            if not response.get('NextToken'):
+                break
+            # ListShards does not accept the stream name together with a token
+            params = {
+                'NextToken': response['NextToken'],
+            }
+    except botocore.exceptions.ClientError as e:
+        return False, to_native(e), shards
+
+    return True, '', shards
+
+
+def plan_shard_operations(shards, shard_operations):
+    """Check splits and merges against the shards of a Kinesis Stream.
+    Operations on shards that are already closed are skipped, and the split point defaults to the
+    middle of the hash key range of the shard.
+    Args:
+        shards (list): The shards of the stream, as returned by ListShards.
+        shard_operations (list): The shard_operations option.
+
+    Basic Usage:
+        >>> plan_shard_operations(shards, [{'action': 'split', 'shard_id': 'shardId-000000000003'}])
+        [
+            {
+                'action': 'split',
+                'shard_id': 'shardId-000000000003',
+                'new_starting_hash_key': '85070591730234615865843651857942052864'
+            }
+        ]
+
+    Returns:
+        Tuple (bool, str, list)
+    """
+    shards_by_id = dict((shard['ShardId'], shard) for shard in shards)
+    open_shards = set(
+        shard['ShardId'] for shard in shards if 'EndingSequenceNumber' not in shard['SequenceNumberRange']
+    )
+    used = set()
+    planned = list()
+    for operation in shard_operations:
+        shard_id = operation['shard_id']
+        if shard_id not in shards_by_id:
+            return False, 'Shard {0} does not exist.'.format(shard_id), []
+        if shard_id not in open_shards:
+            continue
+        if shard_id in used:
+            return False, 'Shard {0} is closed by an earlier operation.'.format(shard_id), []
+        hash_keys = shards_by_id[shard_id]['HashKeyRange']
+        start = int(hash_keys['StartingHashKey'])
+        end = int(hash_keys['EndingHashKey'])
+
+        if operation['action'] == 'split':
+            if operation.get('new_starting_hash_key'):
+                new_starting_hash_key = int(operation['new_starting_hash_key'])
+            else:
+                new_starting_hash_key = start + (end - start + 1) // 2
+            if not start < new_starting_hash_key <= end:
+                return False, (
+                    'Shard {0} can not be split at {1}, outside of its hash key range {2} - {3}.'
+                    .format(shard_id, new_starting_hash_key, start, end)
+                ), []
+            used.add(shard_id)
+            planned.append(dict(action='split', shard_id=shard_id, new_starting_hash_key=str(new_starting_hash_key)))
+        else:
+            adjacent_shard_id = operation.get('adjacent_shard_id')
+            if not adjacent_shard_id:
+                return False, 'adjacent_shard_id is required to merge shard {0}.'.format(shard_id), []
+            if adjacent_shard_id not in open_shards or adjacent_shard_id in used:
+                return False, 'Shard {0} is not open and can not be merged.'.format(adjacent_shard_id), []
+            adjacent_hash_keys = shards_by_id[adjacent_shard_id]['HashKeyRange']
+            if (int(adjacent_hash_keys['StartingHashKey']) != end + 1 and
+                    int(adjacent_hash_keys['EndingHashKey']) + 1 != start):
+                return False, (
+                    'Shards {0} and {1} can not be merged, their hash key ranges are not adjacent.'
+                    .format(shard_id, adjacent_shard_id)
+                ), []
+            used.update([shard_id, adjacent_shard_id])
+            planned.append(dict(action='merge', shard_id=shard_id, adjacent_shard_id=adjacent_shard_id))
+
+    return True, '', planned
+
+
+def split_shard(client, stream_name, shard_id, new_starting_hash_key, check_mode=False):
+    """Split a shard of a Kinesis Stream in two.
+    Args:
+        client (botocore.client.EC2): Boto3 client.
+        stream_name (str): The name of the kinesis stream.
+        shard_id (str): The shard to split.
+        new_starting_hash_key (str): The first hash key of the second new shard.
+
+    Kwargs:
+        check_mode (bool): This will pass DryRun as one of the parameters to the aws api.
+            default=False
+
+    Returns:
+        Tuple (bool, str)
+    """
+    if not check_mode:
+        try:
+            client.split_shard(
+                StreamName=stream_name, ShardToSplit=shard_id, NewStartingHashKey=new_starting_hash_key
+            )
+        except botocore.exceptions.ClientError as e:
+            return False, to_native(e)
+
+    return True, ''
+
+
+def merge_shards(client, stream_name, shard_id, adjacent_shard_id, check_mode=False):
+    """Merge two adjacent shards of a Kinesis Stream.
+    Args:
+        client (botocore.client.EC2): Boto3 client.
+        stream_name (str): The name of the kinesis stream.
+        shard_id (str): The shard to merge.
+        adjacent_shard_id (str): The shard to merge it with.
+
+    Kwargs:
+        check_mode (bool): This will pass DryRun as one of the parameters to the aws api.
+            default=False
+
+    Returns:
+        Tuple (bool, str)
+    """
+    if not check_mode:
+        try:
+            client.merge_shards(
+                StreamName=stream_name, ShardToMerge=shard_id, AdjacentShardToMerge=adjacent_shard_id
+            )
+        except botocore.exceptions.ClientError as e:
+            return False, to_native(e)
+
+    return True, ''
+
+
+def apply_shard_operations(client, stream_name, shard_operations, wait_timeout=300, check_mode=False):
+    """Split and merge shards of a Kinesis Stream, one operation at a time.
+    Args:
+        client (botocore.client.EC2): Boto3 client.
+        stream_name (str): The name of the kinesis stream.
+        shard_operations (list): The shard_operations option.
+
+    Kwargs:
+        wait_timeout (int): How long all the operations together can take.
+            default=300
+        check_mode (bool): This will pass DryRun as one of the parameters to the aws api.
+            default=False
+
+    Basic Usage:
+        >>> client = boto3.client('kinesis')
+        >>> operations = [{'action': 'split', 'shard_id': 'shardId-000000000003'}]
+        >>> apply_shard_operations(client, 'test-stream', operations)
+
+    Returns:
+        Tuple (bool, bool, str, list)
+    """
+    changed = False
+    steps = list()
+    success, err_msg, shards = list_shards(client, stream_name)
+    if success:
+        success, err_msg, planned = plan_shard_operations(shards, shard_operations)
+    if not success:
+        return success, changed, err_msg, steps
+
+    deadline = time.time() + wait_timeout
+    for operation in planned:
+        if operation['action'] == 'split':
+            step = dict(
+                operation='split_shard', shard_id=operation['shard_id'],
+                new_starting_hash_key=operation['new_starting_hash_key']
+            )
+            action = partial(
+                split_shard, client, stream_name, operation['shard_id'],
+                operation['new_starting_hash_key'], check_mode=check_mode
+            )
+        else:
+            step = dict(
+                operation='merge_shards', shard_id=operation['shard_id'],
+                adjacent_shard_id=operation['adjacent_shard_id']
+            )
+            action = partial(
+                merge_shards, client, stream_name, operation['shard_id'],
+                operation['adjacent_shard_id'], check_mode=check_mode
+            )
+        success, err_msg = run_resharding_step(
+            client, stream_name, step, action, steps, deadline=deadline, check_mode=check_mode
+        )
+        if not success:
+            return success, changed, 'Failed to {0} shard {1}: {2}'.format(
+                operation['action'], operation['shard_id'], err_msg
+            ), steps
+        changed = True
+
+    return True, changed, '', steps
+
+
 def update(client, current_stream, stream_name, number_of_shards=1, retention_period=None,
-           tags=None, wait=False, wait_timeout=300, check_mode=False):
+           tags=None, wait=False, wait_timeout=300, check_mode=False, shard_operations=None,
+           resharding_steps=None):
     """Update an Amazon Kinesis Stream.
     Args:
         client (botocore.client.EC2): Boto3 client.
@@ -848,6 +1332,10 @@ def update(client, current_stream, stream_name, number_of_shards=1, retention_pe
             default=300
         check_mode (bool): This will pass DryRun as one of the parameters to the aws api.
             default=False
+        shard_operations (list): Splits and merges made before the number of shards is changed.
+            default=None
+        resharding_steps (list): The split, merge and UpdateShardCount operations made are appended to it.
+            default=None
 
     Basic Usage:
         >>> client = boto3.client('kinesis')
@@ -871,6 +1359,8 @@ def update(client, current_stream, stream_name, number_of_shards=1, retention_pe
     success = True
     changed = False
     err_msg = ''
+    if resharding_steps is None:
+        resharding_steps = list()
     if retention_period:
         if wait:
             wait_success, wait_msg, current_stream = (
@@ -942,10 +1432,38 @@ def update(client, current_stream, stream_name, number_of_shards=1, retention_pe
             )
             return success, changed, err_msg
 
-    if current_stream['OpenShardsCount'] != number_of_shards:
-        success, err_msg = (
-            update_shard_count(client, stream_name, number_of_shards, check_mode=check_mode)
+    open_shards = current_stream['OpenShardsCount']
+    if shard_operations:
+        success, operations_changed, err_msg, steps = (
+            apply_shard_operations(
+                client, stream_name, shard_operations, wait_timeout, check_mode=check_mode
+            )
         )
+        resharding_steps.extend(steps)
+        changed = changed or operations_changed
+        if not success:
+            return success, changed, err_msg
+
+        if operations_changed and check_mode:
+            # every split opens one more shard, every merge one less
+            open_shards += sum(1 if step['operation'] == 'split_shard' else -1 for step in steps)
+        elif operations_changed:
+            stream_found, stream_msg, current_stream = (
+                find_stream(client, stream_name, check_mode=check_mode)
+            )
+            if not stream_found:
+                return stream_found, changed, stream_msg
+            open_shards = current_stream['OpenShardsCount']
+
+    if open_shards != number_of_shards:
+        success, err_msg, steps = (
+            reshard(
+                client, stream_name, open_shards, number_of_shards,
+                wait, wait_timeout, check_mode=check_mode
+            )
+        )
+        resharding_steps.extend(steps)
+        changed = changed or bool(steps)
 
         if not success:
             return success, changed, err_msg
@@ -992,7 +1510,8 @@ def update(client, current_stream, stream_name, number_of_shards=1, retention_pe
 
 
 def create_stream(client, stream_name, number_of_shards=1, retention_period=None,
-                  tags=None, wait=False, wait_timeout=300, check_mode=False):
+                  tags=None, wait=False, wait_timeout=300, check_mode=False, shard_operations=None,
+                  resharding_steps=None):
     """Create an Amazon Kinesis Stream.
     Args:
         client (botocore.client.EC2): Boto3 client.
@@ -1011,6 +1530,10 @@ def create_stream(client, stream_name, number_of_shards=1, retention_period=None
             default=300
         check_mode (bool): This will pass DryRun as one of the parameters to the aws api.
             default=False
+        shard_operations (list): Splits and merges of the shards of an existing stream.
+            default=None
+        resharding_steps (list): The split, merge and UpdateShardCount operations made are appended to it.
+            default=None
 
     Basic Usage:
         >>> client = boto3.client('kinesis')
@@ -1042,7 +1565,8 @@ def create_stream(client, stream_name, number_of_shards=1, retention_period=None
     if stream_found and current_stream.get('StreamStatus') != 'DELETING':
         success, changed, err_msg = update(
             client, current_stream, stream_name, number_of_shards,
-            retention_period, tags, wait, wait_timeout, check_mode=check_mode
+            retention_period, tags, wait, wait_timeout, check_mode=check_mode,
+            shard_operations=shard_operations, resharding_steps=resharding_steps
         )
     else:
         create_success, create_msg = (
@@ -1340,6 +1864,15 @@ def main():
         encryption_type=dict(required=False, choices=['NONE', 'KMS']),
         key_id=dict(required=False, type='str'),
         encryption_state=dict(required=False, choices=['enabled', 'disabled']),
+        shard_operations=dict(
+            required=False, type='list', elements='dict',
+            options=dict(
+                action=dict(required=True, choices=['split', 'merge']),
+                shard_id=dict(required=True, type='str'),
+                adjacent_shard_id=dict(required=False, type='str'),
+                new_starting_hash_key=dict(required=False, type='str'),
+            ),
+        ),
     )
     module = AnsibleAWSModule(
         argument_spec=argument_spec,
@@ -1356,6 +1889,7 @@ def main():
     encryption_type = module.params.get('encryption_type')
     key_id = module.params.get('key_id')
     encryption_state = module.params.get('encryption_state')
+    shard_operations = module.params.get('shard_operations')
 
     if state == 'present' and not shards:
         module.fail_json(msg='Shards is required when state == present.')
@@ -1365,6 +1899,8 @@ def main():
             module.fail_json(msg='Retention period can not be less than 24 hours.')
 
     check_mode = module.check_mode
+    # every split, merge and UpdateShardCount call made by this run
+    resharding_steps = list()
     try:
         client = module.client('kinesis')
     except (botocore.exceptions.ClientError, botocore.exceptions.BotoCoreError) as e:
@@ -1374,7 +1910,8 @@ def main():
         success, changed, err_msg, results = (
             create_stream(
                 client, stream_name, shards, retention_period, tags,
-                wait, wait_timeout, check_mode
+                wait, wait_timeout, check_mode, shard_operations=shard_operations,
+                resharding_steps=resharding_steps
             )
         )
         if encryption_state == 'enabled':
@@ -1394,6 +1931,9 @@ def main():
             delete_stream(client, stream_name, wait, wait_timeout, check_mode)
         )
 
+    if resharding_steps:
+        results['resharding_steps'] = resharding_steps
+
     if success:
         module.exit_json(
             success=success, changed=changed, msg=err_msg, **results
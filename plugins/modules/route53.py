@@ -37,7 +37,7 @@ options:
   record:
     description:
       - The full DNS record to create or delete.
-    required: true
+      - Required unless I(records) is set.
     type: str
   ttl:
     description:
@@ -47,7 +47,7 @@ options:
   type:
     description:
       - The type of DNS record to create.
-    required: true
+      - Required when I(record) is set.
     choices: [ 'A', 'CNAME', 'MX', 'AAAA', 'TXT', 'PTR', 'SRV', 'SPF', 'CAA', 'NS', 'SOA' ]
     type: str
   alias:
@@ -123,6 +123,9 @@ options:
   wait:
     description:
       - Wait until the changes have been replicated to all Amazon Route 53 DNS servers.
+      - Without waiting the module returns as soon as Route 53 accepted the changes. The returned
+        I(change_id) or I(change_batches) can be passed to M(community.aws.route53_wait) later,
+        so the propagation of many changes is waited for together.
     type: bool
     default: false
   wait_timeout:
@@ -130,6 +133,90 @@ options:
       - How long to wait for the changes to be replicated, in seconds.
     default: 300
     type: int
+  records:
+    description:
+      - A list of records to manage in the zone with a single task, instead of I(record).
+      - The records are compared against one listing of the whole zone and only the differences are sent to Route 53,
+        in as few change batches as the Route 53 limits of 1000 records and 32000 value characters per request allow.
+      - With I(wait=true) the module waits once for every change batch rather than once for every record.
+      - Options that are not set on a record are taken from the module options of the same name.
+      - I(state=get) is not supported with I(records).
+    type: list
+    elements: dict
+    version_added: 1.3.0
+    suboptions:
+      record:
+        description: The full DNS record.
+        type: str
+        required: true
+      type:
+        description: The type of DNS record.
+        type: str
+        required: true
+        choices: [ 'A', 'CNAME', 'MX', 'AAAA', 'TXT', 'PTR', 'SRV', 'SPF', 'CAA', 'NS', 'SOA' ]
+      state:
+        description:
+          - Whether the record should exist.
+          - Defaults to the module I(state).
+          - The current record set is deleted when C(absent), whatever its values.
+        type: str
+        choices: [ 'present', 'absent' ]
+      value:
+        description:
+          - The values of the record, required when the record is C(present).
+        type: list
+        elements: str
+      ttl:
+        description: The TTL of the record.
+        type: int
+      alias:
+        description: Indicates if this is an alias record.
+        type: bool
+      alias_hosted_zone_id:
+        description: The hosted zone identifier of the alias target.
+        type: str
+      alias_evaluate_target_health:
+        description: Whether or not to evaluate the alias target health.
+        type: bool
+      identifier:
+        description: Differentiates among record sets that have the same combination of DNS name and type.
+        type: str
+      weight:
+        description: Weighted resource record sets only.
+        type: int
+      region:
+        description: Latency-based resource record sets only.
+        type: str
+      health_check:
+        description: Health check to associate with this record.
+        type: str
+      failover:
+        description: Failover resource record sets only.
+        type: str
+        choices: ['SECONDARY', 'PRIMARY']
+  cache_dir:
+    description:
+      - Directory in which the ids of zones and the record sets of zones are kept between tasks.
+      - Tasks using the same credentials share the cache, so a playbook managing many records of a zone
+        finds the zone and lists its records once every I(zone_cache_ttl) and I(record_cache_ttl) seconds
+        instead of once per task.
+      - Changes made by this module update the cache, changes made by anything else are only seen
+        once the cached record sets have expired.
+      - By default nothing is cached and every task looks up the zone and its record itself.
+    type: path
+    version_added: 1.3.0
+  zone_cache_ttl:
+    description:
+      - How long, in seconds, the id of a zone found by name is kept in I(cache_dir).
+    type: int
+    default: 3600
+    version_added: 1.3.0
+  record_cache_ttl:
+    description:
+      - How long, in seconds, the record sets of a zone are kept in I(cache_dir).
+    type: int
+    default: 300
+    version_added: 1.3.0
 author:
 - Bruce Pennypacker (@bpennypacker)
 - Mike Buzzetti (@jimbydamonk)
@@ -212,6 +299,52 @@ set:
       returned: always
       type: str
       sample: foo.bar.com.
+change_id:
+  description: The ID of the change sent to Route 53, for M(community.aws.route53_wait).
+  returned: when a single record was changed, not in check mode
+  type: str
+  sample: C2682N5HXP0BZ4
+  version_added: 1.3.0
+record_changes:
+  description: What happened to every record in I(records).
+  returned: when I(records) is set
+  type: list
+  elements: dict
+  contains:
+    record:
+      description: The DNS name of the record.
+      type: str
+      sample: www.foo.com.
+    type:
+      description: The type of the record.
+      type: str
+      sample: A
+    identifier:
+      description: The set identifier of the record.
+      type: str
+      sample: null
+    action:
+      description: One of C(create), C(update), C(delete) or C(unchanged).
+      type: str
+      sample: create
+change_batches:
+  description: The change batches sent to Route 53, in check mode the batches that would have been sent.
+  returned: when I(records) is set
+  type: list
+  elements: dict
+  contains:
+    id:
+      description: The ID of the change, not returned in check mode.
+      type: str
+      sample: C2682N5HXP0BZ4
+    changes:
+      description: The number of record set changes in the batch.
+      type: int
+      sample: 250
+    status:
+      description: The status of the change, C(INSYNC) once the module waited for it.
+      type: str
+      sample: PENDING
 '''
 
 EXAMPLES = r'''
@@ -361,143 +494,524 @@ EXAMPLES = r'''
       - 0 issuewild ";"
       - 0 iodef "mailto:security@example.com"
 
+- name: Create many records without waiting for each of them
+  community.aws.route53:
+    state: present
+    zone: foo.com
+    record: "{{ item.name }}.foo.com"
+    type: A
+    value: "{{ item.ip }}"
+  loop: "{{ hosts }}"
+  register: dns
+
+- name: Wait for all of them to be replicated together
+  community.aws.route53_wait:
+    change_ids: "{{ dns.results | selectattr('change_id', 'defined') | map(attribute='change_id') | select | list }}"
+
+- name: Share one listing of the zone between the tasks of a loop
+  community.aws.route53:
+    state: present
+    zone: foo.com
+    record: "{{ item.name }}.foo.com"
+    type: A
+    value: "{{ item.ip }}"
+    overwrite: true
+    cache_dir: "{{ playbook_dir }}/.route53_cache"
+  loop: "{{ hosts }}"
+
+- name: Manage many records of a zone in as few change batches as possible
+  community.aws.route53:
+    state: present
+    zone: foo.com
+    overwrite: true
+    wait: true
+    records:
+      - record: www.foo.com
+        type: A
+        value: 1.1.1.1
+      - record: mail.foo.com
+        type: MX
+        ttl: 300
+        value: 10 mx1.foo.com,20 mx2.foo.com
+      - record: old.foo.com
+        type: CNAME
+        state: absent
+
 '''
 
+import fcntl
+import hashlib
+import json
+import os
 import time
-import distutils.version
+from contextlib import contextmanager
 
 try:
-    import boto
-    import boto.ec2
-    from boto.route53 import Route53Connection
-    from boto.route53.record import Record, ResourceRecordSets
-    from boto.route53.status import Status
+    from botocore.exceptions import BotoCoreError, ClientError
 except ImportError:
-    pass  # Handled by HAS_BOTO
+    pass  # Handled by AnsibleAWSModule
+
+from ansible.module_utils._text import to_native
 
 from ansible_collections.amazon.aws.plugins.module_utils.core import AnsibleAWSModule
+from ansible_collections.amazon.aws.plugins.module_utils.core import is_boto3_error_code
+from ansible_collections.amazon.aws.plugins.module_utils.ec2 import AWSRetry
 from ansible_collections.amazon.aws.plugins.module_utils.ec2 import get_aws_connection_info
-from ansible_collections.amazon.aws.plugins.module_utils.ec2 import HAS_BOTO
-
-
-MINIMUM_BOTO_VERSION = '2.28.0'
-WAIT_RETRY_SLEEP = 5  # how many seconds to wait between propagation status polls
-
-
-class TimeoutError(Exception):
-    pass
-
-
-def get_zone_id_by_name(conn, module, zone_name, want_private, want_vpc_id):
-    """Finds a zone by name or zone_id"""
-    for zone in invoke_with_throttling_retries(conn.get_zones):
-        # only save this zone id if the private status of the zone matches
-        # the private_zone_in boolean specified in the params
-        private_zone = module.boolean(zone.config.get('PrivateZone', False))
-        if private_zone == want_private and zone.name == zone_name:
-            if want_vpc_id:
-                # NOTE: These details aren't available in other boto methods, hence the necessary
-                # extra API call
-                hosted_zone = invoke_with_throttling_retries(conn.get_hosted_zone, zone.id)
-                zone_details = hosted_zone['GetHostedZoneResponse']
-                # this is to deal with this boto bug: https://github.com/boto/boto/pull/2882
-                if isinstance(zone_details['VPCs'], dict):
-                    if zone_details['VPCs']['VPC']['VPCId'] == want_vpc_id:
-                        return zone.id
-                else:  # Forward compatibility for when boto fixes that bug
-                    if want_vpc_id in [v['VPCId'] for v in zone_details['VPCs']]:
-                        return zone.id
-            else:
-                return zone.id
-    return None
+from ansible_collections.community.aws.plugins.module_utils.route53 import change_id
+from ansible_collections.community.aws.plugins.module_utils.route53 import decode_name
+from ansible_collections.community.aws.plugins.module_utils.route53 import wait_for_changes
 
 
-def commit(changes, retry_interval, wait, wait_timeout):
-    """Commit changes, but retry PriorRequestNotComplete errors."""
-    result = None
-    retry = 10
-    while True:
+# ChangeResourceRecordSets limits, UPSERTs count twice towards both
+MAX_BATCH_RECORDS = 1000
+MAX_BATCH_VALUE_CHARS = 32000
+RECORD_TYPES = ['A', 'AAAA', 'CAA', 'CNAME', 'MX', 'NS', 'PTR', 'SOA', 'SPF', 'SRV', 'TXT']
+# keys of a ResourceRecordSet this module manages, anything else is left alone when comparing
+MANAGED_RECORD_SET_KEYS = ('Name', 'Type', 'SetIdentifier', 'Weight', 'Region', 'Failover',
+                           'HealthCheckId', 'TTL', 'ResourceRecords', 'AliasTarget')
+
+
+class Route53Cache(object):
+    '''Zone ids and the record sets of zones, kept in JSON files under cache_dir between tasks.
+
+    Without a cache_dir nothing is kept and every lookup goes to Route 53.'''
+
+    VERSION = 1
+
+    def __init__(self, module, cache_dir=None, namespace=None, zone_ttl=3600, record_ttl=300):
+        self.module = module
+        self.cache_dir = cache_dir
+        self.namespace = namespace
+        self.zone_ttl = zone_ttl
+        self.record_ttl = record_ttl
+
+    def _path(self, name):
+        return os.path.join(self.cache_dir, 'route53-%s-%s.json' % (self.namespace, name))
+
+    def _load(self, name):
         try:
-            retry -= 1
-            result = changes.commit()
-            break
-        except boto.route53.exception.DNSServerError as e:
-            code = e.body.split("<Code>")[1]
-            code = code.split("</Code>")[0]
-            if code != 'PriorRequestNotComplete' or retry < 0:
-                raise e
-            time.sleep(float(retry_interval))
+            with open(self._path(name)) as f:
+                data = json.load(f)
+        except (IOError, OSError, ValueError):
+            return None
+        if not isinstance(data, dict) or data.get('version') != self.VERSION:
+            return None
+        return data
+
+    @contextmanager
+    def _locked(self, name):
+        if not os.path.isdir(self.cache_dir):
+            os.makedirs(self.cache_dir)
+        with open(self._path(name) + '.lock', 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+    def _update(self, name, update):
+        '''Read, change and write back a cache file while holding its lock, update returns None to leave it alone'''
+        path = self._path(name)
+        try:
+            with self._locked(name):
+                data = update(self._load(name))
+                if data is None:
+                    return
+                data['version'] = self.VERSION
+                tmp_path = '{0}.{1}.tmp'.format(path, os.getpid())
+                with open(tmp_path, 'w') as f:
+                    json.dump(data, f)
+                os.rename(tmp_path, path)
+        except (IOError, OSError) as e:
+            self.module.warn('Could not update the route53 cache %s: %s' % (path, to_native(e)))
+
+    def zone_id(self, key, loader):
+        if not self.cache_dir:
+            return loader()
+        entry = (self._load('zones') or {}).get('zones', {}).get(key)
+        if entry and time.time() - entry[1] <= self.zone_ttl:
+            return entry[0]
+        zone_id = loader()
+        if zone_id is not None:
+            def update(data):
+                now = time.time()
+                zones = dict((k, v) for k, v in (data or {}).get('zones', {}).items() if now - v[1] <= self.zone_ttl)
+                zones[key] = [zone_id, now]
+                return dict(zones=zones)
+            self._update('zones', update)
+        return zone_id
+
+    def record_sets(self, zone_id, loader):
+        if not self.cache_dir:
+            return loader()
+        data = self._load(zone_id)
+        if data and time.time() - data['created'] <= self.record_ttl:
+            return data['record_sets']
+        # the listing is only as fresh as its first page
+        created = time.time()
+        record_sets = loader()
+        self._update(zone_id, lambda data: dict(created=created, record_sets=record_sets))
+        return record_sets
+
+    def apply(self, zone_id, changes):
+        '''Update the cached record sets of a zone with changes committed to it'''
+        if not self.cache_dir:
+            return
+
+        def update(data):
+            if not data:
+                return None
+            index = index_record_sets(data['record_sets'])
+            for change in changes:
+                rrset = change['ResourceRecordSet']
+                key = record_set_key(rrset['Name'], rrset['Type'], rrset.get('SetIdentifier'))
+                if change['Action'] == 'DELETE':
+                    index.pop(key, None)
+                else:
+                    index[key] = rrset
+            data['record_sets'] = list(index.values())
+            return data
+        self._update(zone_id, update)
+
+    def invalidate(self, zone_id):
+        if not self.cache_dir:
+            return
+        try:
+            os.unlink(self._path(zone_id))
+        except OSError:
+            pass
+
+
+def cache_namespace(module):
+    '''Cache files are shared by the tasks using the same credentials and endpoint'''
+    region, endpoint, aws_connect_kwargs = get_aws_connection_info(module, boto3=True)
+    identity = [aws_connect_kwargs.get('profile_name'), aws_connect_kwargs.get('aws_access_key_id'), endpoint]
+    return hashlib.sha1(json.dumps(identity).encode('utf-8')).hexdigest()[:16]
+
+
+@AWSRetry.jittered_backoff()
+def list_hosted_zones_by_name(client, **kwargs):
+    return client.list_hosted_zones_by_name(**kwargs)
+
+
+@AWSRetry.jittered_backoff()
+def get_hosted_zone(client, zone_id):
+    return client.get_hosted_zone(Id=zone_id)
+
+
+@AWSRetry.jittered_backoff()
+def list_record_sets(client, zone_id):
+    paginator = client.get_paginator('list_resource_record_sets')
+    return paginator.paginate(HostedZoneId=zone_id).build_full_result()['ResourceRecordSets']
 
-    if wait:
-        timeout_time = time.time() + wait_timeout
-        connection = changes.connection
-        change = result['ChangeResourceRecordSetsResponse']['ChangeInfo']
-        status = Status(connection, change)
-        while status.status != 'INSYNC' and time.time() < timeout_time:
-            time.sleep(WAIT_RETRY_SLEEP)
-            status.update()
-        if time.time() >= timeout_time:
-            raise TimeoutError()
-        return result
 
+@AWSRetry.jittered_backoff()
+def get_first_record_set(client, zone_id, name, record_type, identifier):
+    params = dict(HostedZoneId=zone_id, StartRecordName=name, StartRecordType=record_type, MaxItems='1')
+    if identifier is not None:
+        params['StartRecordIdentifier'] = identifier
+    record_sets = client.list_resource_record_sets(**params)['ResourceRecordSets']
+    return record_sets[0] if record_sets else None
 
-# Shamelessly copied over from https://git.io/vgmDG
-IGNORE_CODE = 'Throttling'
-MAX_RETRIES = 5
 
+@AWSRetry.jittered_backoff()
+def change_record_sets(client, zone_id, changes):
+    return client.change_resource_record_sets(HostedZoneId=zone_id, ChangeBatch=dict(Changes=changes))['ChangeInfo']
 
-def invoke_with_throttling_retries(function_ref, *argv, **kwargs):
-    retries = 0
+
+def find_zone_id(client, zone_name, want_private, want_vpc_id):
+    """Finds a zone by name, only looking at the zones sharing its name"""
+    params = dict(DNSName=zone_name)
     while True:
-        try:
-            retval = function_ref(*argv, **kwargs)
-            return retval
-        except boto.exception.BotoServerError as e:
-            if e.code != IGNORE_CODE or retries == MAX_RETRIES:
-                raise e
-        time.sleep(5 * (2**retries))
-        retries += 1
+        response = list_hosted_zones_by_name(client, **params)
+        for zone in response['HostedZones']:
+            if zone['Name'] != zone_name:
+                # zones are listed in name order starting at zone_name
+                return None
+            if zone['Config'].get('PrivateZone', False) != want_private:
+                continue
+            zone_id = zone['Id'].replace('/hostedzone/', '')
+            if not want_vpc_id:
+                return zone_id
+            if want_vpc_id in [v['VPCId'] for v in get_hosted_zone(client, zone_id).get('VPCs', [])]:
+                return zone_id
+        if not response.get('IsTruncated'):
+            return None
+        params = dict(DNSName=response['NextDNSName'], HostedZoneId=response['NextHostedZoneId'])
+
+
+def record_set_key(name, record_type, identifier):
+    name = decode_name(name).lower()
+    if name[-1:] != '.':
+        name += '.'
+    return (name, record_type, identifier)
+
+
+def index_record_sets(record_sets):
+    return dict((record_set_key(r['Name'], r['Type'], r.get('SetIdentifier')), r) for r in record_sets)
+
+
+def get_zone_id(module, client, cache, zone_in):
+    """The id of the zone named by the zone, private_zone and vpc_id options, failing if there is none"""
+    hosted_zone_id_in = module.params.get('hosted_zone_id')
+    if hosted_zone_id_in:
+        return hosted_zone_id_in
+    vpc_id_in = module.params.get('vpc_id')
+    private_zone_in = vpc_id_in is not None or module.params.get('private_zone')
+    key = '%s|%s|%s' % (zone_in, private_zone_in, vpc_id_in)
+    try:
+        zone_id = cache.zone_id(key, lambda: find_zone_id(client, zone_in, private_zone_in, vpc_id_in))
+    except (BotoCoreError, ClientError) as e:
+        module.fail_json_aws(e, msg="Could not find hosted zone %s" % zone_in)
+    if zone_id is None:
+        module.fail_json(msg="Zone %s does not exist in Route53" % zone_in)
+    return zone_id
+
+
+def find_record_set(client, cache, zone_id, name, record_type, identifier):
+    """Looks a record set up in the cached index of the zone, or with a single listing call without a cache"""
+    key = record_set_key(name, record_type, identifier)
+    if cache.cache_dir:
+        return index_record_sets(cache.record_sets(zone_id, lambda: list_record_sets(client, zone_id))).get(key)
+    # The listing begins with the record set matching the requested name, type and
+    # identifier if there is one, followed by all others that come after it in
+    # alphabetical order. If the first set does not match no other set will.
+    rrset = get_first_record_set(client, zone_id, name, record_type, identifier)
+    if rrset is not None and record_set_key(rrset['Name'], rrset['Type'], rrset.get('SetIdentifier')) == key:
+        return rrset
+    return None
 
 
-def decode_name(name):
-    # Due to a bug in either AWS or Boto, "special" characters are returned as octals, preventing round
-    # tripping of things like * and @.
-    return name.encode().decode('unicode_escape')
+def normalize_record_set(rrset):
+    """Returns the managed parts of a ResourceRecordSet in a form that can be compared"""
+    rrset = dict((k, v) for k, v in rrset.items() if k in MANAGED_RECORD_SET_KEYS)
+    rrset['Name'] = record_set_key(rrset['Name'], None, None)[0]
+    if 'AliasTarget' in rrset:
+        alias = dict(rrset['AliasTarget'])
+        alias['DNSName'] = alias['DNSName'].lower()
+        if alias['DNSName'][-1:] != '.':
+            alias['DNSName'] += '.'
+        rrset['AliasTarget'] = alias
+    if rrset['Type'] == 'CAA':
+        rrset['ResourceRecords'] = sorted(rrset.get('ResourceRecords', []), key=lambda r: r['Value'])
+    return rrset
+
+
+def build_record_set(spec):
+    """Turns an entry of the records option into a ResourceRecordSet"""
+    rrset = dict(Name=spec['record'], Type=spec['type'])
+    if spec['identifier'] is not None:
+        rrset['SetIdentifier'] = str(spec['identifier'])
+    if spec['weight'] is not None:
+        rrset['Weight'] = spec['weight']
+    if spec['region'] is not None:
+        rrset['Region'] = spec['region']
+    if spec['failover'] is not None:
+        rrset['Failover'] = spec['failover']
+    if spec['health_check'] is not None:
+        rrset['HealthCheckId'] = spec['health_check']
+    if spec['alias']:
+        rrset['AliasTarget'] = dict(
+            HostedZoneId=spec['alias_hosted_zone_id'],
+            DNSName=spec['value'][0],
+            EvaluateTargetHealth=spec['alias_evaluate_target_health'],
+        )
+    else:
+        rrset['TTL'] = spec['ttl']
+        rrset['ResourceRecords'] = [dict(Value=v) for v in spec['value'] or []]
+    return rrset
 
 
-def to_dict(rset, zone_in, zone_id):
+def record_set_to_dict(rrset, zone_in, zone_id):
     record = dict()
     record['zone'] = zone_in
-    record['type'] = rset.type
-    record['record'] = decode_name(rset.name)
-    record['ttl'] = str(rset.ttl)
-    record['identifier'] = rset.identifier
-    record['weight'] = rset.weight
-    record['region'] = rset.region
-    record['failover'] = rset.failover
-    record['health_check'] = rset.health_check
+    record['type'] = rrset['Type']
+    record['record'] = decode_name(rrset['Name'])
+    record['ttl'] = str(rrset['TTL']) if 'TTL' in rrset else None
+    record['identifier'] = rrset.get('SetIdentifier')
+    record['weight'] = rrset.get('Weight')
+    record['region'] = rrset.get('Region')
+    record['failover'] = rrset.get('Failover')
+    record['health_check'] = rrset.get('HealthCheckId')
     record['hosted_zone_id'] = zone_id
-    if rset.alias_dns_name:
+    if 'AliasTarget' in rrset:
         record['alias'] = True
-        record['value'] = rset.alias_dns_name
-        record['values'] = [rset.alias_dns_name]
-        record['alias_hosted_zone_id'] = rset.alias_hosted_zone_id
-        record['alias_evaluate_target_health'] = rset.alias_evaluate_target_health
+        record['value'] = rrset['AliasTarget']['DNSName']
+        record['values'] = [rrset['AliasTarget']['DNSName']]
+        record['alias_hosted_zone_id'] = rrset['AliasTarget']['HostedZoneId']
+        record['alias_evaluate_target_health'] = rrset['AliasTarget']['EvaluateTargetHealth']
     else:
+        values = sorted(r['Value'] for r in rrset.get('ResourceRecords', []))
         record['alias'] = False
-        record['value'] = ','.join(sorted(rset.resource_records))
-        record['values'] = sorted(rset.resource_records)
+        record['value'] = ','.join(values)
+        record['values'] = values
     return record
 
 
+def record_spec_error(spec):
+    """The checks main does for a single record, for an entry of the records option"""
+    name = '%s %s' % (spec['record'], spec['type'])
+    if spec['state'] == 'absent':
+        return None
+    if not spec['value']:
+        return "record %s: 'value' is required when the record is present" % name
+    if spec['alias'] and len(spec['value']) != 1:
+        return "record %s: 'value' must contain a single dns name for alias records" % name
+    if spec['alias'] and not spec['alias_hosted_zone_id']:
+        return "record %s: 'alias_hosted_zone_id' is required for alias records" % name
+    routing = [k for k in ('failover', 'region', 'weight') if spec[k] is not None]
+    if len(routing) > 1:
+        return "record %s: 'failover', 'region' and 'weight' are mutually exclusive" % name
+    if routing and spec['identifier'] is None:
+        return "record %s: 'identifier' is required with '%s'" % (name, routing[0])
+    if spec['identifier'] is not None and not routing:
+        return "record %s: 'identifier' makes sense only if you specify one of: weight, region or failover" % name
+    return None
+
+
+def plan_record_changes(record_sets, wanted, overwrite):
+    """
+    Diffs the wanted (state, ResourceRecordSet) pairs against the current record sets of the zone.
+
+    Returns the changes to send, deletions first, the action taken for every wanted record and
+    the records that exist with different values when overwrite is not set.
+    """
+    index = index_record_sets(record_sets)
+    changes = dict(DELETE=[], CREATE=[], UPSERT=[])
+    results = []
+    conflicts = []
+    for state, rrset in wanted:
+        key = record_set_key(rrset['Name'], rrset['Type'], rrset.get('SetIdentifier'))
+        current = index.get(key)
+        action = None
+        if state == 'absent':
+            if current is not None:
+                action = 'DELETE'
+                rrset = current
+        elif current is None:
+            action = 'CREATE'
+        elif normalize_record_set(current) != normalize_record_set(rrset):
+            if overwrite:
+                action = 'UPSERT'
+            else:
+                conflicts.append('%s %s' % key[:2])
+        if action:
+            changes[action].append(dict(Action=action, ResourceRecordSet=rrset))
+        results.append(dict(
+            record=key[0], type=key[1], identifier=key[2],
+            action=dict(CREATE='create', UPSERT='update', DELETE='delete').get(action, 'unchanged'),
+            before=current, after=None if state == 'absent' else rrset,
+        ))
+    return changes['DELETE'] + changes['CREATE'] + changes['UPSERT'], results, conflicts
+
+
+def batch_changes(changes, max_records=MAX_BATCH_RECORDS, max_chars=MAX_BATCH_VALUE_CHARS):
+    """Splits changes into as few ChangeBatches as the Route 53 request limits allow"""
+    batches = []
+    batch, records, chars = [], 0, 0
+    for change in changes:
+        values = [r['Value'] for r in change['ResourceRecordSet'].get('ResourceRecords', [])]
+        weight = 2 if change['Action'] == 'UPSERT' else 1
+        change_records = max(len(values), 1) * weight
+        change_chars = sum(len(v) for v in values) * weight
+        if batch and (records + change_records > max_records or chars + change_chars > max_chars):
+            batches.append(batch)
+            batch, records, chars = [], 0, 0
+        batch.append(change)
+        records += change_records
+        chars += change_chars
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def commit_batch(client, zone_id, changes, retry_interval):
+    """Commit a ChangeBatch, but retry PriorRequestNotComplete errors."""
+    retry = 10
+    while True:
+        try:
+            retry -= 1
+            return change_record_sets(client, zone_id, changes)
+        except is_boto3_error_code('PriorRequestNotComplete'):
+            if retry < 0:
+                raise
+            time.sleep(float(retry_interval))
+
+
+def manage_records(module, client, cache, zone_in):
+    """Converge every entry of the records option with one zone listing and batched changes"""
+    if module.params['state'] == 'get':
+        module.fail_json(msg="state 'get' is not supported with 'records'")
+    default_state = 'present' if module.params['state'] in ('present', 'create') else 'absent'
+
+    wanted = []
+    seen = set()
+    for spec in module.params['records']:
+        spec = dict(spec)
+        spec['state'] = spec['state'] or default_state
+        for option in ('ttl', 'alias_evaluate_target_health'):
+            if spec[option] is None:
+                spec[option] = module.params[option]
+        error = record_spec_error(spec)
+        if error:
+            module.fail_json(msg=error)
+        rrset = build_record_set(spec)
+        key = record_set_key(rrset['Name'], rrset['Type'], rrset.get('SetIdentifier'))
+        if key in seen:
+            module.fail_json(msg="record %s %s is listed more than once in 'records'" % key[:2])
+        seen.add(key)
+        wanted.append((spec['state'], rrset))
+
+    zone_id = get_zone_id(module, client, cache, zone_in)
+    try:
+        record_sets = cache.record_sets(zone_id, lambda: list_record_sets(client, zone_id))
+    except (BotoCoreError, ClientError) as e:
+        module.fail_json_aws(e, msg="Could not list the record sets of hosted zone %s" % zone_id)
+
+    changes, results, conflicts = plan_record_changes(record_sets, wanted, module.params['overwrite'])
+    if conflicts:
+        module.fail_json(msg="Records already exist with different values. Set 'overwrite' to replace them: %s" % ', '.join(conflicts))
+
+    batches = batch_changes(changes)
+    change_batches = [dict(id=None, changes=len(batch), status=None) for batch in batches]
+    if not module.check_mode:
+        for number, (batch, report) in enumerate(zip(batches, change_batches)):
+            try:
+                change = commit_batch(client, zone_id, batch, module.params['retry_interval'])
+            except (BotoCoreError, ClientError) as e:
+                cache.invalidate(zone_id)
+                module.fail_json_aws(e, msg="Failed to commit change batch %d of %d" % (number + 1, len(batches)),
+                                     change_batches=change_batches[:number])
+            cache.apply(zone_id, batch)
+            report['id'] = change_id(change)
+            report['status'] = change['Status']
+        if module.params['wait'] and change_batches:
+            try:
+                waited = wait_for_changes(client, [b['id'] for b in change_batches], module.params['wait_timeout'])
+            except (BotoCoreError, ClientError) as e:
+                module.fail_json_aws(e, msg="Failed to get the status of the change batches")
+            for report, change in zip(change_batches, waited['changes']):
+                report['status'] = change['status']
+            if not waited['in_sync']:
+                module.fail_json(msg='Timeout waiting for changes to replicate', change_batches=change_batches)
+
+    diff = dict(before=[], after=[])
+    for result in results:
+        before, after = result.pop('before'), result.pop('after')
+        if result['action'] != 'unchanged':
+            if before is not None:
+                diff['before'].append(record_set_to_dict(before, zone_in, zone_id))
+            if after is not None:
+                diff['after'].append(record_set_to_dict(after, zone_in, zone_id))
+
+    module.exit_json(changed=bool(changes), record_changes=results, change_batches=change_batches, diff=diff)
+
+
 def main():
     argument_spec = dict(
         state=dict(type='str', required=True, choices=['absent', 'create', 'delete', 'get', 'present'], aliases=['command']),
         zone=dict(type='str'),
         hosted_zone_id=dict(type='str'),
-        record=dict(type='str', required=True),
+        record=dict(type='str'),
         ttl=dict(type='int', default=3600),
-        type=dict(type='str', required=True, choices=['A', 'AAAA', 'CAA', 'CNAME', 'MX', 'NS', 'PTR', 'SOA', 'SPF', 'SRV', 'TXT']),
+        type=dict(type='str', choices=RECORD_TYPES),
         alias=dict(type='bool'),
         alias_hosted_zone_id=dict(type='str'),
         alias_evaluate_target_health=dict(type='bool', default=False),
@@ -513,37 +1027,45 @@ def main():
         vpc_id=dict(type='str'),
         wait=dict(type='bool', default=False),
         wait_timeout=dict(type='int', default=300),
+        records=dict(type='list', elements='dict', options=dict(
+            record=dict(type='str', required=True),
+            type=dict(type='str', required=True, choices=RECORD_TYPES),
+            state=dict(type='str', choices=['present', 'absent']),
+            value=dict(type='list', elements='str'),
+            ttl=dict(type='int'),
+            alias=dict(type='bool'),
+            alias_hosted_zone_id=dict(type='str'),
+            alias_evaluate_target_health=dict(type='bool'),
+            identifier=dict(type='str'),
+            weight=dict(type='int'),
+            region=dict(type='str'),
+            health_check=dict(type='str'),
+            failover=dict(type='str', choices=['PRIMARY', 'SECONDARY']),
+        )),
+        cache_dir=dict(type='path'),
+        zone_cache_ttl=dict(type='int', default=3600),
+        record_cache_ttl=dict(type='int', default=300),
     )
 
     module = AnsibleAWSModule(
         argument_spec=argument_spec,
         supports_check_mode=True,
-        required_one_of=[['zone', 'hosted_zone_id']],
+        required_one_of=[['zone', 'hosted_zone_id'], ['record', 'records']],
         # If alias is True then you must specify alias_hosted_zone as well
-        required_together=[['alias', 'alias_hosted_zone_id']],
-        # state=present, absent, create, delete THEN value is required
-        required_if=(
-            ('state', 'present', ['value']),
-            ('state', 'create', ['value']),
-            ('state', 'absent', ['value']),
-            ('state', 'delete', ['value']),
-        ),
+        required_together=[['alias', 'alias_hosted_zone_id'], ['record', 'type']],
         # failover, region and weight are mutually exclusive
-        mutually_exclusive=[('failover', 'region', 'weight')],
+        mutually_exclusive=[('failover', 'region', 'weight'), ('record', 'records')],
         # failover, region and weight require identifier
         required_by=dict(
             failover=('identifier',),
             region=('identifier',),
             weight=('identifier',),
         ),
-        check_boto3=False,
     )
 
-    if not HAS_BOTO:
-        module.fail_json(msg='boto required for this module')
-
-    if distutils.version.StrictVersion(boto.__version__) < distutils.version.StrictVersion(MINIMUM_BOTO_VERSION):
-        module.fail_json(msg='Found boto in version %s, but >= %s is required' % (boto.__version__, MINIMUM_BOTO_VERSION))
+    # state=present, absent, create, delete THEN value is required
+    if not module.params['records'] and module.params['state'] != 'get' and not module.params['value']:
+        module.fail_json(msg='state is %s but all of the following are missing: value' % module.params['state'])
 
     if module.params['state'] in ('present', 'create'):
         command_in = 'create'
@@ -553,37 +1075,31 @@ def main():
         command_in = 'get'
 
     zone_in = (module.params.get('zone') or '').lower()
-    hosted_zone_id_in = module.params.get('hosted_zone_id')
-    ttl_in = module.params.get('ttl')
+    if zone_in[-1:] != '.':
+        zone_in += "."
+
+    client = module.client('route53')
+    cache_dir = module.params.get('cache_dir')
+    cache = Route53Cache(
+        module, cache_dir, cache_namespace(module) if cache_dir else None,
+        module.params.get('zone_cache_ttl'), module.params.get('record_cache_ttl'),
+    )
+
+    if module.params['records']:
+        manage_records(module, client, cache, zone_in)
+
     record_in = module.params.get('record').lower()
+    if record_in[-1:] != '.':
+        record_in += "."
     type_in = module.params.get('type')
     value_in = module.params.get('value') or []
     alias_in = module.params.get('alias')
-    alias_hosted_zone_id_in = module.params.get('alias_hosted_zone_id')
-    alias_evaluate_target_health_in = module.params.get('alias_evaluate_target_health')
-    retry_interval_in = module.params.get('retry_interval')
-
-    if module.params['vpc_id'] is not None:
-        private_zone_in = True
-    else:
-        private_zone_in = module.params.get('private_zone')
-
     identifier_in = module.params.get('identifier')
+    if identifier_in is not None:
+        identifier_in = str(identifier_in)
     weight_in = module.params.get('weight')
     region_in = module.params.get('region')
-    health_check_in = module.params.get('health_check')
     failover_in = module.params.get('failover')
-    vpc_id_in = module.params.get('vpc_id')
-    wait_in = module.params.get('wait')
-    wait_timeout_in = module.params.get('wait_timeout')
-
-    region, ec2_url, aws_connect_kwargs = get_aws_connection_info(module)
-
-    if zone_in[-1:] != '.':
-        zone_in += "."
-
-    if record_in[-1:] != '.':
-        record_in += "."
 
     if command_in == 'create' or command_in == 'delete':
         if alias_in and len(value_in) != 1:
@@ -591,115 +1107,81 @@ def main():
         if (weight_in is None and region_in is None and failover_in is None) and identifier_in is not None:
             module.fail_json(msg="You have specified identifier which makes sense only if you specify one of: weight, region or failover.")
 
-    # connect to the route53 endpoint
-    try:
-        conn = Route53Connection(**aws_connect_kwargs)
-    except boto.exception.BotoServerError as e:
-        module.fail_json(msg=e.error_message)
-
-    # Find the named zone ID
-    zone_id = hosted_zone_id_in or get_zone_id_by_name(conn, module, zone_in, private_zone_in, vpc_id_in)
+    zone_id = get_zone_id(module, client, cache, zone_in)
+
+    wanted_rset = build_record_set(dict(
+        record=record_in,
+        type=type_in,
+        ttl=module.params.get('ttl'),
+        value=value_in,
+        alias=alias_in,
+        alias_hosted_zone_id=module.params.get('alias_hosted_zone_id'),
+        alias_evaluate_target_health=module.params.get('alias_evaluate_target_health'),
+        identifier=identifier_in,
+        weight=weight_in,
+        region=region_in,
+        health_check=module.params.get('health_check'),
+        failover=failover_in,
+    ))
 
-    # Verify that the requested zone is already defined in Route53
-    if zone_id is None:
-        errmsg = "Zone %s does not exist in Route53" % (zone_in or hosted_zone_id_in)
-        module.fail_json(msg=errmsg)
+    try:
+        rset = find_record_set(client, cache, zone_id, record_in, type_in, identifier_in)
+    except (BotoCoreError, ClientError) as e:
+        module.fail_json_aws(e, msg="Could not look up record %s in hosted zone %s" % (record_in, zone_id))
 
     record = {}
-
-    found_record = False
-    wanted_rset = Record(name=record_in, type=type_in, ttl=ttl_in,
-                         identifier=identifier_in, weight=weight_in,
-                         region=region_in, health_check=health_check_in,
-                         failover=failover_in)
-    for v in value_in:
-        if alias_in:
-            wanted_rset.set_alias(alias_hosted_zone_id_in, v, alias_evaluate_target_health_in)
-        else:
-            wanted_rset.add_value(v)
-
-    need_to_sort_records = (type_in == 'CAA')
-
-    # Sort records for wanted_rset if necessary (keep original list)
-    unsorted_records = wanted_rset.resource_records
-    if need_to_sort_records:
-        wanted_rset.resource_records = sorted(unsorted_records)
-
-    sets = invoke_with_throttling_retries(conn.get_all_rrsets, zone_id, name=record_in,
-                                          type=type_in, identifier=identifier_in)
-    sets_iter = iter(sets)
-    while True:
-        try:
-            rset = invoke_with_throttling_retries(next, sets_iter)
-        except StopIteration:
-            break
-        # Need to save this changes in rset, because of comparing rset.to_xml() == wanted_rset.to_xml() in next block
-        rset.name = decode_name(rset.name)
-
-        if identifier_in is not None:
-            identifier_in = str(identifier_in)
-
-        if rset.type == type_in and rset.name.lower() == record_in.lower() and rset.identifier == identifier_in:
-            if need_to_sort_records:
-                # Sort records
-                rset.resource_records = sorted(rset.resource_records)
-            found_record = True
-            record = to_dict(rset, zone_in, zone_id)
-            if command_in == 'create' and rset.to_xml() == wanted_rset.to_xml():
-                module.exit_json(changed=False)
-
-        # We need to look only at the first rrset returned by the above call,
-        # so break here. The returned elements begin with the one matching our
-        # requested name, type, and identifier, if such an element exists,
-        # followed by all others that come after it in alphabetical order.
-        # Therefore, if the first set does not match, no subsequent set will
-        # match either.
-        break
+    if rset is not None:
+        record = record_set_to_dict(rset, zone_in, zone_id)
+        if command_in == 'create' and normalize_record_set(rset) == normalize_record_set(wanted_rset):
+            module.exit_json(changed=False)
 
     if command_in == 'get':
         if type_in == 'NS':
             ns = record.get('values', [])
         else:
             # Retrieve name servers associated to the zone.
-            z = invoke_with_throttling_retries(conn.get_zone, zone_in)
-            ns = invoke_with_throttling_retries(z.get_nameservers)
+            try:
+                ns = get_hosted_zone(client, zone_id).get('DelegationSet', {}).get('NameServers', [])
+            except (BotoCoreError, ClientError) as e:
+                module.fail_json_aws(e, msg="Could not get the name servers of hosted zone %s" % zone_id)
 
         module.exit_json(changed=False, set=record, nameservers=ns)
 
-    if command_in == 'delete' and not found_record:
+    if command_in == 'delete' and rset is None:
         module.exit_json(changed=False)
 
-    changes = ResourceRecordSets(conn, zone_id)
-
-    if command_in == 'create' or command_in == 'delete':
-        if command_in == 'create' and found_record:
-            if not module.params['overwrite']:
-                module.fail_json(msg="Record already exists with different value. Set 'overwrite' to replace it")
-            command = 'UPSERT'
-        else:
-            command = command_in.upper()
-        # Restore original order of records
-        wanted_rset.resource_records = unsorted_records
-        changes.add_change_record(command, wanted_rset)
+    if command_in == 'create' and rset is not None:
+        if not module.params['overwrite']:
+            module.fail_json(msg="Record already exists with different value. Set 'overwrite' to replace it")
+        command = 'UPSERT'
+    else:
+        command = command_in.upper()
+    changes = [dict(Action=command, ResourceRecordSet=wanted_rset)]
 
+    change = None
     if not module.check_mode:
         try:
-            invoke_with_throttling_retries(commit, changes, retry_interval_in, wait_in, wait_timeout_in)
-        except boto.route53.exception.DNSServerError as e:
-            txt = e.body.split("<Message>")[1]
-            txt = txt.split("</Message>")[0]
+            change = commit_batch(client, zone_id, changes, module.params.get('retry_interval'))
+            cache.apply(zone_id, changes)
+            if module.params.get('wait') and not wait_for_changes(client, [change], module.params.get('wait_timeout'))['in_sync']:
+                module.fail_json(msg='Timeout waiting for changes to replicate', change_id=change_id(change))
+        except is_boto3_error_code('InvalidChangeBatch') as e:
+            cache.invalidate(zone_id)
+            txt = e.response['Error']['Message']
             if "but it already exists" in txt:
                 module.exit_json(changed=False)
             else:
                 module.fail_json(msg=txt)
-        except TimeoutError:
-            module.fail_json(msg='Timeout waiting for changes to replicate')
+        except (BotoCoreError, ClientError) as e:  # pylint: disable=duplicate-except
+            cache.invalidate(zone_id)
+            module.fail_json_aws(e, msg="Failed to update record %s in hosted zone %s" % (record_in, zone_id))
 
     module.exit_json(
         changed=True,
+        change_id=change_id(change) if change else None,
         diff=dict(
             before=record,
-            after=to_dict(wanted_rset, zone_in, zone_id) if command != 'delete' else {},
+            after=record_set_to_dict(wanted_rset, zone_in, zone_id) if command_in != 'delete' else {},
         ),
     )
 
@@ -66,13 +66,60 @@ options:
     description:
       - "The first name in the lexicographic ordering of domain names that you want
         the list_command: record_sets to start listing from."
+      - With I(export_path), pass the I(next_record) returned by a previous export here, in I(type)
+        and in I(start_record_identifier) to resume it.
     required: false
     type: str
+  start_record_identifier:
+    description:
+      - The set identifier of the first record set to list, together with I(start_record_name) and I(type).
+    required: false
+    type: str
+    version_added: 1.3.0
+  export_path:
+    description:
+      - With I(query=record_sets), write the record sets to this local file page by page instead of
+        returning them, so zones of any size can be exported with little memory.
+      - I(max_items) is the maximum number of record sets written by the task. When the export stops
+        early the position to resume from is returned in I(export.next_record).
+    required: false
+    type: path
+    version_added: 1.3.0
+  export_format:
+    description:
+      - The format of I(export_path).
+      - C(jsonl) writes every record set as returned by the API as one JSON document per line.
+      - C(csv) writes a header and one row per record set, multiple values are separated by newlines.
+    required: false
+    choices: [ 'jsonl', 'csv' ]
+    default: jsonl
+    type: str
+    version_added: 1.3.0
+  export_append:
+    description:
+      - Append to I(export_path) instead of replacing it, to resume an export.
+    required: false
+    type: bool
+    default: false
+    version_added: 1.3.0
+  record_types:
+    description:
+      - With I(export_path), only export record sets of these types.
+    required: false
+    type: list
+    elements: str
+    version_added: 1.3.0
+  record_name_prefix:
+    description:
+      - With I(export_path), only export record sets whose name starts with this prefix.
+    required: false
+    type: str
+    version_added: 1.3.0
   type:
     description:
       - The type of DNS record.
     required: false
-    choices: [ 'A', 'CNAME', 'MX', 'AAAA', 'TXT', 'PTR', 'SRV', 'SPF', 'CAA', 'NS' ]
+    choices: [ 'A', 'CNAME', 'MX', 'AAAA', 'TXT', 'PTR', 'SRV', 'SPF', 'CAA', 'NS', 'SOA' ]
     type: str
   dns_name:
     description:
@@ -203,7 +250,74 @@ EXAMPLES = r'''
         hosted_zone_id: "{{ AWSINFO.zone_id }}"
         start_record_name: "host1.workshop.test.io"
       register: RECORDS
+
+- name: export a large zone to a JSON Lines file, 100000 record sets at a time
+  community.aws.route53_info:
+    query: record_sets
+    hosted_zone_id: ZZZ1111112222
+    export_path: /tmp/zone.jsonl
+    max_items: 100000
+  register: export
+
+- name: resume the export where it stopped
+  community.aws.route53_info:
+    query: record_sets
+    hosted_zone_id: ZZZ1111112222
+    export_path: /tmp/zone.jsonl
+    export_append: true
+    start_record_name: "{{ export.export.next_record.name }}"
+    type: "{{ export.export.next_record.type }}"
+    start_record_identifier: "{{ export.export.next_record.identifier | default(omit, true) }}"
+  when: export.export.next_record
+
+- name: export the A and AAAA records of a zone to CSV
+  community.aws.route53_info:
+    query: record_sets
+    hosted_zone_id: ZZZ1111112222
+    export_path: /tmp/addresses.csv
+    export_format: csv
+    record_types: [A, AAAA]
 '''
+
+RETURN = r'''
+export:
+  description: Summary of an export to I(export_path).
+  returned: when I(export_path) is set
+  type: complex
+  version_added: 1.3.0
+  contains:
+    path:
+      description: The file the record sets were written to.
+      type: str
+      sample: /tmp/zone.jsonl
+    format:
+      description: The format of the file.
+      type: str
+      sample: jsonl
+    records:
+      description: The number of record sets written.
+      type: int
+      sample: 100000
+    scanned:
+      description: The number of record sets listed, including those filtered out.
+      type: int
+      sample: 150000
+    pages:
+      description: The number of ListResourceRecordSets pages read.
+      type: int
+      sample: 500
+    next_record:
+      description:
+        - Where the listing stopped, C(null) once the whole zone has been exported.
+        - Pass I(name), I(type) and I(identifier) as I(start_record_name), I(type) and I(start_record_identifier) to resume.
+      type: dict
+      sample: {"name": "host1.example.com.", "type": "A", "identifier": null}
+'''
+
+import csv
+import json
+import os
+
 try:
     import boto
     import botocore
@@ -212,10 +326,17 @@ except ImportError:
     pass  # Handled by HAS_BOTO and HAS_BOTO3
 
 from ansible.module_utils._text import to_native
+from ansible.module_utils.six import PY2
 
 from ansible_collections.amazon.aws.plugins.module_utils.core import AnsibleAWSModule
 from ansible_collections.amazon.aws.plugins.module_utils.ec2 import HAS_BOTO
 from ansible_collections.amazon.aws.plugins.module_utils.ec2 import HAS_BOTO3
+from ansible_collections.community.aws.plugins.module_utils.route53 import decode_name
+
+CSV_FIELDS = [
+    'name', 'type', 'ttl', 'set_identifier', 'weight', 'region', 'failover', 'health_check_id',
+    'alias_dns_name', 'alias_hosted_zone_id', 'alias_evaluate_target_health', 'values',
+]
 
 
 def get_hosted_zone(client, module):
@@ -376,6 +497,15 @@ def record_sets_details(client, module):
     elif module.params.get('type'):
         params['StartRecordType'] = module.params.get('type')
 
+    if module.params.get('start_record_identifier'):
+        if not module.params.get('type'):
+            module.fail_json(msg="type must be specified if start_record_identifier is set")
+        params['StartRecordIdentifier'] = module.params.get('start_record_identifier')
+
+    if module.params.get('export_path'):
+        params.pop('MaxItems', None)
+        return dict(export=export_record_sets(client, module, params))
+
     paginator = client.get_paginator('list_resource_record_sets')
     record_sets = paginator.paginate(**params).build_full_result()['ResourceRecordSets']
     return {
@@ -384,6 +514,105 @@ def record_sets_details(client, module):
     }
 
 
+class RecordSetWriter(object):
+    '''Writes record sets to a JSON Lines or CSV file as they are listed'''
+
+    def __init__(self, path, export_format, append=False):
+        self.export_format = export_format
+        header = not (append and os.path.exists(path) and os.path.getsize(path))
+        mode = 'a' if append else 'w'
+        if PY2:
+            self.file = open(path, mode + 'b')
+        else:
+            self.file = open(path, mode, newline='')
+        self.csv = None
+        if export_format == 'csv':
+            self.csv = csv.writer(self.file)
+            if header:
+                self.csv.writerow(CSV_FIELDS)
+
+    def write(self, rrset):
+        if self.csv is None:
+            self.file.write(json.dumps(rrset, sort_keys=True) + '\n')
+            return
+        alias = rrset.get('AliasTarget', {})
+        row = [
+            rrset['Name'], rrset['Type'], rrset.get('TTL'), rrset.get('SetIdentifier'), rrset.get('Weight'),
+            rrset.get('Region'), rrset.get('Failover'), rrset.get('HealthCheckId'),
+            alias.get('DNSName'), alias.get('HostedZoneId'), alias.get('EvaluateTargetHealth'),
+            '\n'.join(r['Value'] for r in rrset.get('ResourceRecords', [])),
+        ]
+        self.csv.writerow(['' if v is None else to_native(v) for v in row])
+
+    def close(self):
+        self.file.close()
+
+
+def record_position(name, record_type, identifier):
+    return dict(name=name, type=record_type, identifier=identifier)
+
+
+def export_record_sets(client, module, params):
+    '''
+    Stream the record sets listed with params to export_path one page at a time, keeping none of them.
+
+    Returns how many were written and where the listing stopped, failing with the same report if a page
+    could not be read so that the export can be resumed from there.
+    '''
+    limit = int(module.params['max_items']) if module.params.get('max_items') else None
+    types = set(module.params.get('record_types') or [])
+    prefix = (module.params.get('record_name_prefix') or '').lower()
+    report = dict(
+        path=module.params['export_path'],
+        format=module.params['export_format'],
+        records=0,
+        scanned=0,
+        pages=0,
+        next_record=record_position(params.get('StartRecordName'), params.get('StartRecordType'),
+                                    params.get('StartRecordIdentifier')),
+    )
+
+    try:
+        writer = RecordSetWriter(report['path'], report['format'], module.params['export_append'])
+    except (IOError, OSError) as e:
+        module.fail_json(msg="Could not open %s: %s" % (report['path'], to_native(e)))
+    try:
+        paginator = client.get_paginator('list_resource_record_sets')
+        for page in paginator.paginate(**params):
+            report['pages'] += 1
+            record_sets = page['ResourceRecordSets']
+            for position, rrset in enumerate(record_sets):
+                report['scanned'] += 1
+                if types and rrset['Type'] not in types:
+                    continue
+                if prefix and not decode_name(rrset['Name']).lower().startswith(prefix):
+                    continue
+                writer.write(rrset)
+                report['records'] += 1
+                if limit is not None and report['records'] >= limit:
+                    if position + 1 < len(record_sets):
+                        following = record_sets[position + 1]
+                        report['next_record'] = record_position(following['Name'], following['Type'],
+                                                                following.get('SetIdentifier'))
+                        return report
+                    break
+            if page.get('IsTruncated'):
+                report['next_record'] = record_position(page['NextRecordName'], page.get('NextRecordType'),
+                                                        page.get('NextRecordIdentifier'))
+            else:
+                report['next_record'] = None
+            if limit is not None and report['records'] >= limit:
+                return report
+    except (botocore.exceptions.ClientError, botocore.exceptions.BotoCoreError) as e:
+        module.fail_json_aws(e, msg="Failed to list record sets, %d written to %s" % (report['records'], report['path']),
+                             export=report)
+    except (IOError, OSError) as e:
+        module.fail_json(msg="Could not write to %s: %s" % (report['path'], to_native(e)), export=report)
+    finally:
+        writer.close()
+    return report
+
+
 def health_check_details(client, module):
     health_check_invocations = {
         'list': list_health_checks,
@@ -427,8 +656,14 @@ def main():
         next_marker=dict(),
         delegation_set_id=dict(),
         start_record_name=dict(),
+        start_record_identifier=dict(),
+        export_path=dict(type='path'),
+        export_format=dict(choices=['jsonl', 'csv'], default='jsonl'),
+        export_append=dict(type='bool', default=False),
+        record_types=dict(type='list', elements='str'),
+        record_name_prefix=dict(),
         type=dict(choices=[
-            'A', 'CNAME', 'MX', 'AAAA', 'TXT', 'PTR', 'SRV', 'SPF', 'CAA', 'NS'
+            'A', 'CNAME', 'MX', 'AAAA', 'TXT', 'PTR', 'SRV', 'SPF', 'CAA', 'NS', 'SOA'
         ]),
         dns_name=dict(),
         resource_id=dict(type='list', aliases=['resource_ids'], elements='str'),
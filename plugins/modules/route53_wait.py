@@ -0,0 +1,132 @@
+#!/usr/bin/python
+# Copyright: Ansible Project
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+
+DOCUMENTATION = r'''
+module: route53_wait
+short_description: wait for Route 53 changes to be replicated
+version_added: 1.3.0
+description:
+    - Waits until changes made by M(community.aws.route53) and M(community.aws.route53_zone)
+      have been replicated to all Route 53 DNS servers.
+    - Many changes are polled together with C(GetChange), backing off exponentially between rounds,
+      so tasks that did not wait for their own changes can overlap their propagation times.
+requirements: [ boto3 ]
+options:
+  change_ids:
+    description:
+      - The IDs of the changes to wait for, as returned in I(change_id), I(change_batches) or I(change_ids)
+        by the other Route 53 modules.
+      - Both C(C2682N5HXP0BZ4) and C(/change/C2682N5HXP0BZ4) forms are accepted.
+    required: true
+    type: list
+    elements: str
+  wait_timeout:
+    description:
+      - How long to wait for all the changes to be replicated, in seconds.
+    type: int
+    default: 300
+  fail_on_timeout:
+    description:
+      - Whether to fail when some changes are still pending after I(wait_timeout) seconds.
+      - When C(false) the status of every change is returned either way.
+    type: bool
+    default: true
+extends_documentation_fragment:
+- amazon.aws.aws
+- amazon.aws.ec2
+
+author: "Ansible Project"
+'''
+
+EXAMPLES = r'''
+- name: Create records without waiting for each of them
+  community.aws.route53:
+    state: present
+    zone: example.com
+    record: "{{ item }}.example.com"
+    type: A
+    value: 192.0.2.10
+    overwrite: true
+  loop: "{{ hosts }}"
+  register: dns
+
+- name: Wait for all of them together
+  community.aws.route53_wait:
+    change_ids: "{{ dns.results | selectattr('change_id', 'defined') | map(attribute='change_id') | select | list }}"
+    wait_timeout: 600
+'''
+
+RETURN = r'''
+changes:
+    description: The last status of every change.
+    returned: always
+    type: list
+    elements: dict
+    contains:
+        id:
+            description: The ID of the change.
+            type: str
+            sample: C2682N5HXP0BZ4
+        status:
+            description: C(INSYNC) once the change has been replicated, C(PENDING) otherwise.
+            type: str
+            sample: INSYNC
+in_sync:
+    description: Whether all the changes have been replicated.
+    returned: always
+    type: bool
+    sample: true
+polls:
+    description: How many times the pending changes were polled.
+    returned: always
+    type: int
+    sample: 6
+seconds:
+    description: How long the module waited.
+    returned: always
+    type: float
+    sample: 41.7
+'''
+
+from ansible_collections.amazon.aws.plugins.module_utils.core import AnsibleAWSModule
+from ansible_collections.community.aws.plugins.module_utils.route53 import wait_for_changes
+
+try:
+    from botocore.exceptions import BotoCoreError, ClientError
+except ImportError:
+    pass  # caught by AnsibleAWSModule
+
+
+def main():
+    argument_spec = dict(
+        change_ids=dict(type='list', elements='str', required=True),
+        wait_timeout=dict(type='int', default=300),
+        fail_on_timeout=dict(type='bool', default=True),
+    )
+
+    module = AnsibleAWSModule(
+        argument_spec=argument_spec,
+        supports_check_mode=True,
+    )
+
+    client = module.client('route53')
+    change_ids = [c for c in module.params['change_ids'] if c]
+
+    try:
+        result = wait_for_changes(client, change_ids, module.params['wait_timeout'])
+    except (BotoCoreError, ClientError) as e:
+        module.fail_json_aws(e, msg="Could not get the status of changes %s" % ', '.join(change_ids))
+
+    if not result['in_sync'] and module.params['fail_on_timeout']:
+        module.fail_json(msg='Timeout waiting for changes to replicate', **result)
+
+    module.exit_json(changed=False, **result)
+
+
+if __name__ == '__main__':
+    main()
@@ -48,6 +48,20 @@ options:
             - The reusable delegation set ID to be associated with the zone.
             - Note that you can't associate a reusable delegation set with a private hosted zone.
         type: str
+    wait:
+        description:
+            - Wait until the creation or deletion of zones has been replicated to all Route 53 DNS servers.
+            - Without waiting the IDs of the changes are returned in I(change_ids) and can be passed
+              to M(community.aws.route53_wait) later.
+        type: bool
+        default: false
+        version_added: 1.3.0
+    wait_timeout:
+        description:
+            - How long to wait for the changes to be replicated, in seconds.
+        type: int
+        default: 300
+        version_added: 1.3.0
 extends_documentation_fragment:
 - amazon.aws.aws
 - amazon.aws.ec2
@@ -78,6 +92,11 @@ EXAMPLES = '''
     zone: example.com
     comment: reusable delegation set example
     delegation_set_id: A1BCDEF2GHIJKL
+
+- name: create a zone and wait until it is served by every Route 53 DNS server
+  community.aws.route53_zone:
+    zone: example.com
+    wait: true
 '''
 
 RETURN = '''
@@ -116,16 +135,37 @@ delegation_set_id:
     returned: for public hosted zones, if they have been associated with a reusable delegation set
     type: str
     sample: "A1BCDEF2GHIJKL"
+change_ids:
+    description: IDs of the changes made to zones by this task, for M(community.aws.route53_wait)
+    returned: always
+    type: list
+    elements: str
+    sample: ["C2682N5HXP0BZ4"]
+    version_added: 1.3.0
 '''
 
 import time
 from ansible_collections.amazon.aws.plugins.module_utils.core import AnsibleAWSModule
+from ansible_collections.community.aws.plugins.module_utils.route53 import change_id
+from ansible_collections.community.aws.plugins.module_utils.route53 import wait_for_changes
 
 try:
     from botocore.exceptions import BotoCoreError, ClientError
 except ImportError:
     pass  # caught by AnsibleAWSModule
 
+# IDs of the ChangeInfos returned for the zones created or deleted by this task
+change_ids = []
+
+
+def track_change(result):
+    if result.get('ChangeInfo'):
+        change_ids.append(change_id(result['ChangeInfo']))
+
+
+def delete_zone(client, zone_id):
+    track_change(client.delete_hosted_zone(Id=zone_id))
+
 
 def find_zones(module, client, zone_in, private_zone):
     try:
@@ -225,6 +265,7 @@ def create_or_update_private(module, client, matching_zones, record):
             )
         except (BotoCoreError, ClientError) as e:
             module.fail_json_aws(e, msg="Could not create hosted zone")
+        track_change(result)
 
         hosted_zone = result['HostedZone']
         zone_id = hosted_zone['Id'].replace('/hostedzone/', '')
@@ -273,6 +314,7 @@ def create_or_update_public(module, client, matching_zones, record):
                     params['DelegationSetId'] = record['delegation_set_id']
 
                 result = client.create_hosted_zone(**params)
+                track_change(result)
                 zone_details = result['HostedZone']
                 zone_delegation_set_details = result.get('DelegationSet', {})
 
@@ -303,7 +345,7 @@ def delete_private(module, client, matching_zones, vpc_id, vpc_region):
             if vpc_details['VPC']['VPCId'] == vpc_id and vpc_region == vpc_details['VPC']['VPCRegion']:
                 if not module.check_mode:
                     try:
-                        client.delete_hosted_zone(Id=z['Id'])
+                        delete_zone(client, z['Id'])
                     except (BotoCoreError, ClientError) as e:
                         module.fail_json_aws(e, msg="Could not delete hosted zone %s" % z['Id'])
                 return True, "Successfully deleted %s" % zone_details['Name']
@@ -311,7 +353,7 @@ def delete_private(module, client, matching_zones, vpc_id, vpc_region):
             if vpc_id in [v['VPCId'] for v in vpc_details] and vpc_region in [v['VPCRegion'] for v in vpc_details]:
                 if not module.check_mode:
                     try:
-                        client.delete_hosted_zone(Id=z['Id'])
+                        delete_zone(client, z['Id'])
                     except (BotoCoreError, ClientError) as e:
                         module.fail_json_aws(e, msg="Could not delete hosted zone %s" % z['Id'])
                 return True, "Successfully deleted %s" % zone_details['Name']
@@ -326,7 +368,7 @@ def delete_public(module, client, matching_zones):
     else:
         if not module.check_mode:
             try:
-                client.delete_hosted_zone(Id=matching_zones[0]['Id'])
+                delete_zone(client, matching_zones[0]['Id'])
             except (BotoCoreError, ClientError) as e:
                 module.fail_json_aws(e, msg="Could not get delete hosted zone %s" % matching_zones[0]['Id'])
         changed = True
@@ -341,7 +383,7 @@ def delete_hosted_id(module, client, hosted_zone_id, matching_zones):
             deleted.append(z['Id'])
             if not module.check_mode:
                 try:
-                    client.delete_hosted_zone(Id=z['Id'])
+                    delete_zone(client, z['Id'])
                 except (BotoCoreError, ClientError) as e:
                     module.fail_json_aws(e, msg="Could not delete hosted zone %s" % z['Id'])
         changed = True
@@ -349,7 +391,7 @@ def delete_hosted_id(module, client, hosted_zone_id, matching_zones):
     elif hosted_zone_id in [zo['Id'].replace('/hostedzone/', '') for zo in matching_zones]:
         if not module.check_mode:
             try:
-                client.delete_hosted_zone(Id=hosted_zone_id)
+                delete_zone(client, hosted_zone_id)
             except (BotoCoreError, ClientError) as e:
                 module.fail_json_aws(e, msg="Could not delete hosted zone %s" % hosted_zone_id)
         changed = True
@@ -395,6 +437,8 @@ def main():
         comment=dict(default=''),
         hosted_zone_id=dict(),
         delegation_set_id=dict(),
+        wait=dict(type='bool', default=False),
+        wait_timeout=dict(type='int', default=300),
     )
 
     mutually_exclusive = [
@@ -408,6 +452,9 @@ def main():
         supports_check_mode=True,
     )
 
+    global change_ids
+    change_ids = []
+
     zone_in = module.params.get('zone').lower()
     state = module.params.get('state').lower()
     vpc_id = module.params.get('vpc_id')
@@ -426,10 +473,18 @@ def main():
     elif state == 'absent':
         changed, result = delete(module, client, matching_zones=zones)
 
+    if module.params.get('wait') and change_ids:
+        try:
+            waited = wait_for_changes(client, change_ids, module.params.get('wait_timeout'))
+        except (BotoCoreError, ClientError) as e:
+            module.fail_json_aws(e, msg="Could not get the status of changes %s" % ', '.join(change_ids))
+        if not waited['in_sync']:
+            module.fail_json(msg='Timeout waiting for changes to replicate', change_ids=change_ids)
+
     if isinstance(result, dict):
-        module.exit_json(changed=changed, result=result, **result)
+        module.exit_json(changed=changed, result=result, change_ids=change_ids, **result)
     else:
-        module.exit_json(changed=changed, result=result)
+        module.exit_json(changed=changed, result=result, change_ids=change_ids)
 
 
 if __name__ == '__main__':
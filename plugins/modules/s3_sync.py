@@ -112,6 +112,53 @@ options:
     description:
       - The I(retries) option does nothing and will be removed after 2022-06-01
     type: str
+  streaming:
+    description:
+    - Read the files under I(file_root) one at a time as the sync goes instead of listing them all first, for trees too large to hold in memory.
+    - The C(filelist_initial), C(filelist_typed), C(filelist_s3) and C(filelist_local_etag) results are not returned,
+      see I(summary) for the number of files and bytes instead.
+    - The keys of the local files and, when comparing files, of the remote ones under I(key_prefix) are still kept in memory.
+    default: false
+    type: bool
+    version_added: 1.3.0
+  result_limit:
+    description:
+    - With I(streaming=true), return at most this many entries in each of C(filelist_actionable), C(uploads) and C(removed).
+    - I(summary) always has the full counts.
+    - By default all of them are returned.
+    type: int
+    version_added: 1.3.0
+  etag_cache:
+    description:
+    - Path of a file in which the local etags calculated for I(file_change_strategy=checksum) are kept between runs.
+    - A cached etag is used as long as the size, modification time and inode of the file are unchanged.
+    - By default etags are not cached.
+    type: path
+    version_added: 1.3.0
+  etag_cache_max_entries:
+    description:
+    - Maximum number of files kept in I(etag_cache). The least recently used entries are dropped first.
+    default: 100000
+    type: int
+    version_added: 1.3.0
+  hash_concurrency:
+    description:
+    - Number of files whose local etag is calculated at the same time.
+    default: 4
+    type: int
+    version_added: 1.3.0
+  head_concurrency:
+    description:
+    - Number of requests for the metadata of remote objects made at the same time.
+    default: 10
+    type: int
+    version_added: 1.3.0
+  upload_concurrency:
+    description:
+    - Number of threads of the transfer manager shared by all uploads.
+    default: 10
+    type: int
+    version_added: 1.3.0
 
 requirements:
   - boto3 >= 1.4.4
@@ -144,12 +191,21 @@ EXAMPLES = '''
     cache_control: "public, max-age=31536000"
     include: "*"
     exclude: "*.txt,.*"
+
+- name: sync a very large tree, keeping the result small
+  community.aws.s3_sync:
+    bucket: tedder
+    file_root: /srv/static
+    file_change_strategy: checksum
+    etag_cache: /var/cache/s3_sync/static.json
+    streaming: true
+    result_limit: 100
 '''
 
 RETURN = '''
 filelist_initial:
   description: file listing (dicts) from initial globbing
-  returned: always
+  returned: when I(streaming=false)
   type: list
   sample: [{
                 "bytes": 151,
@@ -158,8 +214,11 @@ filelist_initial:
                 "modified_epoch": 1477416706
            }]
 filelist_local_etag:
-  description: file listing (dicts) including calculated local etag
-  returned: always
+  description:
+  - file listing (dicts) including calculated local etag
+  - With I(file_change_strategy=checksum) the etag is only calculated for files that exist in the bucket with the same size,
+    for other strategies it is not needed at all.
+  returned: when I(streaming=false)
   type: list
   sample: [{
                 "bytes": 151,
@@ -171,7 +230,7 @@ filelist_local_etag:
            }]
 filelist_s3:
   description: file listing (dicts) including information about previously-uploaded versions
-  returned: always
+  returned: when I(streaming=false)
   type: list
   sample: [{
                 "bytes": 151,
@@ -183,7 +242,7 @@ filelist_s3:
            }]
 filelist_typed:
   description: file listing (dicts) with calculated or overridden mime types
-  returned: always
+  returned: when I(streaming=false)
   type: list
   sample: [{
                 "bytes": 151,
@@ -218,16 +277,50 @@ uploaded:
                 "whysize": "151 / 151",
                 "whytime": "1477931637 / 1477931489"
            }]
-
+summary:
+  description:
+  - Number of local files and their total size, how many of them needed uploading and were uploaded,
+    and with I(delete=true) the number of removed objects.
+  returned: always
+  type: dict
+  version_added: 1.3.0
+  sample: {
+            "files": 1200, "bytes": 52428800, "actionable": 24, "actionable_bytes": 1048576,
+            "uploaded": 24, "uploaded_bytes": 1048576, "removed": 2
+          }
+throughput:
+  description:
+  - Files and bytes handled by each stage of the sync, the time the workers of the stage were busy
+    and the resulting rate in bytes per second.
+  - The stages run at the same time, so I(elapsed) is usually much less than the sum of the stage times.
+  - I(cache_hits) of I(hash) counts the etags found in I(etag_cache).
+  - I(list) is the listing of the objects under I(key_prefix), I(requests) of I(compare) counts the HEAD requests
+    made for objects the listing did not fully describe.
+  returned: always
+  type: dict
+  version_added: 1.3.0
+  sample: {
+            "elapsed": 3.12,
+            "hash": {"files": 1200, "bytes": 52428800, "seconds": 1.8, "bytes_per_second": 29127111},
+            "list": {"files": 1180, "requests": 2, "seconds": 0.4},
+            "compare": {"files": 1200, "requests": 0, "seconds": 0.1},
+            "upload": {"files": 24, "bytes": 1048576, "seconds": 2.1, "bytes_per_second": 499322}
+          }
 '''
 
+import collections
 import datetime
 import fnmatch
 import hashlib
+import json
 import mimetypes
+import mmap
 import os
 import stat as osstat  # os.stat constants
+import threading
+import time
 import traceback
+from multiprocessing.pool import ThreadPool
 
 try:
     from dateutil import tz
@@ -238,11 +331,17 @@ except ImportError:
 try:
     import botocore
     from boto3.s3.transfer import TransferConfig
+    from boto3.s3.transfer import create_transfer_manager
     DEFAULT_CHUNK_SIZE = TransferConfig().multipart_chunksize
 except ImportError:
     DEFAULT_CHUNK_SIZE = 5 * 1024 * 1024
     pass  # Handled by AnsibleAWSModule
 
+try:
+    from s3transfer.subscribers import BaseSubscriber
+except ImportError:
+    BaseSubscriber = object
+
 from ansible.module_utils._text import to_text
 
 # import module snippets
@@ -305,8 +404,49 @@ def calculate_multipart_etag(source_path, chunk_size=DEFAULT_CHUNK_SIZE):
     return new_etag
 
 
+def _md5_digest(view, start, end):
+    return hashlib.md5(view[start:end]).digest()
+
+
+def calculate_multipart_etag_mmap(source_path, chunk_size=DEFAULT_CHUNK_SIZE, pool=None):
+    '''Same result as calculate_multipart_etag, without copying the file into memory.
+
+    The file is memory mapped and each part hashed from a slice of the mapping, which hashlib reads in place
+    (and without holding the GIL), so the parts can be spread over the threads of pool.'''
+    size = os.path.getsize(source_path)
+    if size <= chunk_size:
+        # includes empty files, which can't be mapped
+        return calculate_multipart_etag(source_path, chunk_size)
+
+    with open(source_path, 'rb') as fp:
+        mapped = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        try:
+            view = memoryview(mapped)
+        except TypeError:
+            # python 2 can't take a memoryview of an mmap, slicing it copies the part instead
+            view = mapped
+        try:
+            parts = [(view, start, min(start + chunk_size, size)) for start in range(0, size, chunk_size)]
+            if pool:
+                digests = pool.map(lambda part: _md5_digest(*part), parts)
+            else:
+                digests = [_md5_digest(*part) for part in parts]
+        finally:
+            if view is not mapped:
+                view.release()
+    finally:
+        mapped.close()
+
+    new_md5 = hashlib.md5(b"".join(digests))
+    return '"{0}-{1}"'.format(new_md5.hexdigest(), len(digests))
+
+
 def gather_files(fileroot, include=None, exclude=None):
-    ret = []
+    return list(iter_files(fileroot, include, exclude))
+
+
+def iter_files(fileroot, include=None, exclude=None):
     for (dirpath, dirnames, filenames) in os.walk(fileroot):
         for fn in filenames:
             fullpath = os.path.join(dirpath, fn)
@@ -333,16 +473,15 @@ def gather_files(fileroot, include=None, exclude=None):
             fstat = os.stat(fullpath)
             f_size = fstat[osstat.ST_SIZE]
             f_modified_epoch = fstat[osstat.ST_MTIME]
-            ret.append({
+            yield {
                 'fullpath': fullpath,
                 'chopped_path': chopped_path,
                 'modified_epoch': f_modified_epoch,
                 'bytes': f_size,
-            })
+            }
         # dirpath = path *to* the directory
         # dirnames = subdirs *in* our directory
         # filenames
-    return ret
 
 
 def calculate_s3_path(filelist, key_prefix=''):
@@ -355,138 +494,439 @@ def calculate_s3_path(filelist, key_prefix=''):
     return ret
 
 
-def calculate_local_etag(filelist, key_prefix=''):
-    '''Really, "calculate md5", but since AWS uses their own format, we'll just call
-       it a "local etag". TODO optimization: only calculate if remote key exists.'''
+def determine_mimetypes(filelist, override_map):
     ret = []
     for fileentry in filelist:
-        # don't modify the input dict
         retentry = fileentry.copy()
-        retentry['local_etag'] = calculate_multipart_etag(fileentry['fullpath'])
+        set_mimetype(retentry, override_map)
         ret.append(retentry)
-    return ret
-
 
-def determine_mimetypes(filelist, override_map):
-    ret = []
-    for fileentry in filelist:
-        retentry = fileentry.copy()
-        localfile = fileentry['fullpath']
+    return ret
 
-        # reminder: file extension is '.txt', not 'txt'.
-        file_extension = os.path.splitext(localfile)[1]
-        if override_map and override_map.get(file_extension):
-            # override? use it.
-            retentry['mime_type'] = override_map[file_extension]
-        else:
-            # else sniff it
-            retentry['mime_type'], retentry['encoding'] = mimetypes.guess_type(localfile, strict=False)
 
-        # might be None or '' from one of the above. Not a great type but better than nothing.
-        if not retentry['mime_type']:
-            retentry['mime_type'] = 'application/octet-stream'
+def set_mimetype(entry, override_map):
+    localfile = entry['fullpath']
 
-        ret.append(retentry)
+    # reminder: file extension is '.txt', not 'txt'.
+    file_extension = os.path.splitext(localfile)[1]
+    if override_map and override_map.get(file_extension):
+        # override? use it.
+        entry['mime_type'] = override_map[file_extension]
+    else:
+        # else sniff it
+        entry['mime_type'], entry['encoding'] = mimetypes.guess_type(localfile, strict=False)
 
-    return ret
+    # might be None or '' from one of the above. Not a great type but better than nothing.
+    if not entry['mime_type']:
+        entry['mime_type'] = 'application/octet-stream'
 
 
-def head_s3(s3, bucket, s3keys):
-    retkeys = []
-    for entry in s3keys:
-        retentry = entry.copy()
-        # don't modify the input dict
-        try:
-            retentry['s3_head'] = s3.head_object(Bucket=bucket, Key=entry['s3_path'])
-        except botocore.exceptions.ClientError as err:
-            if (hasattr(err, 'response') and
-                    'ResponseMetadata' in err.response and
-                    'HTTPStatusCode' in err.response['ResponseMetadata'] and
-                    str(err.response['ResponseMetadata']['HTTPStatusCode']) == '404'):
-                pass
-            else:
-                raise Exception(err)
-            # error_msg = boto_exception(err)
-            # return {'error': error_msg}
-        retkeys.append(retentry)
-    return retkeys
+def stream_files(params):
+    '''Generator doing what gather_files, determine_mimetypes and calculate_s3_path do, one file at a time and without copies.'''
+    for entry in iter_files(params['file_root'], exclude=params['exclude'], include=params['include']):
+        set_mimetype(entry, params.get('mime_map'))
+        entry['s3_path'] = os.path.join(params['key_prefix'], entry['chopped_path'])
+        yield entry
 
 
-def filter_list(s3, bucket, s3filelist, strategy):
-    keeplist = list(s3filelist)
+def head_s3_entry(s3, bucket, entry):
+    retentry = entry.copy()
+    # don't modify the input dict
+    try:
+        retentry['s3_head'] = s3.head_object(Bucket=bucket, Key=entry['s3_path'])
+    except botocore.exceptions.ClientError as err:
+        if (hasattr(err, 'response') and
+                'ResponseMetadata' in err.response and
+                'HTTPStatusCode' in err.response['ResponseMetadata'] and
+                str(err.response['ResponseMetadata']['HTTPStatusCode']) == '404'):
+            pass
+        else:
+            raise Exception(err)
+        # error_msg = boto_exception(err)
+        # return {'error': error_msg}
+    return retentry
 
-    for e in keeplist:
-        e['_strategy'] = strategy
 
-    # init/fetch info from S3 if we're going to use it for comparisons
-    if not strategy == 'force':
-        keeplist = head_s3(s3, bucket, s3filelist)
+def list_s3_objects(s3, bucket, key_prefix, stats=None):
+    '''Index the objects under key_prefix by key, with the parts of the HEAD response the strategies look at.'''
+    start = time.time()
+    index = {}
+    pages = 0
+    paginator = s3.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=bucket, Prefix=key_prefix):
+        pages += 1
+        for obj in page.get('Contents', []):
+            index[obj['Key']] = {
+                'ETag': obj.get('ETag'),
+                'ContentLength': obj.get('Size'),
+                'LastModified': obj.get('LastModified'),
+            }
+    if stats:
+        stats.add('list', time.time() - start, files=len(index), requests=pages)
+    return index
+
+
+def lookup_s3_entry(s3, bucket, entry, remote_index):
+    '''Like head_s3_entry, but using the listing in remote_index when it has everything needed.
+
+    Returns the entry and whether a HEAD request was made.'''
+    if remote_index is None:
+        return head_s3_entry(s3, bucket, entry), True
+    remote = remote_index.get(entry['s3_path'])
+    if remote is None:
+        return entry.copy(), False
+    if any(value is None for value in remote.values()):
+        # some S3 compatible stores leave out parts of the listing
+        return head_s3_entry(s3, bucket, entry), True
+    retentry = entry.copy()
+    retentry['s3_head'] = remote
+    return retentry, False
+
+
+def apply_strategy(entry, strategy):
+    '''Run the file change strategy on a single entry, setting skip_flag if it doesn't need uploading.'''
+    entry['_strategy'] = strategy
 
-    # now actually run the strategies
     if strategy == 'checksum':
-        for entry in keeplist:
-            if entry.get('s3_head'):
-                # since we have a remote s3 object, compare the values.
-                if entry['s3_head']['ETag'] == entry['local_etag']:
-                    # files match, so remove the entry
-                    entry['skip_flag'] = True
-                else:
-                    # file etags don't match, keep the entry.
-                    pass
-            else:  # we don't have an etag, so we'll keep it.
+        if entry.get('s3_head'):
+            # since we have a remote s3 object, compare the values. a remote object of a
+            # different size has changed, and the local etag is not calculated for it.
+            if entry['s3_head']['ContentLength'] == entry['bytes'] and entry['s3_head']['ETag'] == entry.get('local_etag'):
+                # files match, so remove the entry
+                entry['skip_flag'] = True
+            else:
+                # file etags don't match, keep the entry.
                 pass
+        else:  # we don't have an etag, so we'll keep it.
+            pass
     elif strategy == 'date_size':
-        for entry in keeplist:
-            if entry.get('s3_head'):
-                # fstat = entry['stat']
-                local_modified_epoch = entry['modified_epoch']
-                local_size = entry['bytes']
+        if entry.get('s3_head'):
+            # fstat = entry['stat']
+            local_modified_epoch = entry['modified_epoch']
+            local_size = entry['bytes']
 
-                # py2's datetime doesn't have a timestamp() field, so we have to revert to something more awkward.
-                # remote_modified_epoch = entry['s3_head']['LastModified'].timestamp()
-                remote_modified_datetime = entry['s3_head']['LastModified']
-                delta = (remote_modified_datetime - datetime.datetime(1970, 1, 1, tzinfo=tz.tzutc()))
-                remote_modified_epoch = delta.seconds + (delta.days * 86400)
+            # py2's datetime doesn't have a timestamp() field, so we have to revert to something more awkward.
+            # remote_modified_epoch = entry['s3_head']['LastModified'].timestamp()
+            remote_modified_datetime = entry['s3_head']['LastModified']
+            delta = (remote_modified_datetime - datetime.datetime(1970, 1, 1, tzinfo=tz.tzutc()))
+            remote_modified_epoch = delta.seconds + (delta.days * 86400)
 
-                remote_size = entry['s3_head']['ContentLength']
+            remote_size = entry['s3_head']['ContentLength']
 
-                entry['whytime'] = '{0} / {1}'.format(local_modified_epoch, remote_modified_epoch)
-                entry['whysize'] = '{0} / {1}'.format(local_size, remote_size)
+            entry['whytime'] = '{0} / {1}'.format(local_modified_epoch, remote_modified_epoch)
+            entry['whysize'] = '{0} / {1}'.format(local_size, remote_size)
 
-                if local_modified_epoch <= remote_modified_epoch and local_size == remote_size:
-                    entry['skip_flag'] = True
-            else:
-                entry['why'] = "no s3_head"
+            if local_modified_epoch <= remote_modified_epoch and local_size == remote_size:
+                entry['skip_flag'] = True
+        else:
+            entry['why'] = "no s3_head"
     # else: probably 'force'. Basically we don't skip with any with other strategies.
     else:
         pass
 
-    # prune 'please skip' entries, if any.
-    return [x for x in keeplist if not x.get('skip_flag')]
+    return entry
 
 
-def upload_files(s3, bucket, filelist, params):
-    ret = []
-    for entry in filelist:
-        args = {
-            'ContentType': entry['mime_type']
-        }
-        if params.get('permission'):
-            args['ACL'] = params['permission']
-        if params.get('cache_control'):
-            args['CacheControl'] = params['cache_control']
-        # if this fails exception is caught in main()
-        s3.upload_file(entry['fullpath'], bucket, entry['s3_path'], ExtraArgs=args, Callback=None, Config=None)
-        ret.append(entry)
-    return ret
+class EtagCache(object):
+    '''Multipart etags of local files, kept in a JSON file between runs.
 
+    Entries are keyed by absolute path and only used while the size, modification time and inode of the file are unchanged.'''
 
-def remove_files(s3, sourcelist, params):
+    VERSION = 1
+
+    def __init__(self, path, max_entries, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.path = path
+        self.max_entries = max_entries
+        self.chunk_size = chunk_size
+        self.entries = {}
+        self.lock = threading.Lock()
+        self.dirty = False
+        self.load()
+
+    @staticmethod
+    def fingerprint(fullpath):
+        fstat = os.stat(fullpath)
+        mtime_ns = getattr(fstat, 'st_mtime_ns', None)
+        if mtime_ns is None:
+            mtime_ns = int(fstat.st_mtime * 1000000000)
+        return [fstat.st_size, mtime_ns, fstat.st_ino]
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (IOError, OSError, ValueError):
+            return
+        # etags depend on the part size, so a cache made with another one is useless
+        if isinstance(data, dict) and data.get('version') == self.VERSION and data.get('chunk_size') == self.chunk_size:
+            self.entries = data.get('entries', {})
+
+    def etag(self, fullpath, pool=None):
+        '''Return the etag of fullpath and whether it came from the cache.'''
+        key = os.path.abspath(fullpath)
+        fingerprint = self.fingerprint(fullpath)
+        with self.lock:
+            cached = self.entries.get(key)
+            if cached and cached[:3] == fingerprint:
+                cached[4] = int(time.time())
+                self.dirty = True
+                return cached[3], True
+
+        etag = calculate_multipart_etag_mmap(fullpath, self.chunk_size, pool)
+        # don't remember etags of files that changed while they were read
+        if self.fingerprint(fullpath) == fingerprint:
+            with self.lock:
+                self.entries[key] = fingerprint + [etag, int(time.time())]
+                self.dirty = True
+        return etag, False
+
+    def save(self):
+        if not self.dirty:
+            return
+        entries = self.entries
+        if len(entries) > self.max_entries:
+            recent = sorted(entries, key=lambda k: entries[k][4], reverse=True)[:self.max_entries]
+            entries = dict((k, entries[k]) for k in recent)
+        directory = os.path.dirname(os.path.abspath(self.path))
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        tmp_path = '{0}.{1}.tmp'.format(self.path, os.getpid())
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': self.VERSION, 'chunk_size': self.chunk_size, 'entries': entries}, f)
+        os.rename(tmp_path, self.path)
+        self.dirty = False
+
+
+def upload_args(entry, params):
+    args = {
+        'ContentType': entry['mime_type']
+    }
+    if params.get('permission'):
+        args['ACL'] = params['permission']
+    if params.get('cache_control'):
+        args['CacheControl'] = params['cache_control']
+    return args
+
+
+class SyncStats(object):
+    '''Thread safe counters of the files, bytes and busy time of each pipeline stage.'''
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stages = {}
+        self.start = time.time()
+
+    def add(self, stage, seconds=0, files=1, **counters):
+        with self.lock:
+            totals = self.stages.setdefault(stage, {'files': 0, 'seconds': 0})
+            totals['files'] += files
+            totals['seconds'] += seconds
+            for name, value in counters.items():
+                totals[name] = totals.get(name, 0) + value
+
+    def stage(self, stage, func, **counters):
+        '''Wrap func so that each call is counted against stage.
+
+        Exceptions are returned rather than raised so they travel down the pipeline
+        to the consumer instead of stopping the pool feeding the next stage.'''
+        def wrapper(entry):
+            if isinstance(entry, Exception):
+                return entry
+            start = time.time()
+            try:
+                ret = func(entry)
+            except Exception as e:
+                return e
+            self.add(stage, time.time() - start, **dict((k, v(entry) if callable(v) else v) for k, v in counters.items()))
+            return ret
+        return wrapper
+
+    def summary(self):
+        ret = {'elapsed': round(time.time() - self.start, 3)}
+        for stage, totals in self.stages.items():
+            totals = dict(totals)
+            if 'bytes' in totals and totals['seconds'] > 0:
+                totals['bytes_per_second'] = int(totals['bytes'] / totals['seconds'])
+            totals['seconds'] = round(totals['seconds'], 3)
+            ret[stage] = totals
+        return ret
+
+
+class UploadTimer(BaseSubscriber):
+    '''Counts an upload against the upload stage from its first transferred byte until it is done.'''
+
+    def __init__(self, stats, entry):
+        self.stats = stats
+        self.entry = entry
+        self.queued = time.time()
+        self.started = None
+
+    def on_progress(self, future, bytes_transferred, **kwargs):
+        if self.started is None:
+            self.started = time.time()
+
+    def on_done(self, future, **kwargs):
+        try:
+            future.result()
+        except Exception:
+            return
+        self.stats.add('upload', time.time() - (self.started or self.queued), bytes=self.entry['bytes'])
+
+
+class SyncCollector(object):
+    '''Collects what sync_files does with each file.
+
+    By default every entry is kept. With keep_files=False only counts, the keys of the local files (for delete)
+    and the first limit actionable and uploaded entries are, so memory use doesn't grow with the entries.'''
+
+    def __init__(self, keep_files=True, limit=None):
+        self.keep_files = keep_files
+        self.limit = limit
+        self.local_etag = []
+        self.actionable = []
+        self.uploads = []
+        self.s3_paths = set()
+        self.counts = {'files': 0, 'bytes': 0, 'actionable': 0, 'actionable_bytes': 0, 'uploaded': 0, 'uploaded_bytes': 0}
+
+    def _keep(self, entries, entry):
+        if self.keep_files or self.limit is None or len(entries) < self.limit:
+            entries.append(entry)
+
+    def add_file(self, entry):
+        self.counts['files'] += 1
+        self.counts['bytes'] += entry['bytes']
+        if self.keep_files:
+            self.local_etag.append(entry)
+        else:
+            self.s3_paths.add(to_text(entry['s3_path']))
+
+    def add_actionable(self, entry):
+        self.counts['actionable'] += 1
+        self.counts['actionable_bytes'] += entry['bytes']
+        self._keep(self.actionable, entry)
+
+    def add_upload(self, entry):
+        self.counts['uploaded'] += 1
+        self.counts['uploaded_bytes'] += entry['bytes']
+        self._keep(self.uploads, entry)
+
+
+class BoundedFeed(object):
+    '''Hands out the items of iterable to a pool at most window at a time, done() has to be called as each one is finished.
+
+    Pool.imap otherwise queues up the whole input as fast as it can read it.'''
+
+    def __init__(self, iterable, window):
+        self.iterable = iterable
+        self.slots = threading.Semaphore(window)
+        self.closed = False
+
+    def __iter__(self):
+        for item in self.iterable:
+            self.slots.acquire()
+            if self.closed:
+                return
+            yield item
+
+    def done(self):
+        self.slots.release()
+
+    def close(self):
+        self.closed = True
+        self.slots.release()
+
+
+def sync_files(s3, filelist, params, remote_index=None, stats=None, etag_cache=None, collector=None):
+    '''Compare, hash and upload the files of filelist, each stage working on the output of the previous one as it arrives.
+
+    Remote objects are looked up in remote_index, as returned by list_s3_objects, or with HEAD requests if it is None.
+    Local etags are only calculated when the checksum strategy has a remote object of the same size to compare them
+    with, and are looked up in etag_cache first if one is given.
+    filelist may be a generator, it is read as the pipeline has room for more files. What is kept of the results is
+    up to collector, by default everything.
+    Returns the lists for the filelist_local_etag, filelist_actionable and uploads results, and the throughput stats.'''
+    bucket = params['bucket']
+    strategy = params['file_change_strategy']
+    stats = stats or SyncStats()
+    collector = collector or SyncCollector()
+    feed = BoundedFeed(filelist, 4 * (params['head_concurrency'] + params['hash_concurrency']))
+    max_pending_uploads = 4 * params['upload_concurrency']
+
+    def compare_entry(entry):
+        retentry = entry
+        if strategy != 'force':
+            entry['_strategy'] = strategy
+            retentry, requested = lookup_s3_entry(s3, bucket, entry, remote_index)
+            if requested:
+                stats.add('compare', files=0, requests=1)
+        return entry, retentry
+
+    def hash_entry(entries):
+        entry, retentry = entries
+        remote = retentry.get('s3_head')
+        if strategy == 'checksum' and remote and remote['ContentLength'] == entry['bytes']:
+            if etag_cache:
+                etag, cached = etag_cache.etag(entry['fullpath'], part_pool)
+            else:
+                etag, cached = calculate_multipart_etag_mmap(entry['fullpath'], pool=part_pool), False
+            if cached:
+                stats.add('hash', files=0, cache_hits=1)
+            else:
+                stats.add('hash', bytes=entry['bytes'])
+            entry['local_etag'] = retentry['local_etag'] = etag
+        return entry, apply_strategy(retentry, strategy)
+
+    hash_pool = ThreadPool(params['hash_concurrency'])
+    # the parts of large files are hashed in parallel, in a pool of their own so the hash workers can wait on it
+    part_pool = ThreadPool(params['hash_concurrency'])
+    head_pool = ThreadPool(params['head_concurrency'])
+    config = TransferConfig(max_concurrency=params['upload_concurrency'])
+    try:
+        with create_transfer_manager(s3, config) as manager:
+            compared = head_pool.imap(stats.stage('compare', compare_entry, requests=0), feed)
+            hashed = hash_pool.imap(stats.stage('hash', hash_entry, files=0), compared)
+
+            transfers = collections.deque()
+            for result in hashed:
+                feed.done()
+                if isinstance(result, Exception):
+                    raise result
+                hashed_entry, entry = result
+                collector.add_file(hashed_entry)
+                if entry.get('skip_flag'):
+                    continue
+                collector.add_actionable(entry)
+                transfers.append((entry, manager.upload(entry['fullpath'], bucket, entry['s3_path'],
+                                                        extra_args=upload_args(entry, params),
+                                                        subscribers=[UploadTimer(stats, entry)])))
+                # uploads finish roughly in order, waiting for the oldest keeps the queue short
+                while len(transfers) > max_pending_uploads:
+                    entry, future = transfers.popleft()
+                    future.result()
+                    collector.add_upload(entry)
+
+            for entry, future in transfers:
+                # if this fails exception is caught in main()
+                future.result()
+                collector.add_upload(entry)
+    finally:
+        # let the compare pool run out of input, then stop the hash pool which reads from it
+        feed.close()
+        hash_pool.terminate()
+        part_pool.terminate()
+        head_pool.terminate()
+
+    return collector.local_etag, collector.actionable, collector.uploads, stats.summary()
+
+
+def remove_files(s3, sourcelist, params, remote_index=None, keep_keys=None):
     bucket = params.get('bucket')
     key_prefix = params.get('key_prefix')
-    paginator = s3.get_paginator('list_objects_v2')
-    current_keys = set(x['Key'] for x in paginator.paginate(Bucket=bucket, Prefix=key_prefix).build_full_result().get('Contents', []))
-    keep_keys = set(to_text(source_file['s3_path']) for source_file in sourcelist)
+    if remote_index is None:
+        remote_index = list_s3_objects(s3, bucket, key_prefix)
+    current_keys = set(remote_index)
+    if keep_keys is None:
+        keep_keys = set(to_text(source_file['s3_path']) for source_file in sourcelist)
     delete_keys = list(current_keys - keep_keys)
 
     # can delete 1000 objects at a time
@@ -512,6 +952,13 @@ def main():
         include=dict(required=False, default="*"),
         cache_control=dict(required=False, default=''),
         delete=dict(required=False, type='bool', default=False),
+        streaming=dict(required=False, type='bool', default=False),
+        result_limit=dict(required=False, type='int'),
+        etag_cache=dict(required=False, type='path'),
+        etag_cache_max_entries=dict(required=False, type='int', default=100000),
+        hash_concurrency=dict(required=False, type='int', default=4),
+        head_concurrency=dict(required=False, type='int', default=10),
+        upload_concurrency=dict(required=False, type='int', default=10),
         # future options: encoding, metadata, storage_class, retries
     )
 
@@ -522,6 +969,12 @@ def main():
     if not HAS_DATEUTIL:
         module.fail_json(msg='dateutil required for this module')
 
+    for option in ('hash_concurrency', 'head_concurrency', 'upload_concurrency', 'etag_cache_max_entries'):
+        if module.params[option] < 1:
+            module.fail_json(msg='%s must be at least 1' % option)
+    if module.params['result_limit'] is not None and module.params['result_limit'] < 0:
+        module.fail_json(msg='result_limit must not be negative')
+
     result = {}
     mode = module.params['mode']
 
@@ -532,18 +985,53 @@ def main():
 
     if mode == 'push':
         try:
-            result['filelist_initial'] = gather_files(module.params['file_root'], exclude=module.params['exclude'], include=module.params['include'])
-            result['filelist_typed'] = determine_mimetypes(result['filelist_initial'], module.params.get('mime_map'))
-            result['filelist_s3'] = calculate_s3_path(result['filelist_typed'], module.params['key_prefix'])
-            result['filelist_local_etag'] = calculate_local_etag(result['filelist_s3'])
-            result['filelist_actionable'] = filter_list(s3, module.params['bucket'], result['filelist_local_etag'], module.params['file_change_strategy'])
-            result['uploads'] = upload_files(s3, module.params['bucket'], result['filelist_actionable'], module.params)
+            # one listing of the prefix replaces a HEAD request per file and is reused by the delete pass
+            stats = SyncStats()
+            remote_index = None
+            if module.params['file_change_strategy'] != 'force' or module.params['delete']:
+                try:
+                    remote_index = list_s3_objects(s3, module.params['bucket'], module.params['key_prefix'], stats)
+                except botocore.exceptions.ClientError as e:
+                    if module.params['delete'] or e.response.get('Error', {}).get('Code') != 'AccessDenied':
+                        raise
+                    module.warn('Not allowed to list the objects in {0}, checking files one at a time instead'.format(module.params['bucket']))
+
+            if module.params['streaming']:
+                collector = SyncCollector(keep_files=False, limit=module.params['result_limit'])
+                filelist = stream_files(module.params)
+            else:
+                collector = SyncCollector()
+                result['filelist_initial'] = gather_files(module.params['file_root'], exclude=module.params['exclude'], include=module.params['include'])
+                result['filelist_typed'] = determine_mimetypes(result['filelist_initial'], module.params.get('mime_map'))
+                result['filelist_s3'] = calculate_s3_path(result['filelist_typed'], module.params['key_prefix'])
+                filelist = result['filelist_s3']
+
+            etag_cache = None
+            if module.params['etag_cache'] and module.params['file_change_strategy'] == 'checksum':
+                etag_cache = EtagCache(module.params['etag_cache'], module.params['etag_cache_max_entries'])
+
+            (local_etag, result['filelist_actionable'],
+             result['uploads'], result['throughput']) = sync_files(s3, filelist, module.params, remote_index, stats, etag_cache, collector)
+            if not module.params['streaming']:
+                result['filelist_local_etag'] = local_etag
+            result['summary'] = collector.counts
+
+            if etag_cache:
+                try:
+                    etag_cache.save()
+                except (IOError, OSError) as e:
+                    module.warn('Failed to save the etag cache to {0}: {1}'.format(module.params['etag_cache'], to_text(e)))
 
             if module.params['delete']:
-                result['removed'] = remove_files(s3, result['filelist_local_etag'], module.params)
+                if module.params['streaming']:
+                    removed = remove_files(s3, [], module.params, remote_index, keep_keys=collector.s3_paths)
+                    result['removed'] = removed[:module.params['result_limit']]
+                else:
+                    removed = result['removed'] = remove_files(s3, local_etag, module.params, remote_index)
+                result['summary']['removed'] = len(removed)
 
-            # mark changed if we actually upload something.
-            if result.get('uploads') or result.get('removed'):
+            # mark changed if we actually upload or remove something; result lists may be truncated, so use the counts
+            if collector.counts['uploaded'] or collector.counts.get('removed'):
                 result['changed'] = True
             # result.update(filelist=actionable_filelist)
         except botocore.exceptions.ClientError as err:
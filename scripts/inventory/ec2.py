@@ -143,9 +143,14 @@ These settings would produce a destination_format as the following:
 import sys
 import os
 import argparse
+import calendar
+import hashlib
+import marshal
 import re
+import struct
 from time import time
 from copy import deepcopy
+from multiprocessing.pool import ThreadPool
 from datetime import date, datetime
 import boto
 from boto import ec2
@@ -161,11 +166,12 @@ from ansible.module_utils.six.moves import configparser
 HAS_BOTO3 = False
 try:
     import boto3  # noqa
+    import botocore.exceptions
     HAS_BOTO3 = True
 except ImportError:
     pass
 
-from collections import defaultdict
+from collections import defaultdict, namedtuple
 
 import json
 
@@ -175,12 +181,15 @@ DEFAULTS = {
     'all_elasticache_replication_groups': 'False',
     'all_instances': 'False',
     'all_rds_instances': 'False',
+    'boto3_instances': 'False',
     'aws_access_key_id': '',
     'aws_secret_access_key': '',
     'aws_security_token': '',
     'boto_profile': '',
+    'cache_format': 'json',
     'cache_max_age': '300',
     'cache_path': '~/.ansible/tmp',
+    'concurrency': '10',
     'destination_variable': 'public_dns_name',
     'elasticache': 'True',
     'eucalyptus': 'False',
@@ -224,6 +233,108 @@ DEFAULTS = {
 }
 
 
+# Stand-ins for the boto objects hanging off an Instance
+Boto3Reservation = namedtuple('Boto3Reservation', ['owner_id', 'instances'])
+Boto3Region = namedtuple('Boto3Region', ['name'])
+Boto3Placement = namedtuple('Boto3Placement', ['zone', 'group_name', 'tenancy'])
+Boto3InstanceState = namedtuple('Boto3InstanceState', ['name', 'code'])
+Boto3Group = namedtuple('Boto3Group', ['id', 'name'])
+Boto3BlockDevice = namedtuple('Boto3BlockDevice', ['volume_id', 'status', 'attach_time', 'delete_on_termination'])
+
+
+class Boto3Instance(object):
+    ''' Wraps an instance returned by boto3's describe_instances so it has the
+    attributes of a boto.ec2.instance.Instance, and add_instance and
+    get_host_info_dict_from_instance produce the same results for both '''
+
+    def __init__(self, data, region):
+        self.region = Boto3Region(region)
+        self.tags = dict((tag['Key'], tag['Value']) for tag in data.get('Tags', []))
+        self.id = data['InstanceId']
+        self.groups = [Boto3Group(group['GroupId'], group['GroupName']) for group in data.get('SecurityGroups', [])]
+        self.public_dns_name = data.get('PublicDnsName')
+        self.dns_name = self.public_dns_name
+        self.private_dns_name = data.get('PrivateDnsName')
+        self.key_name = data.get('KeyName')
+        self.instance_type = data.get('InstanceType')
+        self.launch_time = None
+        if data.get('LaunchTime'):
+            self.launch_time = data['LaunchTime'].strftime('%Y-%m-%dT%H:%M:%S.000Z')
+        self.image_id = data.get('ImageId')
+        self.kernel = data.get('KernelId')
+        self.ramdisk = data.get('RamdiskId')
+        self.product_codes = [code['ProductCodeId'] for code in data.get('ProductCodes', [])]
+        self.ami_launch_index = str(data.get('AmiLaunchIndex', 0))
+        self.monitoring_state = data.get('Monitoring', {}).get('State')
+        self.monitored = self.monitoring_state == 'enabled'
+        self.spot_instance_request_id = data.get('SpotInstanceRequestId')
+        self.subnet_id = data.get('SubnetId')
+        self.vpc_id = data.get('VpcId')
+        self.private_ip_address = data.get('PrivateIpAddress')
+        self.ip_address = data.get('PublicIpAddress')
+        self.requester_id = None
+        self._in_monitoring_element = False
+        self.persistent = False
+        self.root_device_name = data.get('RootDeviceName')
+        self.root_device_type = data.get('RootDeviceType')
+        self.block_device_mapping = {}
+        for mapping in data.get('BlockDeviceMappings', []):
+            ebs = mapping.get('Ebs', {})
+            self.block_device_mapping[mapping['DeviceName']] = Boto3BlockDevice(
+                ebs.get('VolumeId'), ebs.get('Status'), ebs.get('AttachTime'), ebs.get('DeleteOnTermination'))
+        self.state_reason = None
+        if data.get('StateReason'):
+            self.state_reason = {'code': data['StateReason'].get('Code'), 'message': data['StateReason'].get('Message')}
+        self.group_name = None
+        self.client_token = data.get('ClientToken')
+        self.eventsSet = None
+        self.platform = data.get('Platform')
+        self.interfaces = data.get('NetworkInterfaces', [])
+        self.hypervisor = data.get('Hypervisor')
+        self.virtualization_type = data.get('VirtualizationType')
+        self.architecture = data.get('Architecture')
+        self.instance_profile = None
+        if data.get('IamInstanceProfile'):
+            self.instance_profile = {'arn': data['IamInstanceProfile'].get('Arn'), 'id': data['IamInstanceProfile'].get('Id')}
+        if 'SourceDestCheck' in data:
+            self.sourceDestCheck = 'true' if data['SourceDestCheck'] else 'false'
+        self.ebs_optimized = data.get('EbsOptimized', False)
+        self.item = ''
+        self.reason = data.get('StateTransitionReason', '')
+        self._previous_state = None
+        self._state = Boto3InstanceState(data['State']['Name'], data['State']['Code'])
+        placement = data.get('Placement', {})
+        self._placement = Boto3Placement(placement.get('AvailabilityZone'), placement.get('GroupName'), placement.get('Tenancy'))
+
+    @property
+    def state(self):
+        return self._state.name
+
+    @property
+    def state_code(self):
+        return self._state.code
+
+    @property
+    def previous_state(self):
+        return None
+
+    @property
+    def previous_state_code(self):
+        return 0
+
+    @property
+    def placement(self):
+        return self._placement.zone
+
+    @property
+    def placement_group(self):
+        return self._placement.group_name
+
+    @property
+    def placement_tenancy(self):
+        return self._placement.tenancy
+
+
 class Ec2Inventory(object):
 
     def _empty_inventory(self):
@@ -266,7 +377,7 @@ class Ec2Inventory(object):
 
         # Cache
         if self.args.refresh_cache:
-            self.do_api_calls_update_cache()
+            self.do_api_calls_update_cache(refresh_regions=self.args.refresh_regions or True)
         elif not self.is_cache_valid():
             self.do_api_calls_update_cache()
 
@@ -291,10 +402,26 @@ class Ec2Inventory(object):
             current_time = time()
             if (mod_time + self.cache_max_age) > current_time:
                 if os.path.isfile(self.cache_path_index):
-                    return True
+                    # Every shard the inventory was built from must still be valid too
+                    return all(self.is_shard_valid(region, name) for region, name, fetch, add in self.get_api_jobs())
 
         return False
 
+    def get_shard_path(self, region, name):
+        ''' Path of the cache file holding the results of one API job '''
+
+        extension = 'bshard' if self.cache_format == 'binary' else 'shard'
+        return os.path.join(self.cache_dir, "%s.%s.%s.%s" % (self.cache_name, region or 'global', name, extension))
+
+    def is_shard_valid(self, region, name):
+        ''' Determines if the cached results of one API job are still valid '''
+
+        shard_path = self.get_shard_path(region, name)
+        if os.path.isfile(shard_path):
+            max_age = self.cache_max_age_by_service.get(name, self.cache_max_age)
+            return os.path.getmtime(shard_path) + max_age > time()
+        return False
+
     def read_settings(self):
         ''' Reads the settings from the ec2.ini file '''
 
@@ -389,6 +516,13 @@ class Ec2Inventory(object):
         # Return all EC2 instances?
         self.all_instances = config.getboolean('ec2', 'all_instances')
 
+        # Fetch EC2 instances with boto3 instead of boto?
+        self.boto3_instances = config.getboolean('ec2', 'boto3_instances')
+        if self.boto3_instances and not HAS_BOTO3:
+            self.fail_with_error("boto3_instances requires boto3 - please install boto3 and try again")
+        if self.boto3_instances and self.eucalyptus:
+            self.fail_with_error("boto3_instances is not supported with eucalyptus")
+
         # Instance states to be gathered in inventory. Default is 'running'.
         # Setting 'all_instances' to 'yes' overrides this option.
         ec2_valid_instance_states = [
@@ -455,11 +589,29 @@ class Ec2Inventory(object):
         cache_id = self.boto_profile or os.environ.get('AWS_ACCESS_KEY_ID', self.credentials.get('aws_access_key_id'))
         if cache_id:
             cache_name = '%s-%s' % (cache_name, cache_id)
-        cache_name += '-' + str(abs(hash(__file__)))[1:7]
+        # hash() of a string changes between Python 3 processes, so use a stable digest
+        cache_name += '-' + hashlib.md5(__file__.encode('utf-8')).hexdigest()[:6]
+        self.cache_dir = cache_dir
+        self.cache_name = cache_name
         self.cache_path_cache = os.path.join(cache_dir, "%s.cache" % cache_name)
         self.cache_path_index = os.path.join(cache_dir, "%s.index" % cache_name)
+        self.cache_path_hostvars = os.path.join(cache_dir, "%s.hostvars" % cache_name)
+
+        # 'binary' keeps shards and per host variables in marshal format
+        self.cache_format = config.get('ec2', 'cache_format')
+        if self.cache_format not in ('json', 'binary'):
+            self.fail_with_error("cache_format must be 'json' or 'binary', not '%s'" % self.cache_format)
         self.cache_max_age = config.getint('ec2', 'cache_max_age')
 
+        # Per service overrides of cache_max_age, e.g. cache_max_age_rds
+        self.cache_max_age_by_service = {}
+        for service in ('ec2', 'rds', 'rds_clusters', 'elasticache', 'elasticache_replication_groups', 'route53'):
+            if config.has_option('ec2', 'cache_max_age_' + service):
+                self.cache_max_age_by_service[service] = config.getint('ec2', 'cache_max_age_' + service)
+
+        # Number of region/service API jobs to run at the same time
+        self.concurrency = max(1, config.getint('ec2', 'concurrency'))
+
         self.expand_csv_tags = config.getboolean('ec2', 'expand_csv_tags')
 
         # Configure nested groups instead of flat namespace.
@@ -526,26 +678,152 @@ class Ec2Inventory(object):
                             help='Force refresh of cache by making API requests to EC2 (default: False - use cache files)')
         parser.add_argument('--profile', '--boto-profile', action='store', dest='boto_profile',
                             help='Use boto profile for connections to EC2')
+        parser.add_argument('--region', action='append', dest='refresh_regions',
+                            help='With --refresh-cache, only refresh the cached data of this region, can be repeated')
+        parser.add_argument('--verbose', '-v', action='store_true', default=False,
+                            help='Report how long each API job took on stderr (default: False)')
         self.args = parser.parse_args()
 
-    def do_api_calls_update_cache(self):
-        ''' Do API calls to each region, and save data in cache files '''
+    def do_api_calls_update_cache(self, refresh_regions=None):
+        ''' Do API calls to each region, and save data in cache files
+
+        The results of every region/service API job are cached in a shard of
+        their own. Only jobs whose shard has expired, or which belong to one of
+        refresh_regions (True meaning all of them), are run again. '''
+
+        jobs = self.get_api_jobs()
+        stale = []
+        shards = {}
+        for job in jobs:
+            region, name = job[:2]
+            if refresh_regions is True or (refresh_regions and region in refresh_regions):
+                stale.append(job)
+            elif not self.is_shard_valid(region, name):
+                stale.append(job)
+            else:
+                shards[(region, name)] = self.load_shard(region, name)
+                if shards[(region, name)] is None:
+                    stale.append(job)
+
+        results = dict(zip([job[:2] for job in stale], self.run_api_jobs(stale)))
+
+        # Results are merged in job order so the output does not depend on
+        # which job happened to finish first
+        inventory = self._empty_inventory()
+        index = {}
+        for region, name, fetch, add in jobs:
+            if (region, name) in results:
+                self.inventory = self._empty_inventory()
+                self.index = {}
+                add(results[(region, name)], region)
+                shard = {'inventory': self.inventory, 'index': self.index}
+                if name == 'route53':
+                    shard['route53_records'] = dict((k, sorted(v)) for k, v in self.route53_records.items())
+                if name == 'ec2':
+                    shard['aws_account_id'] = self.aws_account_id
+                if self.cache_format == 'binary':
+                    self.write_to_binary_cache(shard, self.get_shard_path(region, name))
+                else:
+                    self.write_to_cache(shard, self.get_shard_path(region, name), pretty=False)
+            else:
+                shard = shards[(region, name)]
+                if 'route53_records' in shard:
+                    self.route53_records = dict((k, set(v)) for k, v in shard['route53_records'].items())
+                if shard.get('aws_account_id') and not self.aws_account_id:
+                    self.aws_account_id = shard['aws_account_id']
+            self.merge_inventory(inventory, index, shard)
+
+        self.inventory = inventory
+        self.index = index
+        self.write_to_cache(self.inventory, self.cache_path_cache)
+        self.write_to_cache(self.index, self.cache_path_index)
+        if self.cache_format == 'binary':
+            self.write_hostvars_to_cache(self.inventory['_meta']['hostvars'])
+
+    def load_shard(self, region, name):
+        ''' Reads the cached results of one API job, None if unreadable '''
+
+        try:
+            if self.cache_format == 'binary':
+                return self.read_from_binary_cache(self.get_shard_path(region, name))
+            with open(self.get_shard_path(region, name), 'r') as f:
+                return json.load(f)
+        except (IOError, OSError, ValueError, EOFError, TypeError):
+            return None
+
+    def merge_inventory(self, inventory, index, shard):
+        ''' Merges the inventory and index built by a single API job in the
+        same way as if the job had added its hosts to them directly '''
+
+        index.update(shard['index'])
+        for key, value in shard['inventory'].items():
+            if key == '_meta':
+                inventory['_meta']['hostvars'].update(value['hostvars'])
+            elif key == 'db_clusters':
+                inventory[key] = value
+            elif isinstance(value, dict):
+                for host in value.get('hosts', []):
+                    self.push(inventory, key, host)
+                for child in value.get('children', []):
+                    self.push_group(inventory, key, child)
+            else:
+                for host in value:
+                    self.push(inventory, key, host)
+
+    def get_api_jobs(self):
+        ''' Returns a (region, name, fetch, add) tuple for each API job needed
+        to build the inventory. fetch(region) only talks to AWS and is safe to
+        run in a thread, add(result, region) updates the inventory. '''
 
+        jobs = []
         if self.route53_enabled:
-            self.get_route53_records()
+            jobs.append((None, 'route53', self.fetch_route53_records, self.set_route53_records))
 
         for region in self.regions:
-            self.get_instances_by_region(region)
+            jobs.append((region, 'ec2', self.fetch_instances_by_region, self.add_instances))
             if self.rds_enabled:
-                self.get_rds_instances_by_region(region)
+                jobs.append((region, 'rds', self.fetch_rds_instances_by_region, self.add_rds_instances))
             if self.elasticache_enabled:
-                self.get_elasticache_clusters_by_region(region)
-                self.get_elasticache_replication_groups_by_region(region)
+                jobs.append((region, 'elasticache', self.fetch_elasticache_clusters_by_region,
+                             self.add_elasticache_clusters))
+                jobs.append((region, 'elasticache_replication_groups',
+                             self.fetch_elasticache_replication_groups_by_region,
+                             self.add_elasticache_replication_groups))
             if self.include_rds_clusters:
-                self.include_rds_clusters_by_region(region)
+                jobs.append((region, 'rds_clusters', self.fetch_rds_clusters_by_region, self.set_rds_clusters))
+        return jobs
 
-        self.write_to_cache(self.inventory, self.cache_path_cache)
-        self.write_to_cache(self.index, self.cache_path_index)
+    def run_api_jobs(self, jobs):
+        ''' Runs the fetch half of each job, up to self.concurrency at a time,
+        and returns the results in job order '''
+
+        def run(job):
+            region, name, fetch, add = job
+            start = time()
+            try:
+                result = fetch(region)
+            except SystemExit as e:
+                # fail_with_error() has already reported the problem, exit
+                # from the main thread once the other jobs are done
+                return e
+            if self.args.verbose:
+                sys.stderr.write("%s %s: %.2fs\n" % (name, region or 'global', time() - start))
+            return result
+
+        if self.concurrency == 1 or len(jobs) < 2:
+            results = [run(job) for job in jobs]
+        else:
+            pool = ThreadPool(min(self.concurrency, len(jobs)))
+            try:
+                results = pool.map(run, jobs)
+            finally:
+                pool.close()
+                pool.join()
+
+        for result in results:
+            if isinstance(result, SystemExit):
+                raise result
+        return results
 
     def connect(self, region):
         ''' create connection to api server'''
@@ -586,9 +864,138 @@ class Ec2Inventory(object):
             self.fail_with_error("region name: %s likely not supported, or AWS is down.  connection to region failed." % region)
         return conn
 
+    def boto3_conn(self, service, region):
+        ''' create a boto3 client using the configured credentials, profile
+        and IAM role '''
+
+        params = {}
+        if self.credentials:
+            params['aws_access_key_id'] = self.credentials['aws_access_key_id']
+            params['aws_secret_access_key'] = self.credentials['aws_secret_access_key']
+            params['aws_session_token'] = self.credentials.get('security_token')
+        if self.boto_profile:
+            params['profile_name'] = self.boto_profile
+
+        if self.iam_role:
+            sts_client = ec2_utils.boto3_inventory_conn('client', 'sts', region, **params)
+            role = sts_client.assume_role(RoleArn=self.iam_role, RoleSessionName='ansible_dynamic_inventory')
+            params = {
+                'aws_access_key_id': role['Credentials']['AccessKeyId'],
+                'aws_secret_access_key': role['Credentials']['SecretAccessKey'],
+                'aws_session_token': role['Credentials']['SessionToken'],
+            }
+
+        return ec2_utils.boto3_inventory_conn('client', service, region, **params)
+
     def get_instances_by_region(self, region):
         ''' Makes an AWS EC2 API call to the list of instances in a particular
-        region '''
+        region and adds them to the inventory '''
+
+        self.add_instances(self.fetch_instances_by_region(region), region)
+
+    def get_boto3_instance_filters(self):
+        ''' Turns the instance filters into lists of describe_instances
+        filters, one list per API call '''
+
+        filter_sets = []
+        if self.ec2_instance_filters:
+            if self.stack_filters:
+                filters_dict = {}
+                for filters in self.ec2_instance_filters:
+                    filters_dict.update(filters)
+                filter_sets.append(filters_dict)
+            else:
+                # Filter sets on a single key are ORed together by the API
+                # when their values are sent in one filter
+                values_by_key = {}
+                for filters in self.ec2_instance_filters:
+                    if len(filters) == 1:
+                        key, value = list(filters.items())[0]
+                        if key not in values_by_key:
+                            values_by_key[key] = []
+                            filter_sets.append({key: values_by_key[key]})
+                        values_by_key[key].append(value)
+                    else:
+                        filter_sets.append(filters)
+        else:
+            filter_sets.append({})
+
+        boto3_filter_sets = []
+        for filters in filter_sets:
+            boto3_filters = []
+            for key, value in filters.items():
+                boto3_filters.append({'Name': key, 'Values': value if isinstance(value, list) else [value]})
+            # Instances in other states are dropped by add_instance anyway
+            if not self.all_instances and 'instance-state-name' not in filters:
+                boto3_filters.append({'Name': 'instance-state-name', 'Values': self.ec2_instance_states})
+            boto3_filter_sets.append(boto3_filters)
+        return boto3_filter_sets
+
+    def fetch_instances_with_boto3(self, region):
+        ''' Pages through describe_instances for a particular region, keeping
+        only the instances from each page, and returns them as reservations '''
+
+        # Tags of instances this recent may not have shown up in
+        # describe_instances yet, see fetch_instances_by_region
+        tag_settle_time = 300
+
+        try:
+            client = self.boto3_conn('ec2', region)
+            paginator = client.get_paginator('describe_instances')
+            reservations = []
+            seen = set()
+            recent_ids = []
+            for filters in self.get_boto3_instance_filters():
+                for page in paginator.paginate(Filters=filters, PaginationConfig={'PageSize': 1000}):
+                    owner_id = None
+                    instances = []
+                    for reservation in page['Reservations']:
+                        owner_id = owner_id or reservation.get('OwnerId')
+                        for data in reservation['Instances']:
+                            if data['InstanceId'] in seen:
+                                continue
+                            seen.add(data['InstanceId'])
+                            instance = Boto3Instance(data, region)
+                            if instance.state == 'pending' or \
+                               data.get('LaunchTime') and time() - calendar.timegm(data['LaunchTime'].utctimetuple()) < tag_settle_time:
+                                recent_ids.append(instance.id)
+                            instances.append(instance)
+                    if instances:
+                        reservations.append(Boto3Reservation(owner_id, instances))
+
+            # Only re-read the tags of instances that were just launched
+            if recent_ids:
+                tags_by_instance_id = defaultdict(dict)
+                tag_paginator = client.get_paginator('describe_tags')
+                max_filter_value = 199
+                for i in range(0, len(recent_ids), max_filter_value):
+                    filters = [{'Name': 'resource-type', 'Values': ['instance']},
+                               {'Name': 'resource-id', 'Values': recent_ids[i:i + max_filter_value]}]
+                    for page in tag_paginator.paginate(Filters=filters):
+                        for tag in page['Tags']:
+                            tags_by_instance_id[tag['ResourceId']][tag['Key']] = tag['Value']
+                recent_ids = set(recent_ids)
+                for reservation in reservations:
+                    for instance in reservation.instances:
+                        if instance.id in recent_ids:
+                            instance.tags = tags_by_instance_id[instance.id]
+
+            return reservations
+
+        except (botocore.exceptions.BotoCoreError, botocore.exceptions.ClientError) as e:
+            code = getattr(e, 'response', {}).get('Error', {}).get('Code')
+            if code == 'AuthFailure':
+                error = self.get_auth_error_message()
+            else:
+                error = "Error connecting to AWS backend.\n%s" % e
+            self.fail_with_error(error, 'getting EC2 instances')
+
+    def fetch_instances_by_region(self, region):
+        ''' Makes an AWS EC2 API call to the list of instances in a particular
+        region and returns the reservations '''
+
+        if self.boto3_instances:
+            return self.fetch_instances_with_boto3(region)
 
         try:
             conn = self.connect(region)
@@ -621,13 +1028,11 @@ class Ec2Inventory(object):
             for tag in tags:
                 tags_by_instance_id[tag.res_id][tag.name] = tag.value
 
-            if (not self.aws_account_id) and reservations:
-                self.aws_account_id = reservations[0].owner_id
-
             for reservation in reservations:
                 for instance in reservation.instances:
                     instance.tags = tags_by_instance_id[instance.id]
-                    self.add_instance(instance, region)
+
+            return reservations
 
         except boto.exception.BotoServerError as e:
             if e.error_code == 'AuthFailure':
@@ -637,6 +1042,16 @@ class Ec2Inventory(object):
                 error = "Error connecting to %s backend.\n%s" % (backend, e.message)
             self.fail_with_error(error, 'getting EC2 instances')
 
+    def add_instances(self, reservations, region):
+        ''' Adds the instances of the given reservations to the inventory '''
+
+        if (not self.aws_account_id) and reservations:
+            self.aws_account_id = reservations[0].owner_id
+
+        for reservation in reservations:
+            for instance in reservation.instances:
+                self.add_instance(instance, region)
+
     def tags_match_filters(self, tags):
         ''' return True if given tags match configured filters '''
         if not self.ec2_instance_filters:
@@ -666,7 +1081,13 @@ class Ec2Inventory(object):
 
     def get_rds_instances_by_region(self, region):
         ''' Makes an AWS API call to the list of RDS instances in a particular
-        region '''
+        region and adds them to the inventory '''
+
+        self.add_rds_instances(self.fetch_rds_instances_by_region(region), region)
+
+    def fetch_rds_instances_by_region(self, region):
+        ''' Makes an AWS API call to the list of RDS instances in a particular
+        region and returns the ones matching the filters '''
 
         if not HAS_BOTO3:
             self.fail_with_error("Working with RDS instances requires boto3 - please install boto3 and try again",
@@ -675,6 +1096,7 @@ class Ec2Inventory(object):
         client = ec2_utils.boto3_inventory_conn('client', 'rds', region, **self.credentials)
         db_instances = client.describe_db_instances()
 
+        matching = []
         try:
             conn = self.connect_to_aws(rds, region)
             if conn:
@@ -690,7 +1112,7 @@ class Ec2Inventory(object):
                         for tag in tags:
                             instance.tags[tag['Key']] = tag['Value']
                         if self.tags_match_filters(instance.tags):
-                            self.add_rds_instance(instance, region)
+                            matching.append(instance)
                     if not marker:
                         break
         except boto.exception.BotoServerError as e:
@@ -706,7 +1128,18 @@ class Ec2Inventory(object):
                 error = "Looks like AWS RDS is down:\n%s" % e.message
             self.fail_with_error(error, 'getting RDS instances')
 
+        return matching
+
+    def add_rds_instances(self, instances, region):
+        ''' Adds the given RDS instances to the inventory '''
+
+        for instance in instances:
+            self.add_rds_instance(instance, region)
+
     def include_rds_clusters_by_region(self, region):
+        self.set_rds_clusters(self.fetch_rds_clusters_by_region(region), region)
+
+    def fetch_rds_clusters_by_region(self, region):
         if not HAS_BOTO3:
             self.fail_with_error("Working with RDS clusters requires boto3 - please install boto3 and try again",
                                  "getting RDS clusters")
@@ -760,11 +1193,20 @@ class Ec2Inventory(object):
             elif matches_filter:
                 c_dict[c['DBClusterIdentifier']] = c
 
+        return c_dict
+
+    def set_rds_clusters(self, c_dict, region):
         self.inventory['db_clusters'] = c_dict
 
     def get_elasticache_clusters_by_region(self, region):
         ''' Makes an AWS API call to the list of ElastiCache clusters (with
-        nodes' info) in a particular region.'''
+        nodes' info) in a particular region and adds them to the inventory.'''
+
+        self.add_elasticache_clusters(self.fetch_elasticache_clusters_by_region(region), region)
+
+    def fetch_elasticache_clusters_by_region(self, region):
+        ''' Makes an AWS API call to the list of ElastiCache clusters (with
+        nodes' info) in a particular region and returns them.'''
 
         # ElastiCache boto module doesn't provide a get_all_instances method,
         # that's why we need to call describe directly (it would be called by
@@ -802,12 +1244,23 @@ class Ec2Inventory(object):
                 error = "Looks like AWS ElastiCache is down:\n%s" % e.message
             self.fail_with_error(error, 'getting ElastiCache clusters')
 
+        return clusters
+
+    def add_elasticache_clusters(self, clusters, region):
+        ''' Adds the given ElastiCache clusters to the inventory '''
+
         for cluster in clusters:
             self.add_elasticache_cluster(cluster, region)
 
     def get_elasticache_replication_groups_by_region(self, region):
         ''' Makes an AWS API call to the list of ElastiCache replication groups
-        in a particular region.'''
+        in a particular region and adds them to the inventory.'''
+
+        self.add_elasticache_replication_groups(self.fetch_elasticache_replication_groups_by_region(region), region)
+
+    def fetch_elasticache_replication_groups_by_region(self, region):
+        ''' Makes an AWS API call to the list of ElastiCache replication groups
+        in a particular region and returns them.'''
 
         # ElastiCache boto module doesn't provide a get_all_instances method,
         # that's why we need to call describe directly (it would be called by
@@ -836,6 +1289,11 @@ class Ec2Inventory(object):
             error = "ElastiCache [Replication Groups] query to AWS failed (unexpected format)."
             self.fail_with_error(error, 'getting ElastiCache clusters')
 
+        return replication_groups
+
+    def add_elasticache_replication_groups(self, replication_groups, region):
+        ''' Adds the given ElastiCache replication groups to the inventory '''
+
         for replication_group in replication_groups:
             self.add_elasticache_replication_group(replication_group, region)
 
@@ -865,6 +1323,13 @@ class Ec2Inventory(object):
         sys.exit(1)
 
     def get_instance(self, region, instance_id):
+        if self.boto3_instances:
+            client = self.boto3_conn('ec2', region)
+            for reservation in client.describe_instances(InstanceIds=[instance_id])['Reservations']:
+                for data in reservation['Instances']:
+                    return Boto3Instance(data, region)
+            return None
+
         conn = self.connect(region)
 
         reservations = conn.get_all_instances([instance_id])
@@ -1431,6 +1896,12 @@ class Ec2Inventory(object):
         ''' Get and store the map of resource records to domain names that
         point to them. '''
 
+        self.set_route53_records(self.fetch_route53_records())
+
+    def fetch_route53_records(self, region=None):
+        ''' Get the map of resource records to domain names that point to
+        them. Route53 is global so region is ignored. '''
+
         if self.boto_profile:
             r53_conn = route53.Route53Connection(profile_name=self.boto_profile)
         else:
@@ -1439,7 +1910,7 @@ class Ec2Inventory(object):
 
         route53_zones = [zone for zone in all_zones if zone.name[:-1] not in self.route53_excluded_zones]
 
-        self.route53_records = {}
+        route53_records = {}
 
         for zone in route53_zones:
             rrsets = r53_conn.get_all_rrsets(zone.id)
@@ -1451,8 +1922,13 @@ class Ec2Inventory(object):
                     record_name = record_name[:-1]
 
                 for resource in record_set.resource_records:
-                    self.route53_records.setdefault(resource, set())
-                    self.route53_records[resource].add(record_name)
+                    route53_records.setdefault(resource, set())
+                    route53_records[resource].add(record_name)
+
+        return route53_records
+
+    def set_route53_records(self, route53_records, region=None):
+        self.route53_records = route53_records
 
     def get_instance_route53_names(self, instance):
         ''' Check if an instance is referenced in the records we have from
@@ -1616,6 +2092,12 @@ class Ec2Inventory(object):
     def get_host_info(self):
         ''' Get variables about a specific host '''
 
+        if self.cache_format == 'binary' and not self.args.refresh_cache:
+            # Only the requested host's record is read, not the whole inventory
+            host_vars = self.get_host_vars_from_cache(self.args.host)
+            if host_vars is not None:
+                return self.json_format_dict(host_vars, True)
+
         if len(self.index) == 0:
             # Need to load index from cache
             self.load_index_from_cache()
@@ -1665,10 +2147,68 @@ class Ec2Inventory(object):
         with open(self.cache_path_index, 'rb') as f:
             self.index = json.load(f)
 
-    def write_to_cache(self, data, filename):
+    def get_host_vars_from_cache(self, hostname):
+        ''' Reads the variables of a single host from the binary hostvars
+        cache without loading the rest of the inventory, None if missing '''
+
+        try:
+            with open(self.cache_path_hostvars, 'rb') as f:
+                header_size = struct.unpack('!I', f.read(4))[0]
+                offsets = marshal.loads(f.read(header_size))
+                if hostname not in offsets:
+                    return None
+                offset, size = offsets[hostname]
+                f.seek(4 + header_size + offset)
+                return marshal.loads(f.read(size))
+        except (IOError, OSError, ValueError, EOFError, TypeError, struct.error):
+            return None
+
+    def write_hostvars_to_cache(self, hostvars):
+        ''' Writes each host's variables as a separate marshal record, preceded
+        by a table of hostname -> (offset, size), so that a single host can be
+        looked up without reading everything '''
+
+        records = []
+        offsets = {}
+        position = 0
+        for hostname, host_vars in hostvars.items():
+            record = self.binary_format(host_vars)
+            offsets[hostname] = (position, len(record))
+            records.append(record)
+            position += len(record)
+
+        header = marshal.dumps(offsets)
+        with open(self.cache_path_hostvars, 'wb') as f:
+            f.write(struct.pack('!I', len(header)))
+            f.write(header)
+            for record in records:
+                f.write(record)
+
+    def read_from_binary_cache(self, filename):
+        ''' Reads data written by write_to_binary_cache '''
+
+        with open(filename, 'rb') as f:
+            return marshal.loads(f.read())
+
+    def write_to_binary_cache(self, data, filename):
+        ''' Writes data in marshal format to a file '''
+
+        with open(filename, 'wb') as f:
+            f.write(self.binary_format(data))
+
+    def binary_format(self, data):
+        ''' Converts data to marshal format, going through JSON for types
+        marshal does not handle (such as dates) '''
+
+        try:
+            return marshal.dumps(data)
+        except ValueError:
+            return marshal.dumps(json.loads(self.json_format_dict(data)))
+
+    def write_to_cache(self, data, filename, pretty=True):
         ''' Writes data in JSON format to a file '''
 
-        json_data = self.json_format_dict(data, True)
+        json_data = self.json_format_dict(data, pretty)
         with open(filename, 'w') as f:
             f.write(json_data)
 
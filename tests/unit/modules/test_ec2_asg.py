@@ -0,0 +1,521 @@
+# Make coding more python3-ish
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import time
+from multiprocessing.pool import ThreadPool
+
+import pytest
+
+boto3 = pytest.importorskip("boto3")
+botocore = pytest.importorskip("botocore")
+
+from ansible_collections.community.aws.plugins.modules import ec2_asg
+from ansible_collections.community.aws.tests.unit.utils.clock import FakeClock
+
+
+class FailJson(Exception):
+    pass
+
+
+class FakeModule(object):
+    def __init__(self, clients, **params):
+        self.clients = clients
+        self.params = dict(wait_timeout=300)
+        self.params.update(params)
+
+    def botocore_at_least(self, version):
+        return True
+
+    def client(self, service, **kwargs):
+        return self.clients[service]
+
+    def debug(self, msg):
+        pass
+
+    def fail_json(self, **kwargs):
+        raise FailJson(kwargs['msg'])
+
+    def fail_json_aws(self, exception, **kwargs):
+        raise FailJson(kwargs)
+
+
+class FakeEvents(object):
+    def register(self, event_name, handler):
+        self.handler = handler
+
+
+class FakeClient(object):
+    ''' stands in for a boto3 client, call() counts as one request '''
+
+    def __init__(self):
+        self.meta = type('meta', (object,), dict(events=FakeEvents()))()
+
+    def call(self):
+        handler = getattr(self.meta.events, 'handler', None)
+        if handler:
+            handler()
+
+
+class FakeAutoScaling(FakeClient):
+    def __init__(self, groups):
+        super(FakeAutoScaling, self).__init__()
+        self.groups = groups
+
+        self.described = []
+
+    def get_paginator(self, operation):
+        return FakePaginator(self)
+
+
+class FakePaginator(object):
+    def __init__(self, client):
+        self.client = client
+        self.names = None
+
+    def paginate(self, AutoScalingGroupNames=None, **kwargs):
+        self.names = AutoScalingGroupNames
+        self.client.described.append(AutoScalingGroupNames)
+        return self
+
+    def build_full_result(self):
+        groups = self.client.groups
+        if self.names is not None:
+            groups = [g for g in groups if g['AutoScalingGroupName'] in self.names]
+        return dict(AutoScalingGroups=groups)
+
+
+class FakeELB(FakeClient):
+    ''' classic ELB where instances stay InService for `drain_polls` health checks after de-registration '''
+
+    def __init__(self, registered, drain_polls):
+        super(FakeELB, self).__init__()
+        self.registered = registered
+        self.drain_polls = drain_polls
+        self.draining = dict()
+        self.calls = []
+
+    def deregister_instances_from_load_balancer(self, LoadBalancerName, Instances):
+        self.calls.append(('deregister', LoadBalancerName, [i['InstanceId'] for i in Instances]))
+        for i in Instances:
+            self.draining[(LoadBalancerName, i['InstanceId'])] = self.drain_polls
+
+    def describe_instance_health(self, LoadBalancerName, Instances=None):
+        self.call()
+        self.calls.append(('health', LoadBalancerName))
+        states = []
+        for instance_id in self.registered[LoadBalancerName]:
+            state = 'InService'
+            remaining = self.draining.get((LoadBalancerName, instance_id))
+            if remaining is not None:
+                if remaining == 0:
+                    state = 'OutOfService'
+                self.draining[(LoadBalancerName, instance_id)] = max(remaining - 1, 0)
+            states.append(dict(InstanceId=instance_id, State=state, Description=''))
+        return dict(InstanceStates=states)
+
+
+@pytest.fixture(autouse=True)
+def resource_cache(monkeypatch):
+    cache = ec2_asg.ResourceCache()
+    monkeypatch.setattr(ec2_asg, 'resource_cache', cache)
+    return cache
+
+
+@pytest.fixture(autouse=True)
+def wait_log(monkeypatch):
+    monkeypatch.setattr(ec2_asg, 'api_calls', ec2_asg.ApiCallCounter())
+    monkeypatch.setattr(ec2_asg, 'wait_log', [])
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(ec2_asg.time, 'sleep', sleeps.append)
+    return sleeps
+
+
+def group(load_balancers, health_check_type='ELB'):
+    return [dict(AutoScalingGroupName='asg', LoadBalancerNames=load_balancers, HealthCheckType=health_check_type)]
+
+
+def test_elb_dreg_drains_a_batch_together(sleeps):
+    batch = ['i-%02d' % n for n in range(20)]
+    elb = FakeELB(dict(lb1=batch + ['i-keep'], lb2=batch), drain_polls=2)
+    ec2_asg.module = FakeModule(dict(elb=elb))
+
+    ec2_asg.elb_dreg(FakeAutoScaling(group(['lb1', 'lb2'])), 'asg', batch)
+
+    deregistrations = [c for c in elb.calls if c[0] == 'deregister']
+    assert deregistrations == [('deregister', 'lb1', batch), ('deregister', 'lb2', batch)]
+    # one health check per load balancer per poll, not per instance
+    assert len([c for c in elb.calls if c[0] == 'health']) == 6
+    assert len(sleeps) == 2
+    assert ec2_asg.wait_log[0]['name'] == 'elb_deregistration'
+    assert ec2_asg.wait_log[0]['polls'] == 3
+    assert ec2_asg.wait_log[0]['api_calls'] == 6
+
+
+def test_elb_dreg_times_out(sleeps):
+    elb = FakeELB(dict(lb1=['i-1']), drain_polls=1000)
+    ec2_asg.module = FakeModule(dict(elb=elb), wait_timeout=0)
+
+    with pytest.raises(FailJson):
+        ec2_asg.elb_dreg(FakeAutoScaling(group(['lb1'])), 'asg', ['i-1'])
+
+
+def test_elb_dreg_skips_ec2_health_checks(sleeps):
+    elb = FakeELB(dict(lb1=['i-1']), drain_polls=0)
+    ec2_asg.module = FakeModule(dict(elb=elb))
+
+    ec2_asg.elb_dreg(FakeAutoScaling(group(['lb1'], health_check_type='EC2')), 'asg', ['i-1'])
+    assert elb.calls == []
+
+
+class FakeELBv2(FakeClient):
+    def __init__(self, target_groups):
+        super(FakeELBv2, self).__init__()
+        self.target_groups = target_groups
+        self.calls = []
+
+    def get_paginator(self, operation):
+        return self
+
+    def paginate(self, TargetGroupArns):
+        self.calls.append(list(TargetGroupArns))
+        self.result = dict(TargetGroups=[dict(TargetGroupArn=arn, TargetGroupName=self.target_groups[arn])
+                                         for arn in TargetGroupArns])
+        return self
+
+    def build_full_result(self):
+        return self.result
+
+
+def test_target_group_names_are_cached(resource_cache):
+    elbv2 = FakeELBv2({'arn:tg/a': 'a', 'arn:tg/b': 'b', 'arn:tg/c': 'c'})
+    ec2_asg.module = FakeModule(dict(elbv2=elbv2))
+    as_group = dict(AutoScalingGroupName='asg', TargetGroupARNs=['arn:tg/a', 'arn:tg/b'])
+
+    for dummy in range(5):
+        assert ec2_asg.get_properties(as_group)['target_group_names'] == ['a', 'b']
+    assert elbv2.calls == [['arn:tg/a', 'arn:tg/b']]
+
+    # only target groups the module has not seen yet are described
+    as_group['TargetGroupARNs'].append('arn:tg/c')
+    assert ec2_asg.get_properties(as_group)['target_group_names'] == ['a', 'b', 'c']
+    assert elbv2.calls[1:] == [['arn:tg/c']]
+
+    resource_cache.invalidate('target_group', ['arn:tg/a'])
+    assert ec2_asg.get_properties(as_group)['target_group_names'] == ['a', 'b', 'c']
+    assert elbv2.calls[2:] == [['arn:tg/a']]
+
+
+class FakeActivities(object):
+    ''' scaling activities that change once the clock passes change_at '''
+
+    group_name = 'asg'
+
+    def __init__(self, clock, change_at, error=None):
+        self.clock = clock
+        self.change_at = change_at
+        self.error = error
+        self.looks = 0
+        self.seen = None
+
+    def changed(self):
+        self.looks += 1
+        if self.error:
+            raise self.error
+        state = self.clock.now >= self.change_at
+        changed = self.seen is not None and state != self.seen
+        self.seen = state
+        return changed
+
+
+def waiter(clock, **kwargs):
+    kwargs.setdefault('jitter', 0)
+    return ec2_asg.Waiter('test', kwargs.pop('timeout', 300), clock=clock.time, sleep=clock.sleep, **kwargs)
+
+
+def test_waiter_backs_off(sleeps):
+    clock = FakeClock()
+    ec2_asg.module = FakeModule(dict())
+    polls = []
+
+    def check():
+        polls.append(clock.now)
+        return len(polls) == 8 and 'done'
+
+    assert waiter(clock).wait(check, 'too long') == 'done'
+    assert clock.sleeps == [2, 3, 4.5, 6.75, 10.125, 15.188, 20]
+    assert ec2_asg.wait_log == [dict(name='test', seconds=61.6, polls=8, api_calls=0, throttled=0, activity_changes=0)]
+
+
+def test_waiter_jitter_stays_in_bounds(sleeps):
+    clock = FakeClock()
+    ec2_asg.module = FakeModule(dict())
+    polls = []
+    waiter(clock, jitter=0.2, backoff=1).wait(lambda: polls.append(1) or len(polls) > 50, 'too long')
+    assert all(1.6 <= s <= 2.4 for s in clock.sleeps)
+    assert len(set(clock.sleeps)) > 1
+
+
+def test_waiter_times_out(sleeps):
+    clock = FakeClock()
+    ec2_asg.module = FakeModule(dict())
+    with pytest.raises(FailJson) as e:
+        waiter(clock, timeout=30).wait(lambda: False, 'Waited too long for the test')
+    assert str(e.value).startswith('Waited too long for the test. ')
+    # the last sleep is cut short so the final poll happens at the deadline
+    assert clock.now == 1030
+    assert ec2_asg.wait_log[0]['seconds'] == 30
+
+
+def throttling_error():
+    return botocore.exceptions.ClientError(dict(Error=dict(Code='Throttling', Message='Rate exceeded')), 'DescribeAutoScalingGroups')
+
+
+def test_waiter_slows_down_when_throttled(sleeps):
+    clock = FakeClock()
+    ec2_asg.module = FakeModule(dict())
+    results = [throttling_error(), throttling_error(), None, 'done']
+
+    def check():
+        result = results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    assert waiter(clock).wait(check, 'too long') == 'done'
+    assert clock.sleeps == [4, 12, 18]
+    assert ec2_asg.wait_log[0]['throttled'] == 2
+
+
+def test_waiter_reraises_other_errors(sleeps):
+    clock = FakeClock()
+    ec2_asg.module = FakeModule(dict())
+
+    def check():
+        raise botocore.exceptions.ClientError(dict(Error=dict(Code='AccessDenied', Message='')), 'DescribeAutoScalingGroups')
+
+    with pytest.raises(botocore.exceptions.ClientError):
+        waiter(clock).wait(check, 'too long')
+
+
+def test_waiter_polls_when_activities_change(sleeps):
+    clock = FakeClock()
+    ec2_asg.module = FakeModule(dict())
+    activities = FakeActivities(clock, change_at=1021)
+    polls = []
+
+    def check():
+        polls.append(clock.now)
+        return clock.now >= 1021
+
+    assert waiter(clock, activities=activities, max_delay=60, backoff=4).wait(check, 'too long')
+    # polls at 0, 2 and 10 seconds, the next one would be 32 seconds later but the
+    # activities are looked at every 5 seconds and the change is noticed at 25
+    assert polls == [1000, 1002, 1010, 1025]
+    assert ec2_asg.wait_log[0]['activity_changes'] == 1
+
+
+def test_waiter_stops_watching_broken_activities(sleeps):
+    clock = FakeClock()
+    ec2_asg.module = FakeModule(dict())
+    error = botocore.exceptions.ClientError(dict(Error=dict(Code='AccessDenied', Message='')), 'DescribeScalingActivities')
+    activities = FakeActivities(clock, change_at=0, error=error)
+    polls = []
+
+    assert waiter(clock, activities=activities).wait(lambda: polls.append(1) or len(polls) == 3, 'too long')
+    assert activities.looks == 1
+    assert clock.sleeps == [2, 3]
+
+
+def test_scaling_activities_deltas():
+    activities = [dict(ActivityId='a', StatusCode='InProgress')]
+
+    class Connection(object):
+        def describe_scaling_activities(self, AutoScalingGroupName, MaxRecords):
+            return dict(Activities=list(activities))
+
+    watcher = ec2_asg.ScalingActivities(Connection(), 'asg')
+    assert not watcher.changed()
+    assert not watcher.changed()
+    activities[0] = dict(ActivityId='a', StatusCode='Successful')
+    assert watcher.changed()
+    assert not watcher.changed()
+    activities.insert(0, dict(ActivityId='b', StatusCode='PreInService'))
+    assert watcher.changed()
+
+
+def test_rate_limiter_spaces_calls():
+    clock = FakeClock()
+    limiter = ec2_asg.RateLimiter(4, clock=clock.time, sleep=clock.sleep)
+    for dummy in range(5):
+        limiter.wait()
+    assert clock.sleeps == [0.25, 0.25, 0.25, 0.25]
+
+    # the budget does not accumulate while idle
+    clock.now += 10
+    limiter.wait()
+    limiter.wait()
+    assert clock.sleeps[4:] == [0.25]
+
+
+def spec(name, **kwargs):
+    spec = dict((option, None) for option in (
+        'launch_config_name', 'launch_template', 'mixed_instances_policy', 'min_size', 'max_size', 'desired_capacity',
+        'max_instance_lifetime', 'availability_zones', 'vpc_zone_identifier', 'load_balancers', 'target_group_arns',
+        'health_check_period', 'health_check_type', 'default_cooldown', 'termination_policies', 'tags'))
+    spec.update(name=name, state='present')
+    spec.update(kwargs)
+    return spec
+
+
+def described_group(name, **kwargs):
+    group = dict(AutoScalingGroupName=name, MinSize=1, MaxSize=4, DesiredCapacity=2, HealthCheckType='EC2',
+                 HealthCheckGracePeriod=300, DefaultCooldown=300, TerminationPolicies=['Default'],
+                 LaunchConfigurationName='lc-1', LoadBalancerNames=[], TargetGroupARNs=[], Tags=[],
+                 AvailabilityZones=['us-east-1a'], VPCZoneIdentifier='subnet-1,subnet-2', Instances=[])
+    group.update(kwargs)
+    return group
+
+
+def planned(calls):
+    return [(call.func.__name__, call.args[1:], call.keywords) for call in calls]
+
+
+class TagConnection(object):
+    def delete_tags(self, Tags):
+        pass
+
+    def create_or_update_tags(self, Tags):
+        pass
+
+
+def test_plan_group_changes_only_touches_differences():
+    conn = TagConnection()
+    lc = dict(LaunchConfigurationName='lc-1')
+    action, changes, calls = ec2_asg.plan_group_changes(
+        conn, spec('asg', min_size=1, max_size=4, vpc_zone_identifier=['subnet-2', 'subnet-1']),
+        described_group('asg'), lc, None)
+    assert (action, changes, calls) == ('unchanged', [], [])
+
+    action, changes, calls = ec2_asg.plan_group_changes(
+        conn, spec('asg', max_size=8, target_group_arns=['arn:tg/a'], tags=[dict(env='prod')]),
+        described_group('asg', Tags=[dict(Key='old', Value='x', PropagateAtLaunch=True)]),
+        dict(LaunchConfigurationName='lc-2'), None)
+    assert action == 'updated'
+    assert changes == ['LaunchConfigurationName', 'MaxSize', 'TargetGroupARNs', 'Tags']
+    assert planned(calls) == [
+        ('update_asg', (), dict(AutoScalingGroupName='asg', MaxSize=8, LaunchConfigurationName='lc-2')),
+        ('attach_lb_target_groups', ('asg', ['arn:tg/a']), {}),
+        ('delete_asg_tags', ([dict(ResourceId='asg', ResourceType='auto-scaling-group', Key='old')],), {}),
+        ('create_or_update_asg_tags', ([dict(Key='env', Value='prod', PropagateAtLaunch=True,
+                                             ResourceType='auto-scaling-group', ResourceId='asg')],), {}),
+    ]
+
+
+def test_plan_group_changes_create_and_delete():
+    action, changes, calls = ec2_asg.plan_group_changes(
+        'conn', spec('new', min_size=1, max_size=3, launch_config_name='lc-1'), None,
+        dict(LaunchConfigurationName='lc-1'), lambda: ['us-east-1a', 'us-east-1b'])
+    assert action == 'created'
+    assert planned(calls) == [('create_asg', (), dict(
+        AutoScalingGroupName='new', MinSize=1, MaxSize=3, DesiredCapacity=1, Tags=[],
+        AvailabilityZones=['us-east-1a', 'us-east-1b'], LaunchConfigurationName='lc-1'))]
+
+    with pytest.raises(ValueError):
+        ec2_asg.plan_group_changes('conn', spec('new', min_size=1), None, dict(LaunchConfigurationName='lc-1'), None)
+
+    assert ec2_asg.plan_group_changes('conn', spec('gone', state='absent'), None, None, None)[0] == 'unchanged'
+    action, changes, calls = ec2_asg.plan_group_changes('conn', spec('old', state='absent'), described_group('old'), None, None)
+    assert action == 'deleted'
+    assert planned(calls) == [('delete_asg', ('old',), dict(force_delete=True))]
+
+
+class FakeBatchAutoScaling(FakeAutoScaling):
+    def __init__(self, groups, fail=()):
+        super(FakeBatchAutoScaling, self).__init__(groups)
+        self.fail = fail
+        self.updates = []
+
+    def update_auto_scaling_group(self, AutoScalingGroupName, **kwargs):
+        if AutoScalingGroupName in self.fail:
+            raise botocore.exceptions.ClientError(dict(Error=dict(Code='ValidationError', Message='nope')), 'UpdateAutoScalingGroup')
+        self.updates.append(AutoScalingGroupName)
+        for group in self.groups:
+            if group['AutoScalingGroupName'] == AutoScalingGroupName:
+                group.update(kwargs)
+
+
+def test_describe_named_autoscaling_groups_in_chunks():
+    autoscaling = FakeAutoScaling([described_group('asg-%d' % n) for n in range(130)])
+    names = ['asg-%d' % n for n in range(0, 130, 2)] + ['missing']
+
+    groups = ec2_asg.describe_named_autoscaling_groups(autoscaling, names)
+
+    assert [len(chunk) for chunk in autoscaling.described] == [50, 16]
+    assert [g['AutoScalingGroupName'] for g in groups] == names[:-1]
+
+
+def test_resource_cache_is_shared_between_threads(resource_cache):
+    def load(missing):
+        time.sleep(0.001)
+        return dict((key, key.upper()) for key in missing)
+
+    def work(n):
+        keys = ['k%d' % (i % 20) for i in range(n, n + 10)]
+        assert resource_cache.get_many('kind', keys, load) == [key.upper() for key in keys]
+        resource_cache.invalidate('kind', keys[:2])
+        return resource_cache.get('kind', keys[0], lambda: keys[0].upper())
+
+    pool = ThreadPool(8)
+    try:
+        assert pool.map(work, range(200)) == ['K%d' % (n % 20) for n in range(200)]
+    finally:
+        pool.close()
+        pool.join()
+    assert resource_cache.hits + resource_cache.misses == 200 * 11
+
+
+def test_batch_reconcile(sleeps):
+    groups = [described_group('asg-%d' % n) for n in range(30)]
+    autoscaling = FakeBatchAutoScaling(groups, fail=['asg-7'])
+    specs = [spec('asg-%d' % n, desired_capacity=3 if n % 2 else 2) for n in range(30)]
+    ec2_asg.module = FakeModule(dict(ec2=FakeClient()), groups=specs, batch_concurrency=4, batch_rate_limit=0)
+
+    changed, results = ec2_asg.batch_reconcile(autoscaling)
+
+    assert changed
+    assert [r['name'] for r in results] == ['asg-%d' % n for n in range(30)]
+    assert sorted(autoscaling.updates) == sorted('asg-%d' % n for n in range(1, 30, 2) if n != 7)
+    assert results[0]['action'] == 'unchanged'
+    assert not results[0]['changed']
+    assert results[1]['action'] == 'updated'
+    assert results[1]['changes'] == ['DesiredCapacity']
+    assert results[1]['properties']['desired_capacity'] == 3
+    assert results[7]['failed']
+    assert not results[7]['changed']
+    assert 'nope' in results[7]['msg']
+    # only the named groups are described, before and after applying the changes
+    assert autoscaling.described == [[s['name'] for s in specs]] * 2
+
+
+def test_batch_reconcile_describe_failure_after_changes(sleeps):
+    class BrokenAutoScaling(FakeBatchAutoScaling):
+        def get_paginator(self, operation):
+            if self.updates:
+                raise botocore.exceptions.ClientError(dict(Error=dict(Code='AccessDenied', Message='denied')),
+                                                      'DescribeAutoScalingGroups')
+            return super(BrokenAutoScaling, self).get_paginator(operation)
+
+    autoscaling = BrokenAutoScaling([described_group('asg')])
+    ec2_asg.module = FakeModule(dict(ec2=FakeClient()), groups=[spec('asg', desired_capacity=3)],
+                                batch_concurrency=1, batch_rate_limit=0)
+
+    with pytest.raises(FailJson) as exc:
+        ec2_asg.batch_reconcile(autoscaling)
+
+    assert exc.value.args[0]['changed']
+    assert exc.value.args[0]['group_results'][0]['action'] == 'updated'
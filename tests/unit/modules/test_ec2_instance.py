@@ -0,0 +1,283 @@
+# Make coding more python3-ish
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import threading
+
+import pytest
+
+boto3 = pytest.importorskip("boto3")
+botocore = pytest.importorskip("botocore")
+
+from ansible_collections.community.aws.plugins.modules import ec2_instance
+from ansible_collections.community.aws.tests.unit.utils.clock import FakeClock
+
+
+class FakeModule(object):
+    def __init__(self, check_mode=False, ec2=None, **params):
+        self.check_mode = check_mode
+        self.ec2 = ec2
+        self.warnings = []
+        self.params = dict(wait=True, wait_timeout=600, wait_quorum=100)
+        self.params.update(params)
+
+    def client(self, service):
+        return self.ec2
+
+    def debug(self, msg):
+        pass
+
+    def warn(self, msg):
+        self.warnings.append(msg)
+
+
+class FakeEC2(object):
+    ''' records calls, every instance has termination protection off '''
+
+    def __init__(self, instances=None):
+        self.instances = instances or []
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def record(self, operation, **kwargs):
+        with self.lock:
+            self.calls.append((operation, kwargs))
+
+    def count(self, operation):
+        return len([c for c in self.calls if c[0] == operation])
+
+    def describe_instance_attribute(self, Attribute, InstanceId):
+        self.record('describe_instance_attribute', Attribute=Attribute, InstanceId=InstanceId)
+        return dict(DisableApiTermination=dict(Value=False))
+
+    def modify_instance_attribute(self, **kwargs):
+        self.record('modify_instance_attribute', **kwargs)
+
+    def create_tags(self, Resources, Tags):
+        self.record('create_tags', Resources=Resources, Tags=Tags)
+
+    def delete_tags(self, Resources, Tags):
+        self.record('delete_tags', Resources=Resources, Tags=Tags)
+
+    def get_paginator(self, operation):
+        return self
+
+    def paginate(self, InstanceIds):
+        self.record('describe_instances', InstanceIds=InstanceIds)
+        self.page = [i for i in self.instances if i['InstanceId'] in InstanceIds]
+        return self
+
+    def search(self, expression):
+        return iter(self.page)
+
+
+def instance(n, **kwargs):
+    instance = dict(InstanceId='i-%04d' % n, EbsOptimized=False, SourceDestCheck=True,
+                    SecurityGroups=[dict(GroupId='sg-1')], Tags=[dict(Key='Name', Value='web')])
+    instance.update(kwargs)
+    return instance
+
+
+def test_reconcile_instances_groups_changes():
+    instances = [instance(n, EbsOptimized=(n % 2 == 0)) for n in range(50)]
+    ec2 = FakeEC2()
+    ec2_instance.module = FakeModule()
+    params = dict(ebs_optimized=True, termination_protection=True, network=dict(source_dest_check=False))
+
+    changes_by_type = ec2_instance.reconcile_instances(instances, params, ec2)
+
+    assert list(changes_by_type) == ['ebs_optimized', 'termination_protection', 'source_dest_check']
+    assert len(changes_by_type['ebs_optimized']) == 25
+    assert len(changes_by_type['termination_protection']) == 50
+    assert len(changes_by_type['source_dest_check']) == 50
+    # EbsOptimized comes from DescribeInstances, only termination protection is described per instance
+    assert ec2.count('describe_instance_attribute') == 50
+    assert set(c[1]['Attribute'] for c in ec2.calls if c[0] == 'describe_instance_attribute') == set(['disableApiTermination'])
+    assert ec2.count('modify_instance_attribute') == 125
+
+
+def test_reconcile_instances_check_mode():
+    ec2 = FakeEC2()
+    ec2_instance.module = FakeModule(check_mode=True)
+
+    changes_by_type = ec2_instance.reconcile_instances([instance(1)], dict(ebs_optimized=True), ec2)
+
+    assert changes_by_type == {'ebs_optimized': [dict(InstanceId='i-0001', EbsOptimized=dict(Value=True))]}
+    assert ec2.calls == []
+
+
+def test_prefetch_uses_primary_interface_groups():
+    enis = [dict(Attachment=dict(DeviceIndex=1), Groups=[dict(GroupId='sg-2')]),
+            dict(Attachment=dict(DeviceIndex=0), Groups=[dict(GroupId='sg-1')])]
+    instances = [instance(1, SecurityGroups=[dict(GroupId='sg-1'), dict(GroupId='sg-2')], NetworkInterfaces=enis), instance(2)]
+
+    attributes = ec2_instance.prefetch_instance_attributes(instances, dict(), FakeEC2())
+
+    assert attributes['i-0001']['groupSet'] == dict(Groups=[dict(GroupId='sg-1')])
+    assert attributes['i-0002']['groupSet'] == dict(Groups=[dict(GroupId='sg-1')])
+
+
+def test_manage_tags_bulk_batches_identical_changes():
+    matches = [instance(n) for n in range(1500)] + [instance(2000, Tags=[dict(Key='Name', Value='web'), dict(Key='env', Value='dev')])]
+    ec2 = FakeEC2()
+    ec2_instance.module = FakeModule()
+
+    assert ec2_instance.manage_tags_bulk(matches, dict(Name='web', env='prod'), False, ec2)
+
+    create_calls = [c[1] for c in ec2.calls if c[0] == 'create_tags']
+    assert [len(c['Resources']) for c in create_calls] == [1000, 501]
+    assert ec2.count('delete_tags') == 0
+
+    ec2.calls = []
+    assert not ec2_instance.manage_tags_bulk(matches[:1], dict(Name='web'), False, ec2)
+    assert ec2.calls == []
+
+
+def test_find_instances_batches_ids():
+    instances = [instance(n) for n in range(2500)]
+    ec2 = FakeEC2(instances)
+    ec2_instance.module = FakeModule()
+
+    found = ec2_instance.find_instances(ec2, ids=[i['InstanceId'] for i in instances])
+
+    assert len(found) == 2500
+    assert [len(c[1]['InstanceIds']) for c in ec2.calls] == [1000, 1000, 500]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(ec2_instance.time, 'time', clock.time)
+    monkeypatch.setattr(ec2_instance.time, 'sleep', clock.sleep)
+    monkeypatch.setattr(ec2_instance, 'wait_reports', [])
+    return clock
+
+
+class FakeStatusEC2(object):
+    ''' instance n is pending until the clock reaches its entry in ready_at, then running '''
+
+    def __init__(self, clock, ready_at, unknown=(), final_state='running', initial_state='pending'):
+        self.clock = clock
+        self.ready_at = ready_at
+        self.unknown = set(unknown)
+        self.final_state = final_state
+        self.initial_state = initial_state
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def get_paginator(self, operation):
+        return FakeStatusPaginator(self)
+
+    def describe(self, InstanceIds, IncludeAllInstances):
+        with self.lock:
+            self.calls.append(list(InstanceIds))
+        unknown = sorted(self.unknown & set(InstanceIds))
+        if unknown:
+            raise botocore.exceptions.ClientError(dict(Error=dict(
+                Code='InvalidInstanceID.NotFound',
+                Message="The instance IDs '{0}' do not exist".format(', '.join(unknown)))), 'DescribeInstanceStatus')
+        statuses = []
+        for instance_id in InstanceIds:
+            ready = self.clock.now >= self.ready_at[instance_id]
+            statuses.append(dict(
+                InstanceId=instance_id,
+                InstanceState=dict(Name=self.final_state if ready else self.initial_state),
+                InstanceStatus=dict(Status='ok' if ready else 'initializing'),
+            ))
+        return dict(InstanceStatuses=statuses)
+
+
+class FakeStatusPaginator(object):
+    def __init__(self, ec2):
+        self.ec2 = ec2
+
+    def paginate(self, **kwargs):
+        self.kwargs = kwargs
+        return self
+
+    def build_full_result(self):
+        return self.ec2.describe(**self.kwargs)
+
+
+def instance_ids(count):
+    return ['i-%04x' % n for n in range(count)]
+
+
+def test_await_instances_waits_for_all(clock):
+    ids = instance_ids(2500)
+    ready_at = dict((i, 1000 + (n % 10)) for n, i in enumerate(ids))
+    ec2 = FakeStatusEC2(clock, ready_at)
+    ec2_instance.module = FakeModule(ec2=ec2)
+
+    report = ec2_instance.await_instances(ids, state='RUNNING')
+
+    assert report['reached'] == 2500
+    assert set(report['instances'].values()) == set(['running'])
+    # three batches per poll, each of at most 1000 ids
+    assert sorted(len(c) for c in ec2.calls[:3]) == [500, 1000, 1000]
+    # every poll sees progress so the interval stays at the minimum
+    assert clock.sleeps == [2, 2, 2, 2, 2]
+    assert ec2_instance.wait_reports == [report]
+
+
+def test_await_instances_returns_at_quorum(clock):
+    ids = instance_ids(10)
+    ready_at = dict((i, 1000 if n < 9 else 5000) for n, i in enumerate(ids))
+    ec2 = FakeStatusEC2(clock, ready_at)
+    ec2_instance.module = FakeModule(ec2=ec2, wait_quorum=90)
+
+    report = ec2_instance.await_instances(ids, state='OK')
+
+    assert report['reached'] == 9
+    assert report['instances'][ids[9]] == 'pending/initializing'
+    assert clock.sleeps == []
+
+
+def test_await_instances_backs_off_and_times_out(clock):
+    ids = instance_ids(2)
+    ec2 = FakeStatusEC2(clock, dict((i, 10 ** 6) for i in ids))
+    ec2_instance.module = FakeModule(ec2=ec2, wait_timeout=60)
+
+    report = ec2_instance.await_instances(ids, state='RUNNING')
+
+    assert report['reached'] == 0
+    assert clock.sleeps[:6] == [3, 4.5, 6.75, 10.125, 15.188, ec2_instance.WAIT_MAX_DELAY]
+    assert clock.now == 1060
+    assert 'took too long' in ec2_instance.module.warnings[0]
+
+
+def test_await_instances_stops_when_quorum_is_out_of_reach(clock):
+    ids = instance_ids(4)
+    ec2 = FakeStatusEC2(clock, dict((i, 1000) for i in ids), final_state='terminated')
+    ec2_instance.module = FakeModule(ec2=ec2)
+
+    report = ec2_instance.await_instances(ids, state='RUNNING')
+
+    assert report['reached'] == 0
+    assert report['polls'] == 1
+    assert 'can still reach' in ec2_instance.module.warnings[0]
+
+
+def test_await_instances_terminates_stopping_instances(clock):
+    ids = instance_ids(3)
+    ec2 = FakeStatusEC2(clock, dict((i, 1010) for i in ids), final_state='terminated', initial_state='stopping')
+    ec2_instance.module = FakeModule(ec2=ec2)
+
+    report = ec2_instance.await_instances(ids, state='TERMINATED')
+
+    assert report['reached'] == 3
+    assert ec2_instance.module.warnings == []
+
+
+def test_await_instances_tolerates_unknown_ids(clock):
+    ids = instance_ids(3)
+    ec2 = FakeStatusEC2(clock, dict((i, 1000) for i in ids), unknown=[ids[1]])
+    ec2_instance.module = FakeModule(ec2=ec2)
+
+    report = ec2_instance.await_instances(ids, state='TERMINATED')
+    assert report['instances'][ids[1]] == 'missing'
+    assert report['reached'] == 1
+
+    ec2.unknown = set()
+    report = ec2_instance.await_instances(ids, state='EXISTS')
+    assert report['reached'] == 3
@@ -9,6 +9,7 @@ boto3 = pytest.importorskip("boto3")
 botocore = pytest.importorskip("botocore")
 
 from ansible_collections.community.aws.plugins.modules import kinesis_stream
+from ansible_collections.community.aws.tests.unit.utils.clock import FakeClock
 
 aws_region = 'us-west-2'
 
@@ -328,3 +329,187 @@ class AnsibleKinesisStreamFunctions(unittest.TestCase):
         self.assertTrue(success)
         self.assertTrue(changed)
         self.assertEqual(err_msg, 'Kinesis Stream test encryption stopped successfully.')
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(kinesis_stream.time, 'time', clock.time)
+    monkeypatch.setattr(kinesis_stream.time, 'sleep', clock.sleep)
+    return clock
+
+
+class FakeKinesis(object):
+    ''' every resharding call keeps the stream UPDATING for busy_for seconds '''
+
+    def __init__(self, clock, shards=(), busy_for=30, page_size=2):
+        self.clock = clock
+        self.shards = list(shards)
+        self.busy_for = busy_for
+        self.page_size = page_size
+        self.active_at = 0
+        self.calls = []
+
+    def reshard(self, operation, **kwargs):
+        if self.clock.now < self.active_at:
+            raise botocore.exceptions.ClientError(dict(Error=dict(
+                Code='ResourceInUseException', Message='Stream test is UPDATING')), operation)
+        self.calls.append((operation, kwargs))
+        self.active_at = self.clock.now + self.busy_for
+
+    def update_shard_count(self, **kwargs):
+        self.reshard('UpdateShardCount', **kwargs)
+
+    def split_shard(self, **kwargs):
+        self.reshard('SplitShard', **kwargs)
+
+    def merge_shards(self, **kwargs):
+        self.reshard('MergeShards', **kwargs)
+
+    def describe_stream_summary(self, StreamName):
+        status = 'ACTIVE' if self.clock.now >= self.active_at else 'UPDATING'
+        return dict(StreamDescriptionSummary=dict(StreamName=StreamName, StreamStatus=status))
+
+    def list_shards(self, StreamName=None, NextToken=None):
+        assert (StreamName is None) != (NextToken is None)
+        start = int(NextToken or 0)
+        response = dict(Shards=self.shards[start:start + self.page_size])
+        if start + self.page_size < len(self.shards):
+            response['NextToken'] = str(start + self.page_size)
+        return response
+
+
+def shard(n, start, end, closed=False):
+    sequence_numbers = dict(StartingSequenceNumber='1')
+    if closed:
+        sequence_numbers['EndingSequenceNumber'] = '2'
+    return dict(ShardId='shardId-%012d' % n, SequenceNumberRange=sequence_numbers,
+                HashKeyRange=dict(StartingHashKey=str(start), EndingHashKey=str(end)))
+
+
+def test_plan_shard_count_steps():
+    assert kinesis_stream.plan_shard_count_steps(64, 512) == [128, 256, 512]
+    assert kinesis_stream.plan_shard_count_steps(64, 100) == [100]
+    assert kinesis_stream.plan_shard_count_steps(100, 30) == [50, 30]
+    assert kinesis_stream.plan_shard_count_steps(5, 1) == [3, 2, 1]
+    assert kinesis_stream.plan_shard_count_steps(4, 4) == []
+
+
+def test_reshard_steps_wait_between_calls(clock):
+    client = FakeKinesis(clock, busy_for=30)
+
+    success, err_msg, steps = kinesis_stream.reshard(client, 'test', 64, 512, wait=False, wait_timeout=600)
+
+    assert success, err_msg
+    assert [c[1]['TargetShardCount'] for c in client.calls] == [128, 256, 512]
+    assert [(s['current_count'], s['target_count']) for s in steps] == [(64, 128), (128, 256), (256, 512)]
+    # ACTIVE after sleeping 2 + 3 + 4.5 + 6.75 + 10.125 + 15.1875 seconds
+    assert steps[0]['polls'] == 7
+    assert steps[0]['seconds'] == 41.562
+    assert clock.sleeps[:7] == [2, 3, 4.5, 6.75, 10.125, 15.188, 2]
+    # the last step is not waited for
+    assert steps[2] == dict(operation='update_shard_count', current_count=256, target_count=512, seconds=0, polls=0)
+
+
+def test_reshard_refuses_plans_over_the_daily_limit(clock):
+    client = FakeKinesis(clock)
+
+    success, err_msg, steps = kinesis_stream.reshard(client, 'test', 1, 2048)
+
+    assert not success
+    assert steps == []
+    assert 'takes 11 UpdateShardCount calls' in err_msg
+    assert client.calls == []
+
+
+def test_reshard_times_out(clock):
+    client = FakeKinesis(clock, busy_for=3600)
+
+    success, err_msg, steps = kinesis_stream.reshard(client, 'test', 10, 40, wait_timeout=100)
+
+    assert not success
+    assert 'Wait time out reached' in err_msg
+    assert clock.now == 1100
+    assert len(client.calls) == 1
+
+
+def test_plan_shard_operations():
+    shards = [shard(0, 0, 99, closed=True), shard(1, 0, 49), shard(2, 50, 99), shard(3, 100, 199)]
+
+    success, err_msg, planned = kinesis_stream.plan_shard_operations(shards, [
+        dict(action='split', shard_id='shardId-000000000000'),
+        dict(action='split', shard_id='shardId-000000000003'),
+        dict(action='merge', shard_id='shardId-000000000002', adjacent_shard_id='shardId-000000000001'),
+    ])
+    assert success, err_msg
+    assert planned == [
+        dict(action='split', shard_id='shardId-000000000003', new_starting_hash_key='150'),
+        dict(action='merge', shard_id='shardId-000000000002', adjacent_shard_id='shardId-000000000001'),
+    ]
+
+    for operations, error in [
+        ([dict(action='split', shard_id='shardId-000000000009')], 'does not exist'),
+        ([dict(action='split', shard_id='shardId-000000000003', new_starting_hash_key='100')], 'outside of its hash key range'),
+        ([dict(action='merge', shard_id='shardId-000000000001', adjacent_shard_id='shardId-000000000003')], 'not adjacent'),
+        ([dict(action='merge', shard_id='shardId-000000000001', adjacent_shard_id='shardId-000000000000')], 'not open'),
+        ([dict(action='split', shard_id='shardId-000000000003'),
+          dict(action='merge', shard_id='shardId-000000000003', adjacent_shard_id='shardId-000000000002')], 'earlier operation'),
+    ]:
+        success, err_msg, planned = kinesis_stream.plan_shard_operations(shards, operations)
+        assert not success
+        assert error in err_msg
+
+
+def test_apply_shard_operations_one_at_a_time(clock):
+    client = FakeKinesis(clock, shards=[shard(0, 0, 99), shard(1, 100, 199), shard(2, 200, 299)], busy_for=5)
+
+    success, changed, err_msg, steps = kinesis_stream.apply_shard_operations(client, 'test', [
+        dict(action='split', shard_id='shardId-000000000002', new_starting_hash_key='290'),
+        dict(action='merge', shard_id='shardId-000000000000', adjacent_shard_id='shardId-000000000001'),
+    ])
+
+    assert success, err_msg
+    assert changed
+    assert client.calls == [
+        ('SplitShard', dict(StreamName='test', ShardToSplit='shardId-000000000002', NewStartingHashKey='290')),
+        ('MergeShards', dict(StreamName='test', ShardToMerge='shardId-000000000000', AdjacentShardToMerge='shardId-000000000001')),
+    ]
+    assert [(s['operation'], s['polls'], s['seconds']) for s in steps] == [
+        ('split_shard', 3, 5), ('merge_shards', 3, 5),
+    ]
+
+
+def test_update_check_mode_counts_split_shards(clock):
+    client = FakeKinesis(clock, shards=[shard(n, n * 100, n * 100 + 99) for n in range(5)])
+    current_stream = dict(OpenShardsCount=5, StreamStatus='ACTIVE')
+    steps = []
+
+    success, changed, err_msg = kinesis_stream.update(
+        client, current_stream, 'test', number_of_shards=6, check_mode=True,
+        shard_operations=[dict(action='split', shard_id='shardId-000000000004')], resharding_steps=steps
+    )
+
+    assert success, err_msg
+    assert changed
+    # the split already takes the stream to 6 open shards
+    assert [s['operation'] for s in steps] == ['split_shard']
+    assert client.calls == []
+
+
+def test_update_fails_when_the_stream_can_not_be_described(clock):
+    class MissingStream(FakeKinesis):
+        def describe_stream(self, **kwargs):
+            raise botocore.exceptions.ClientError(dict(Error=dict(
+                Code='ResourceNotFoundException', Message='Stream test not found')), 'DescribeStream')
+
+    client = MissingStream(clock, shards=[shard(0, 0, 99)], busy_for=5)
+
+    success, changed, err_msg = kinesis_stream.update(
+        client, dict(OpenShardsCount=1, StreamStatus='ACTIVE'), 'test', number_of_shards=2,
+        shard_operations=[dict(action='split', shard_id='shardId-000000000000')]
+    )
+
+    assert not success
+    assert changed
+    assert 'not found' in err_msg
+    assert [c[0] for c in client.calls] == ['SplitShard']
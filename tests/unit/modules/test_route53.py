@@ -0,0 +1,309 @@
+# Make coding more python3-ish
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import pytest
+
+boto3 = pytest.importorskip("boto3")
+
+from ansible.module_utils import basic
+
+from ansible_collections.community.aws.plugins.modules import route53
+from ansible_collections.community.aws.tests.unit.modules.utils import AnsibleExitJson, AnsibleFailJson, exit_json, fail_json, set_module_args
+
+
+class ModuleExit(Exception):
+    pass
+
+
+class ModuleFail(Exception):
+    pass
+
+
+class FakeModule(object):
+    def __init__(self, client=None, check_mode=False, **params):
+        self.route53 = client
+        self.check_mode = check_mode
+        self.params = dict(state='present', zone='foo.com', hosted_zone_id=None, vpc_id=None, private_zone=False,
+                           ttl=3600, alias_evaluate_target_health=False, overwrite=None, retry_interval=500,
+                           wait=False, wait_timeout=300, records=[])
+        self.params.update(params)
+
+    def client(self, service):
+        return self.route53
+
+    def exit_json(self, **kwargs):
+        self.result = kwargs
+        raise ModuleExit()
+
+    def fail_json(self, **kwargs):
+        self.result = kwargs
+        raise ModuleFail(kwargs['msg'])
+
+    def fail_json_aws(self, exception, msg=None, **kwargs):
+        self.fail_json(msg=msg, **kwargs)
+
+    def warn(self, msg):
+        pass
+
+
+class FakeRoute53(object):
+    def __init__(self, record_sets=None, insync_after=1):
+        self.record_sets = record_sets or []
+        self.insync_after = insync_after
+        self.calls = []
+        self.batches = []
+        self.polls = {}
+
+    def list_hosted_zones_by_name(self, **kwargs):
+        self.calls.append('list_hosted_zones_by_name')
+        return dict(IsTruncated=False, HostedZones=[
+            dict(Id='/hostedzone/ZPRIVATE', Name='foo.com.', Config=dict(PrivateZone=True)),
+            dict(Id='/hostedzone/ZPUBLIC', Name='foo.com.', Config=dict(PrivateZone=False)),
+            dict(Id='/hostedzone/ZOTHER', Name='foo.net.', Config=dict(PrivateZone=False)),
+        ])
+
+    def get_hosted_zone(self, Id):
+        self.calls.append('get_hosted_zone')
+        return dict(HostedZone=dict(Id=Id), DelegationSet=dict(NameServers=['ns-1.awsdns-00.com.']))
+
+    def list_resource_record_sets(self, HostedZoneId, StartRecordName, StartRecordType, MaxItems):
+        self.calls.append('list_resource_record_sets')
+        following = sorted((r for r in self.record_sets if (r['Name'], r['Type']) >= (StartRecordName, StartRecordType)),
+                           key=lambda r: (r['Name'], r['Type']))
+        return dict(ResourceRecordSets=following[:1])
+
+    def get_paginator(self, operation):
+        self.calls.append('paginate_' + operation)
+        return self
+
+    def paginate(self, HostedZoneId):
+        return self
+
+    def build_full_result(self):
+        return dict(ResourceRecordSets=self.record_sets)
+
+    def change_resource_record_sets(self, HostedZoneId, ChangeBatch):
+        self.calls.append('change_resource_record_sets')
+        self.batches.append(ChangeBatch['Changes'])
+        for change in ChangeBatch['Changes']:
+            if change['Action'] != 'CREATE':
+                self.record_sets = [r for r in self.record_sets if r['Name'] != change['ResourceRecordSet']['Name']]
+            if change['Action'] != 'DELETE':
+                self.record_sets.append(change['ResourceRecordSet'])
+        return dict(ChangeInfo=dict(Id='/change/C%d' % len(self.batches), Status='PENDING'))
+
+    def get_change(self, Id):
+        self.calls.append('get_change')
+        self.polls[Id] = self.polls.get(Id, 0) + 1
+        return dict(ChangeInfo=dict(Id=Id, Status='INSYNC' if self.polls[Id] > self.insync_after else 'PENDING'))
+
+
+def a_record(name, *values, **kwargs):
+    rrset = dict(Name=name, Type='A', TTL=3600, ResourceRecords=[dict(Value=v) for v in values])
+    rrset.update(kwargs)
+    return rrset
+
+
+def spec(record, value=None, **kwargs):
+    spec = dict(record=record, type='A', state=None, value=value, ttl=None, alias=None, alias_hosted_zone_id=None,
+                alias_evaluate_target_health=None, identifier=None, weight=None, region=None, health_check=None,
+                failover=None)
+    spec.update(kwargs)
+    return spec
+
+
+def test_batch_changes_respects_record_and_character_limits():
+    creates = [dict(Action='CREATE', ResourceRecordSet=a_record('h%d.foo.com.' % n, '10.0.0.1', '10.0.0.2'))
+               for n in range(1200)]
+    assert [len(b) for b in route53.batch_changes(creates)] == [500, 500, 200]
+
+    # UPSERTs count twice
+    upserts = [dict(c, Action='UPSERT') for c in creates[:600]]
+    assert [len(b) for b in route53.batch_changes(upserts)] == [250, 250, 100]
+
+    long_values = [dict(Action='CREATE', ResourceRecordSet=a_record('t%d.foo.com.' % n, 'x' * 255)) for n in range(300)]
+    assert [len(b) for b in route53.batch_changes(long_values)] == [125, 125, 50]
+
+    # alias records have no values but still count as one record
+    aliases = [dict(Action='DELETE', ResourceRecordSet=dict(Name='a%d.foo.com.' % n, Type='A', AliasTarget={}))
+               for n in range(1001)]
+    assert [len(b) for b in route53.batch_changes(aliases)] == [1000, 1]
+
+
+def test_plan_record_changes():
+    current = [
+        a_record('same.foo.com.', '10.0.0.1'),
+        a_record('changed.foo.com.', '10.0.0.1'),
+        a_record('gone.foo.com.', '10.0.0.9'),
+        a_record('\\052.foo.com.', '10.0.0.1'),
+        dict(Name='caa.foo.com.', Type='CAA', TTL=3600, ResourceRecords=[dict(Value='0 issue "b"'), dict(Value='0 issue "a"')]),
+    ]
+    wanted = [
+        ('present', a_record('Same.foo.com', '10.0.0.1')),
+        ('present', a_record('changed.foo.com', '10.0.0.2')),
+        ('absent', a_record('gone.foo.com', '10.0.0.1')),
+        ('absent', a_record('never.foo.com')),
+        ('present', a_record('new.foo.com', '10.0.0.3')),
+        ('present', a_record('*.foo.com', '10.0.0.1')),
+        ('present', dict(Name='caa.foo.com', Type='CAA', TTL=3600, ResourceRecords=[dict(Value='0 issue "a"'), dict(Value='0 issue "b"')])),
+    ]
+
+    changes, results, conflicts = route53.plan_record_changes(current, wanted, True)
+
+    assert [r['action'] for r in results] == ['unchanged', 'update', 'delete', 'unchanged', 'create', 'unchanged', 'unchanged']
+    assert [c['Action'] for c in changes] == ['DELETE', 'CREATE', 'UPSERT']
+    # deletions send the current record set, whatever values were asked for
+    assert changes[0]['ResourceRecordSet'] == current[2]
+    assert conflicts == []
+
+    changes, results, conflicts = route53.plan_record_changes(current, wanted, False)
+    assert conflicts == ['changed.foo.com. A']
+
+
+def test_record_spec_error():
+    assert route53.record_spec_error(spec('www.foo.com', ['10.0.0.1'], state='present')) is None
+    assert route53.record_spec_error(spec('www.foo.com', state='absent')) is None
+    assert 'required' in route53.record_spec_error(spec('www.foo.com', state='present'))
+    assert 'single dns name' in route53.record_spec_error(
+        spec('www.foo.com', ['a', 'b'], state='present', alias=True, alias_hosted_zone_id='Z1'))
+    assert 'identifier' in route53.record_spec_error(spec('www.foo.com', ['10.0.0.1'], state='present', weight=10))
+
+
+def test_manage_records_commits_one_batch_per_limit_and_waits_per_batch(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(route53.time, 'sleep', sleeps.append)
+    current = [a_record('h%d.foo.com.' % n, '10.0.0.1') for n in range(0, 2000, 2)]
+    client = FakeRoute53(current)
+    records = [spec('h%d.foo.com' % n, ['10.0.0.1']) for n in range(2000)]
+    records.append(spec('h0.foo.com', state='absent', type='CNAME'))
+    module = FakeModule(client, records=records, wait=True)
+
+    with pytest.raises(ModuleExit):
+        route53.manage_records(module, client, route53.Route53Cache(module), 'foo.com.')
+
+    assert module.result['changed']
+    assert [r['action'] for r in module.result['record_changes'][:4]] == ['unchanged', 'create', 'unchanged', 'create']
+    # one zone lookup and one listing, 1000 creates in a single batch, one wait per batch
+    assert client.calls.count('list_hosted_zones_by_name') == 1
+    assert client.calls.count('paginate_list_resource_record_sets') == 1
+    assert [len(b) for b in client.batches] == [1000]
+    assert module.result['change_batches'] == [dict(id='C1', changes=1000, status='INSYNC')]
+    assert client.calls.count('get_change') == 2
+    assert sleeps == [2]
+    assert len(module.result['diff']['after']) == 1000
+
+
+def test_manage_records_check_mode_and_conflicts():
+    client = FakeRoute53([a_record('www.foo.com.', '10.0.0.1')])
+    module = FakeModule(client, check_mode=True, records=[spec('www.foo.com', ['10.0.0.2']), spec('new.foo.com', ['10.0.0.3'])])
+
+    with pytest.raises(ModuleFail) as e:
+        route53.manage_records(module, client, route53.Route53Cache(module), 'foo.com.')
+    assert "Set 'overwrite'" in str(e.value)
+
+    module.params['overwrite'] = True
+    with pytest.raises(ModuleExit):
+        route53.manage_records(module, client, route53.Route53Cache(module), 'foo.com.')
+    assert module.result['change_batches'] == [dict(id=None, changes=2, status=None)]
+    assert 'change_resource_record_sets' not in client.calls
+
+    module.params['records'] = [spec('www.foo.com', ['10.0.0.1']), spec('WWW.foo.com.', ['10.0.0.1'])]
+    with pytest.raises(ModuleFail) as e:
+        route53.manage_records(module, client, route53.Route53Cache(module), 'foo.com.')
+    assert 'more than once' in str(e.value)
+
+
+def test_find_zone_id():
+    client = FakeRoute53()
+    assert route53.find_zone_id(client, 'foo.com.', False, None) == 'ZPUBLIC'
+    assert route53.find_zone_id(client, 'foo.com.', True, None) == 'ZPRIVATE'
+    assert route53.find_zone_id(client, 'bar.com.', False, None) is None
+
+
+def test_cache_shares_zone_ids_and_record_sets_between_tasks(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(route53.time, 'time', lambda: now[0])
+    module = FakeModule()
+    loads = []
+
+    def cache():
+        return route53.Route53Cache(module, str(tmp_path), 'ns', zone_ttl=3600, record_ttl=300)
+
+    def zone_loader():
+        loads.append('zone')
+        return 'Z1'
+
+    def record_loader():
+        loads.append('records')
+        return [a_record('www.foo.com.', '10.0.0.1')]
+
+    assert cache().zone_id('foo.com.|False|None', zone_loader) == 'Z1'
+    assert cache().zone_id('foo.com.|False|None', zone_loader) == 'Z1'
+    assert cache().record_sets('Z1', record_loader) == cache().record_sets('Z1', record_loader)
+    assert loads == ['zone', 'records']
+
+    cache().apply('Z1', [dict(Action='CREATE', ResourceRecordSet=a_record('new.foo.com.', '10.0.0.2')),
+                         dict(Action='DELETE', ResourceRecordSet=a_record('WWW.foo.com', '10.0.0.1'))])
+    assert cache().record_sets('Z1', record_loader) == [a_record('new.foo.com.', '10.0.0.2')]
+
+    now[0] += 301
+    assert cache().record_sets('Z1', record_loader)[0]['Name'] == 'www.foo.com.'
+    cache().invalidate('Z1')
+    cache().record_sets('Z1', record_loader)
+    assert loads == ['zone', 'records', 'records', 'records']
+
+    # without a directory nothing is cached
+    route53.Route53Cache(module).zone_id('foo.com.|False|None', zone_loader)
+    assert loads[-1] == 'zone'
+
+
+def run_main(monkeypatch, client, **args):
+    monkeypatch.setattr(basic.AnsibleModule, 'exit_json', exit_json)
+    monkeypatch.setattr(basic.AnsibleModule, 'fail_json', fail_json)
+    monkeypatch.setattr(route53.AnsibleAWSModule, 'client', lambda self, service: client)
+    client.calls = []
+    module_args = dict(access_key='ACCESS_KEY', secret_key='SECRET_KEY', zone='foo.com', type='A')
+    module_args.update(args)
+    set_module_args(module_args)
+    with pytest.raises((AnsibleExitJson, AnsibleFailJson)) as e:
+        route53.main()
+    return e.value.args[0]
+
+
+def test_main_looks_single_records_up(monkeypatch):
+    client = FakeRoute53([a_record('www.foo.com.', '10.0.0.1')])
+
+    result = run_main(monkeypatch, client, state='get', record='www.foo.com')
+    assert result['set']['values'] == ['10.0.0.1']
+    assert result['nameservers'] == ['ns-1.awsdns-00.com.']
+
+    result = run_main(monkeypatch, client, state='present', record='www.foo.com', value=['10.0.0.1'])
+    assert not result['changed']
+    assert client.calls == ['list_hosted_zones_by_name', 'list_resource_record_sets']
+
+    result = run_main(monkeypatch, client, state='present', record='www.foo.com', value=['10.0.0.2'])
+    assert "Set 'overwrite'" in result['msg']
+
+    result = run_main(monkeypatch, client, state='absent', record='www.foo.com', value=['10.0.0.1'])
+    assert result['changed']
+    assert result['change_id'] == 'C1'
+    assert client.batches[-1] == [dict(Action='DELETE', ResourceRecordSet=a_record('www.foo.com.', '10.0.0.1'))]
+
+
+def test_main_shares_the_zone_index_through_the_cache(monkeypatch, tmp_path):
+    client = FakeRoute53([a_record('h%d.foo.com.' % n, '10.0.0.1') for n in range(100)])
+    cache_dir = str(tmp_path)
+
+    result = run_main(monkeypatch, client, state='present', record='h1.foo.com', value=['10.0.0.1'], cache_dir=cache_dir)
+    assert not result['changed']
+    assert client.calls == ['list_hosted_zones_by_name', 'paginate_list_resource_record_sets']
+
+    result = run_main(monkeypatch, client, state='present', record='new.foo.com', value=['10.0.0.2'], cache_dir=cache_dir)
+    assert result['changed']
+    assert client.calls == ['change_resource_record_sets']
+
+    # the change made by the previous task is in the cached index
+    result = run_main(monkeypatch, client, state='present', record='new.foo.com', value=['10.0.0.2'], cache_dir=cache_dir)
+    assert not result['changed']
+    assert client.calls == []
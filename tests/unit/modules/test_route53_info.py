@@ -0,0 +1,148 @@
+# Make coding more python3-ish
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import csv
+import json
+
+import pytest
+
+boto3 = pytest.importorskip("boto3")
+botocore = pytest.importorskip("botocore")
+
+from ansible_collections.community.aws.plugins.modules import route53_info
+
+
+class ModuleFail(Exception):
+    pass
+
+
+class FakeModule(object):
+    def __init__(self, **params):
+        self.params = dict(hosted_zone_id='Z1', max_items=None, start_record_name=None, type=None,
+                           start_record_identifier=None, export_path=None, export_format='jsonl',
+                           export_append=False, record_types=None, record_name_prefix=None)
+        self.params.update(params)
+
+    def fail_json(self, **kwargs):
+        self.result = kwargs
+        raise ModuleFail(kwargs['msg'])
+
+    def fail_json_aws(self, exception, msg=None, **kwargs):
+        self.fail_json(msg=msg, **kwargs)
+
+
+class FakeRoute53(object):
+    ''' lists record sets page_size at a time, failing on page fail_on if set '''
+
+    def __init__(self, record_sets, page_size=3, fail_on=None):
+        self.record_sets = record_sets
+        self.page_size = page_size
+        self.fail_on = fail_on
+        self.requests = []
+
+    def get_paginator(self, operation):
+        return self
+
+    def paginate(self, HostedZoneId, StartRecordName=None, StartRecordType=None, StartRecordIdentifier=None):
+        start = 0
+        if StartRecordName:
+            start = [(r['Name'], r['Type']) for r in self.record_sets].index((StartRecordName, StartRecordType))
+        while True:
+            self.requests.append(start)
+            if len(self.requests) == self.fail_on:
+                raise botocore.exceptions.ClientError(dict(Error=dict(Code='Throttling', Message='Rate exceeded')),
+                                                      'ListResourceRecordSets')
+            page = dict(ResourceRecordSets=self.record_sets[start:start + self.page_size], IsTruncated=False)
+            start += self.page_size
+            if start < len(self.record_sets):
+                following = self.record_sets[start]
+                page.update(IsTruncated=True, NextRecordName=following['Name'], NextRecordType=following['Type'])
+            yield page
+            if not page['IsTruncated']:
+                return
+
+
+def zone(count):
+    record_sets = []
+    for n in range(count):
+        record_sets.append(dict(Name='h%02d.example.com.' % n, Type='A', TTL=300, ResourceRecords=[dict(Value='10.0.0.%d' % n)]))
+        record_sets.append(dict(Name='h%02d.example.com.' % n, Type='TXT', TTL=300, ResourceRecords=[dict(Value='"a"'), dict(Value='"b"')]))
+    return record_sets
+
+
+def read_jsonl(path):
+    with open(str(path)) as f:
+        return [json.loads(line) for line in f]
+
+
+def export(client, **params):
+    module = FakeModule(**params)
+    request = dict(HostedZoneId='Z1')
+    if params.get('start_record_name'):
+        request.update(StartRecordName=params['start_record_name'], StartRecordType=params['type'])
+    return module, route53_info.export_record_sets(client, module, request)
+
+
+def test_export_streams_pages_with_filters(tmp_path):
+    path = tmp_path / 'zone.jsonl'
+    client = FakeRoute53(zone(10))
+
+    module, report = export(client, export_path=str(path), record_types=['A'], record_name_prefix='H0')
+
+    assert [r['Name'] for r in read_jsonl(path)] == ['h0%d.example.com.' % n for n in range(10)]
+    assert report['records'] == 10
+    assert report['scanned'] == 20
+    assert report['pages'] == 7
+    assert report['next_record'] is None
+
+
+def test_export_resumes_where_it_stopped(tmp_path):
+    path = tmp_path / 'zone.jsonl'
+    record_sets = zone(5)
+    client = FakeRoute53(record_sets)
+
+    module, report = export(client, export_path=str(path), max_items='4')
+    assert report['records'] == 4
+    assert report['next_record'] == dict(name='h02.example.com.', type='A', identifier=None)
+
+    # stopping at the end of a page resumes from the token of the page
+    module, report = export(client, export_path=str(path), max_items='3', export_append=True,
+                            start_record_name=report['next_record']['name'], type=report['next_record']['type'])
+    assert report['next_record'] == dict(name='h03.example.com.', type='TXT', identifier=None)
+
+    module, report = export(client, export_path=str(path), export_append=True,
+                            start_record_name=report['next_record']['name'], type=report['next_record']['type'])
+    assert report['next_record'] is None
+    assert read_jsonl(path) == record_sets
+
+
+def test_export_reports_the_position_of_a_failed_page(tmp_path):
+    path = tmp_path / 'zone.jsonl'
+    client = FakeRoute53(zone(5), fail_on=3)
+
+    module = FakeModule(export_path=str(path))
+    with pytest.raises(ModuleFail):
+        route53_info.export_record_sets(client, module, dict(HostedZoneId='Z1'))
+
+    assert client.requests == [0, 3, 6]
+    assert read_jsonl(path) == zone(5)[:6]
+    assert module.result['export']['next_record'] == dict(name='h03.example.com.', type='A', identifier=None)
+
+
+def test_export_csv(tmp_path):
+    path = tmp_path / 'zone.csv'
+    client = FakeRoute53(zone(2) + [dict(Name='www.example.com.', Type='A', SetIdentifier='blue', Weight=10,
+                                         AliasTarget=dict(DNSName='lb.example.com.', HostedZoneId='Z2', EvaluateTargetHealth=False))])
+
+    export(client, export_path=str(path), export_format='csv', record_types=['TXT', 'A'], max_items='2')
+    export(client, export_path=str(path), export_format='csv', export_append=True,
+           start_record_name='h01.example.com.', type='A')
+
+    with open(str(path)) as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 5
+    assert rows[1]['values'] == '"a"\n"b"'
+    assert rows[4]['alias_dns_name'] == 'lb.example.com.'
+    assert rows[4]['weight'] == '10'
+    assert rows[4]['ttl'] == ''
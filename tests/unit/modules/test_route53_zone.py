@@ -571,6 +571,9 @@ class TestRoute53Module(ModuleTestCase):
         'Config': {'Comment': 'foobar', 'PrivateZone': True},
     }])
     def test_delete_by_zone_id(self, find_zones_mock, time_mock, client_mock, hosted_zone_id, call_params, check_mode):
+        client_mock.return_value.delete_hosted_zone.return_value = {
+            'ChangeInfo': {'Id': '/change/C1', 'Status': 'PENDING'},
+        }
         with self.assertRaises(AnsibleExitJson) as exec_info:
             set_module_args({
                 'secret_key': 'SECRET_KEY',
@@ -587,6 +590,7 @@ class TestRoute53Module(ModuleTestCase):
             client_mock.return_value.delete_hosted_zone.assert_not_called()
         else:
             client_mock.return_value.delete_hosted_zone.assert_has_calls(call_params)
+            self.assertEqual(exec_info.exception.args[0]['change_ids'], ['C1'] * len(call_params))
 
         self.assertEqual(exec_info.exception.args[0]['changed'], True)
 
@@ -0,0 +1,355 @@
+# Make coding more python3-ish
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import datetime
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import time
+from multiprocessing.pool import ThreadPool
+
+import pytest
+
+boto3 = pytest.importorskip("boto3")
+botocore = pytest.importorskip("botocore")
+tz = pytest.importorskip("dateutil.tz")
+
+from botocore.awsrequest import AWSResponse
+
+from ansible_collections.community.aws.plugins.modules import s3_sync
+from ansible_collections.community.aws.tests.unit.modules.utils import AnsibleExitJson, exit_json, set_module_args
+
+BUCKET = 'sync-test'
+FILES = {
+    'unchanged.txt': b'same',
+    'changed.txt': b'new content',
+    'new.txt': b'brand new',
+    'sub/deep.txt': b'x' * 100,
+}
+
+
+@pytest.fixture
+def file_root():
+    root = tempfile.mkdtemp()
+    for name, content in FILES.items():
+        path = os.path.join(root, name)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'wb') as f:
+            f.write(content)
+    yield root
+    shutil.rmtree(root)
+
+
+class FakeS3(object):
+    '''In-memory bucket answering the S3 calls made by the client, in whatever order they arrive'''
+
+    def __init__(self, client):
+        self.objects = {}
+        self.forbidden = set()
+        self.page_size = 1000
+        self.calls = []
+        self.lock = threading.Lock()
+        client.meta.events.register('before-parameter-build.s3.*', self.save_params)
+        client.meta.events.register('before-call.s3.*', self.handle)
+
+    def add(self, key, body, last_modified=None):
+        self.objects[key] = dict(ETag='"%s"' % hashlib.md5(body).hexdigest(), ContentLength=len(body), Body=body,
+                                 LastModified=last_modified or datetime.datetime(2000, 1, 1, tzinfo=tz.tzutc()))
+
+    def save_params(self, params, context, **kwargs):
+        context['api_params'] = params
+
+    def handle(self, model, context, **kwargs):
+        params = context['api_params']
+        with self.lock:
+            self.calls.append((model.name, params.get('Key')))
+            if params.get('Key') in self.forbidden:
+                raise botocore.exceptions.ClientError({'Error': {'Code': '403'}, 'ResponseMetadata': {'HTTPStatusCode': 403}}, model.name)
+            if model.name == 'HeadObject':
+                if params['Key'] not in self.objects:
+                    raise botocore.exceptions.ClientError({'Error': {'Code': '404'}, 'ResponseMetadata': {'HTTPStatusCode': 404}}, 'HeadObject')
+                response = dict((k, v) for k, v in self.objects[params['Key']].items() if k != 'Body')
+            elif model.name == 'ListObjectsV2':
+                keys = sorted(k for k in self.objects if k.startswith(params.get('Prefix', '')))
+                start = int(params.get('ContinuationToken', 0))
+                page = keys[start:start + self.page_size]
+                response = {'Contents': [{'Key': k, 'ETag': self.objects[k]['ETag'], 'Size': self.objects[k]['ContentLength'],
+                                          'LastModified': self.objects[k]['LastModified']} for k in page]}
+                if start + self.page_size < len(keys):
+                    response.update(IsTruncated=True, NextContinuationToken=str(start + self.page_size))
+            elif model.name == 'DeleteObjects':
+                for obj in params['Delete']['Objects']:
+                    self.objects.pop(obj['Key'], None)
+                response = {}
+            elif model.name == 'PutObject':
+                self.add(params['Key'], params['Body'].read())
+                self.objects[params['Key']]['ContentType'] = params.get('ContentType')
+                response = {}
+            else:
+                raise NotImplementedError(model.name)
+        return AWSResponse(None, 200, {}, None), response
+
+    def count(self, operation):
+        return len([call for call in self.calls if call[0] == operation])
+
+
+@pytest.fixture
+def s3():
+    client = boto3.client('s3', region_name='us-east-1', aws_access_key_id='a', aws_secret_access_key='b')
+    return client, FakeS3(client)
+
+
+def params(**kwargs):
+    ret = dict(bucket=BUCKET, key_prefix='', file_change_strategy='checksum', permission=None, cache_control='',
+               hash_concurrency=4, head_concurrency=1, upload_concurrency=4, file_root=None, include='*', exclude='.*', mime_map=None)
+    ret.update(kwargs)
+    return ret
+
+
+def local_files(root):
+    files = s3_sync.gather_files(root, include='*', exclude='.*')
+    files.sort(key=lambda f: f['chopped_path'])
+    return s3_sync.calculate_s3_path(s3_sync.determine_mimetypes(files, None))
+
+
+def test_sync_files_pipeline(file_root, s3):
+    client, bucket = s3
+    files = local_files(file_root)
+    bucket.add('unchanged.txt', b'same')
+    bucket.add('changed.txt', b'old content')
+
+    local_etag, actionable, uploads, throughput = s3_sync.sync_files(client, files, params())
+
+    assert [e['s3_path'] for e in local_etag] == ['changed.txt', 'new.txt', 'sub/deep.txt', 'unchanged.txt']
+    assert all('s3_head' not in e for e in local_etag)
+    assert [e['s3_path'] for e in actionable] == ['changed.txt', 'new.txt', 'sub/deep.txt']
+    assert uploads == actionable
+    assert bucket.count('HeadObject') == 4
+    assert bucket.count('PutObject') == 3
+    assert bucket.objects['changed.txt']['Body'] == b'new content'
+    assert bucket.objects['sub/deep.txt']['ContentType'] == 'text/plain'
+    # only files that exist remotely with the same size are hashed
+    assert [e['s3_path'] for e in local_etag if 'local_etag' in e] == ['changed.txt', 'unchanged.txt']
+    assert throughput['hash']['files'] == 2
+    assert throughput['hash']['bytes'] == len(b'new content') + len(b'same')
+    assert throughput['compare']['requests'] == 4
+    assert throughput['upload']['files'] == 3
+    assert throughput['upload']['bytes'] == len(b'new content') + len(b'brand new') + 100
+
+
+def test_sync_files_checksum_size_mismatch(file_root, s3):
+    client, bucket = s3
+    files = local_files(file_root)
+    bucket.add('changed.txt', b'content of another length')
+
+    local_etag, actionable, uploads, throughput = s3_sync.sync_files(client, files, params())
+
+    # a remote object of a different size has changed without hashing the local file
+    assert 'local_etag' not in [e for e in local_etag if e['s3_path'] == 'changed.txt'][0]
+    assert 'changed.txt' in [e['s3_path'] for e in uploads]
+    assert bucket.objects['changed.txt']['Body'] == b'new content'
+
+
+def test_sync_files_date_size(file_root, s3):
+    client, bucket = s3
+    files = local_files(file_root)
+    for name, content in FILES.items():
+        bucket.add(name, b'?' * len(content), datetime.datetime(2100, 1, 1, tzinfo=tz.tzutc()))
+
+    local_etag, actionable, uploads, throughput = s3_sync.sync_files(client, files, params(file_change_strategy='date_size'))
+
+    assert len(local_etag) == 4
+    assert actionable == uploads == []
+    assert bucket.count('PutObject') == 0
+    assert 'upload' not in throughput
+
+
+def test_sync_files_force_skips_head(file_root, s3):
+    client, bucket = s3
+    files = local_files(file_root)
+    bucket.add('unchanged.txt', b'same')
+
+    local_etag, actionable, uploads, throughput = s3_sync.sync_files(client, files, params(file_change_strategy='force'))
+
+    assert len(uploads) == 4
+    assert bucket.count('HeadObject') == 0
+    assert bucket.count('PutObject') == 4
+    assert throughput['compare']['requests'] == 0
+
+
+def test_sync_files_error_stops_pipeline(file_root, s3):
+    client, bucket = s3
+    files = local_files(file_root)
+    bucket.forbidden.add('new.txt')
+
+    with pytest.raises(Exception, match='403'):
+        s3_sync.sync_files(client, files, params())
+    assert 'new.txt' not in bucket.objects
+
+
+def test_sync_files_with_listing(file_root, s3):
+    client, bucket = s3
+    files = local_files(file_root)
+    bucket.page_size = 1
+    bucket.add('unchanged.txt', b'same')
+    bucket.add('changed.txt', b'old content')
+    bucket.add('stale.txt', b'gone locally')
+
+    stats = s3_sync.SyncStats()
+    remote_index = s3_sync.list_s3_objects(client, BUCKET, '', stats)
+    local_etag, actionable, uploads, throughput = s3_sync.sync_files(client, files, params(), remote_index, stats)
+
+    assert sorted(remote_index) == ['changed.txt', 'stale.txt', 'unchanged.txt']
+    assert [e['s3_path'] for e in actionable] == ['changed.txt', 'new.txt', 'sub/deep.txt']
+    assert bucket.count('HeadObject') == 0
+    assert throughput['list']['files'] == 3
+    assert throughput['list']['requests'] == 3
+    assert throughput['compare']['requests'] == 0
+
+    removed = s3_sync.remove_files(client, local_etag, params(), remote_index)
+    assert removed == ['stale.txt']
+    assert bucket.count('ListObjectsV2') == 3
+    assert sorted(bucket.objects) == ['changed.txt', 'new.txt', 'sub/deep.txt', 'unchanged.txt']
+
+
+def test_sync_files_incomplete_listing_falls_back_to_head(file_root, s3):
+    client, bucket = s3
+    files = local_files(file_root)
+    bucket.add('unchanged.txt', b'same')
+    bucket.add('changed.txt', b'old content')
+
+    remote_index = s3_sync.list_s3_objects(client, BUCKET, '')
+    remote_index['unchanged.txt']['ETag'] = None
+    local_etag, actionable, uploads, throughput = s3_sync.sync_files(client, files, params(), remote_index)
+
+    assert [e['s3_path'] for e in actionable] == ['changed.txt', 'new.txt', 'sub/deep.txt']
+    assert bucket.calls.count(('HeadObject', 'unchanged.txt')) == 1
+    assert bucket.count('HeadObject') == 1
+    assert throughput['compare']['requests'] == 1
+
+
+def test_sync_files_etag_cache(file_root, s3):
+    client, bucket = s3
+    files = local_files(file_root)
+    for name, content in FILES.items():
+        bucket.add(name, content)
+    cache_path = os.path.join(file_root, '.cache', 'etags.json')
+
+    cache = s3_sync.EtagCache(cache_path, 100)
+    local_etag, actionable, uploads, throughput = s3_sync.sync_files(client, files, params(), s3_sync.list_s3_objects(client, BUCKET, ''),
+                                                                     etag_cache=cache)
+    cache.save()
+    assert actionable == []
+    assert throughput['hash']['files'] == 4
+    assert 'cache_hits' not in throughput['hash']
+
+    cache = s3_sync.EtagCache(cache_path, 100)
+    local_etag, actionable, uploads, throughput = s3_sync.sync_files(client, files, params(), s3_sync.list_s3_objects(client, BUCKET, ''),
+                                                                     etag_cache=cache)
+    assert actionable == []
+    assert throughput['hash']['files'] == 0
+    assert throughput['hash']['cache_hits'] == 4
+
+    # a rewritten file is hashed again even if its size is unchanged
+    with open(os.path.join(file_root, 'new.txt'), 'wb') as f:
+        f.write(b'brand old')
+    os.utime(os.path.join(file_root, 'new.txt'), (0, 0))
+    local_etag, actionable, uploads, throughput = s3_sync.sync_files(client, files, params(), s3_sync.list_s3_objects(client, BUCKET, ''),
+                                                                     etag_cache=cache)
+    assert [e['s3_path'] for e in uploads] == ['new.txt']
+    assert throughput['hash']['files'] == 1
+    assert throughput['hash']['cache_hits'] == 3
+
+
+def test_etag_cache_bounds(file_root):
+    cache_path = os.path.join(file_root, 'etags.json')
+    cache = s3_sync.EtagCache(cache_path, 2)
+    for name in sorted(FILES):
+        cache.etag(os.path.join(file_root, name))
+    cache.entries[os.path.abspath(os.path.join(file_root, 'changed.txt'))][4] = 0
+    cache.save()
+
+    cache = s3_sync.EtagCache(cache_path, 2)
+    assert len(cache.entries) == 2
+    assert os.path.abspath(os.path.join(file_root, 'changed.txt')) not in cache.entries
+
+    # etags calculated with another part size are not reused
+    assert s3_sync.EtagCache(cache_path, 2, chunk_size=1024).entries == {}
+
+
+@pytest.mark.parametrize('size', [0, 1, 1023, 1024, 1025, 4096, 5000])
+def test_calculate_multipart_etag_mmap(size):
+    with tempfile.NamedTemporaryFile() as f:
+        f.write(os.urandom(size))
+        f.flush()
+        expected = s3_sync.calculate_multipart_etag(f.name, chunk_size=1024)
+        assert s3_sync.calculate_multipart_etag_mmap(f.name, chunk_size=1024) == expected
+        pool = ThreadPool(3)
+        try:
+            assert s3_sync.calculate_multipart_etag_mmap(f.name, chunk_size=1024, pool=pool) == expected
+        finally:
+            pool.terminate()
+
+
+def test_sync_files_streaming(file_root, s3):
+    client, bucket = s3
+    bucket.add('unchanged.txt', b'same')
+    bucket.add('stale.txt', b'gone locally')
+    sync_params = params(file_root=file_root, key_prefix='site', upload_concurrency=1)
+    remote_index = s3_sync.list_s3_objects(client, BUCKET, 'site')
+
+    collector = s3_sync.SyncCollector(keep_files=False, limit=1)
+    local_etag, actionable, uploads, throughput = s3_sync.sync_files(client, s3_sync.stream_files(sync_params), sync_params,
+                                                                     remote_index, collector=collector)
+
+    assert local_etag == []
+    assert len(actionable) == len(uploads) == 1
+    assert collector.counts == {'files': 4, 'bytes': sum(len(c) for c in FILES.values()),
+                                'actionable': 4, 'actionable_bytes': sum(len(c) for c in FILES.values()),
+                                'uploaded': 4, 'uploaded_bytes': sum(len(c) for c in FILES.values())}
+    assert collector.s3_paths == set(['site/changed.txt', 'site/new.txt', 'site/sub/deep.txt', 'site/unchanged.txt'])
+    assert bucket.objects['site/sub/deep.txt']['ContentType'] == 'text/plain'
+
+
+def test_main_streaming_delete_only_is_changed(file_root, s3, monkeypatch):
+    client, bucket = s3
+    for name, content in FILES.items():
+        bucket.add(name, content)
+    bucket.add('stale.txt', b'gone locally')
+    monkeypatch.setattr(s3_sync.AnsibleAWSModule, 'client', lambda self, service: client)
+    monkeypatch.setattr(s3_sync.AnsibleAWSModule, 'exit_json', exit_json)
+    set_module_args(dict(bucket=BUCKET, file_root=file_root, file_change_strategy='checksum',
+                         delete=True, streaming=True, result_limit=0))
+
+    with pytest.raises(AnsibleExitJson) as exc:
+        s3_sync.main()
+
+    result = exc.value.args[0]
+    assert result['changed'] is True
+    assert result['removed'] == []
+    assert result['summary']['uploaded'] == 0
+    assert result['summary']['removed'] == 1
+    assert 'stale.txt' not in bucket.objects
+
+
+def test_bounded_feed():
+    feed = s3_sync.BoundedFeed(range(10), 2)
+    pool = ThreadPool(2)
+    try:
+        results = pool.imap(lambda x: x, feed)
+        assert next(results) == 0
+        # only two items are handed out until one is marked done
+        time.sleep(0.1)
+        assert feed.slots.acquire(False) is False
+        feed.done()
+        assert next(results) == 1
+        assert next(results) == 2
+        # closing wakes the feed up and ends the input early
+        feed.close()
+        assert list(results) == []
+    finally:
+        pool.terminate()
@@ -2,9 +2,15 @@
 from __future__ import (absolute_import, division, print_function)
 __metaclass__ = type
 
-from io import StringIO
+from io import BytesIO, StringIO
+import base64
+import os
 import pytest
+import shutil
 import sys
+import tarfile
+import tempfile
+import threading
 from ansible import constants as C
 from ansible.compat.selectors import SelectorKey, EVENT_READ
 from ansible_collections.community.aws.tests.unit.compat import unittest
@@ -14,8 +20,24 @@ from ansible.module_utils.six.moves import shlex_quote
 from ansible.module_utils._text import to_bytes
 from ansible.playbook.play_context import PlayContext
 from ansible_collections.community.aws.plugins.connection import aws_ssm
+from ansible_collections.community.aws.plugins.module_utils import ssm_session_broker
 from ansible.plugins.loader import connection_loader
 
+# Stands in for session-manager-plugin: a shell whose output arrives with CRLF
+# line endings, as it does from the remote pty
+FAKE_SSM_PLUGIN = '''
+import os
+import subprocess
+import sys
+shell = subprocess.Popen(['/bin/sh'], stdin=sys.stdin, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+while True:
+    data = os.read(shell.stdout.fileno(), 65536)
+    if not data:
+        break
+    os.write(1, data.replace(b'\\n', b'\\r\\n'))
+sys.exit(shell.wait())
+'''
+
 
 @pytest.mark.skipif(sys.version_info < (2, 7), reason="requires Python 2.7 or higher")
 class TestConnectionBaseClass(unittest.TestCase):
@@ -84,6 +106,150 @@ class TestConnectionBaseClass(unittest.TestCase):
         stdout = 'b'
         return (returncode, stdout, conn._flush_stderr)
 
+    @patch('random.choice')
+    def test_plugins_connection_aws_ssm_exec_command_large_output(self, r_choice):
+        pc = PlayContext()
+        new_stdin = StringIO()
+        conn = connection_loader.get('community.aws.aws_ssm', pc, new_stdin)
+        r_choice.side_effect = ['a', 'a', 'a', 'a', 'a', 'b', 'b', 'b', 'b', 'b']
+        conn.MARK_LENGTH = 5
+        conn._connected = True
+        conn.get_option = MagicMock()
+        conn.get_option.side_effect = lambda option: {'retries': 0, 'ssm_timeout': 60}[option]
+        session = MagicMock()
+        session.poll.return_value = None
+        stderr_r, stderr_w = os.pipe()
+        session.stderr = os.fdopen(stderr_r, 'rb', 0)
+
+        # Feed a fake pty a few MB of output between the markers
+        master, slave = os.openpty()
+        conn._attach_session(session, master)
+        # The remote side emits CRLF, which the local pty turns into CRCRLF
+        line = b'{"key": "%s"}\r\n' % (b'x' * 100)
+        line_count = 40000
+        payload = b'aaaaa\r\n' + line * line_count + b'\r\n0\r\nbbbbb\r\ntrailing\r\n'
+
+        # Output starts once the command has been sent, as exec_command flushes stderr before that.
+        # The feeder then blocks whenever the pty buffer is full, until exec_command drains it.
+        command_sent = threading.Event()
+        session.stdin.write.side_effect = lambda data: command_sent.set()
+
+        def feed():
+            command_sent.wait(60)
+            os.write(stderr_w, b'warning\n')
+            os.write(slave, payload)
+
+        writer = threading.Thread(target=feed)
+        writer.start()
+        conn._selector = MagicMock(wraps=conn._selector)
+        try:
+            returncode, stdout, stderr = conn.exec_command('cmd1')
+        finally:
+            writer.join()
+            conn._stdout.close()
+            session.stderr.close()
+            os.close(slave)
+            os.close(stderr_w)
+
+        self.assertEqual(returncode, 0)
+        self.assertEqual(stderr, 'warning\n')
+        self.assertEqual(stdout.count('"key"'), line_count)
+        # Every wakeup drains many lines rather than one line per poll
+        self.assertLess(conn._selector.select.call_count, line_count // 10)
+        self.assertEqual(bytes(conn._stdout_buffer).replace(b'\r', b''), b'trailing\n')
+
+    @pytest.mark.skipif(not os.path.exists('/bin/sh'), reason="requires /bin/sh")
+    def test_plugins_connection_aws_ssm_exec_command_fake_plugin(self):
+        pc = PlayContext()
+        new_stdin = StringIO()
+        conn = connection_loader.get('community.aws.aws_ssm', pc, new_stdin)
+        conn._connected = True
+        conn.get_option = MagicMock()
+        conn.get_option.side_effect = lambda option: {'retries': 0, 'ssm_timeout': 60}[option]
+        tmpdir = tempfile.mkdtemp()
+        plugin = os.path.join(tmpdir, 'session-manager-plugin')
+        with open(plugin, 'w') as f:
+            f.write(FAKE_SSM_PLUGIN)
+        stdout_r, stdout_w = os.openpty()
+        session = aws_ssm.subprocess.Popen([sys.executable, plugin], stdin=aws_ssm.subprocess.PIPE, stdout=stdout_w,
+                                           stderr=aws_ssm.subprocess.PIPE, close_fds=True, bufsize=0)
+        os.close(stdout_w)
+        conn._attach_session(session, stdout_r)
+        try:
+            returncode, stdout, stderr = conn.exec_command('echo hello; exit_code() { return 3; }; exit_code',
+                                                           sudoable=False)
+            self.assertEqual((returncode, stdout.strip()), (3, 'hello'))
+
+            # The controller blocks on the selector for the rest of the timeout while the
+            # remote command runs, rather than waking up on a poll tick
+            conn._select_output = MagicMock(side_effect=conn._select_output)
+            returncode, stdout, stderr = conn.exec_command('sleep 1; echo done', sudoable=False)
+            self.assertEqual((returncode, stdout.strip()), (0, 'done'))
+            timeouts = [c[0][0] for c in conn._select_output.call_args_list]
+            self.assertTrue(all(timeout > 30 for timeout in timeouts))
+            self.assertLess(len(timeouts), 20)
+        finally:
+            session.stdin.close()
+            session.wait()
+            conn._stdout.close()
+            session.stderr.close()
+            shutil.rmtree(tmpdir)
+
+    @pytest.mark.skipif(not ssm_session_broker.HAS_FD_PASSING or not os.path.exists('/bin/sh'),
+                        reason="requires socket.sendmsg and /bin/sh")
+    def test_plugins_connection_aws_ssm_session_pool(self):
+        tmpdir = tempfile.mkdtemp()
+        plugin = os.path.join(tmpdir, 'session-manager-plugin')
+        with open(plugin, 'w') as f:
+            f.write('#!' + sys.executable + '\n' + FAKE_SSM_PLUGIN)
+        os.chmod(plugin, 0o755)
+        broker = ssm_session_broker.SessionBroker(os.path.join(tmpdir, 'aws-ssm-broker-%d.sock' % os.getuid()), 60)
+        self.assertTrue(broker.bind())
+        serve = threading.Thread(target=broker.serve)
+        serve.daemon = True
+        serve.start()
+        options = {'instance_id': 'i-1234', 'region': 'us-east-1', 'plugin': plugin, 'retries': 0, 'ssm_timeout': 60,
+                   'session_pool': True, 'session_pool_dir': tmpdir, 'session_pool_ttl': 120, 'transfer_batch': False,
+                   'access_key_id': 'AKIA1', 'secret_access_key': 'secret', 'session_token': 'token'}
+        client = MagicMock()
+        client.meta.endpoint_url = 'https://ssm.us-east-1.amazonaws.com'
+        client.start_session.side_effect = lambda **kwargs: {'SessionId': 's-%d' % client.start_session.call_count}
+
+        def run_task(**env):
+            conn = connection_loader.get('community.aws.aws_ssm', PlayContext(), StringIO())
+            conn.get_option = MagicMock(side_effect=options.get)
+            conn._get_boto_client = MagicMock(return_value=client)
+            conn._connected = True
+            with patch.dict(os.environ, env):
+                conn.start_session()
+                returncode, stdout, stderr = conn.exec_command('echo $$', sudoable=False)
+                conn.close()
+            # the pid of the remote shell tells sessions apart
+            return stdout.strip()
+
+        try:
+            first = run_task()
+            self.assertEqual(client.start_session.call_count, 1)
+            # The released session is reused without calling StartSession
+            self.assertEqual(run_task(), first)
+            self.assertEqual(client.start_session.call_count, 1)
+            # A different profile gets a session of its own
+            self.assertNotEqual(run_task(AWS_PROFILE='other'), first)
+            self.assertEqual(client.start_session.call_count, 2)
+
+            stats = broker.stats
+            self.assertEqual((stats['hits'], stats['misses'], stats['spawned']), (1, 2, 2))
+            # Released sessions are kept for the TTL of the connection releasing them
+            self.assertEqual([s.idle_ttl for sessions in broker.idle.values() for s in sessions], [120, 120])
+        finally:
+            # Let the serve loop expire the sessions and wind down on its own
+            for sessions in list(broker.idle.values()):
+                for session in sessions:
+                    session.idle_ttl = 0
+            broker.idle_ttl = 0
+            serve.join(30)
+            shutil.rmtree(tmpdir)
+
     def test_plugins_connection_aws_ssm_prepare_terminal(self):
         pc = PlayContext()
         new_stdin = StringIO()
@@ -132,6 +298,48 @@ class TestConnectionBaseClass(unittest.TestCase):
         boto3.generate_presigned_url.return_value = MagicMock()
         return (boto3.generate_presigned_url.return_value)
 
+    @patch('boto3.session.Session')
+    def test_plugins_connection_aws_ssm_boto_client_cache(self, b_session):
+        pc = PlayContext()
+        new_stdin = StringIO()
+        conn = connection_loader.get('community.aws.aws_ssm', pc, new_stdin)
+        conn._get_boto_credentials = MagicMock()
+        conn._get_boto_credentials.return_value = ('AKIA1', 'secret1', 'token1')
+        cache = aws_ssm._BotoClientCache()
+        built = []
+        cache.hooks.append(lambda service, region_name, elapsed: built.append((service, region_name)))
+
+        with patch.object(aws_ssm, 'boto_client_cache', cache):
+            ssm = conn._get_boto_client('ssm', region_name='us-east-1')
+            self.assertIs(conn._get_boto_client('ssm', region_name='us-east-1'), ssm)
+            conn._get_boto_client('s3')
+            conn._get_boto_client('s3')
+            self.assertEqual(built, [('ssm', 'us-east-1'), ('s3', None)])
+            # One session per set of credentials, shared between services
+            b_session.assert_called_once_with(aws_access_key_id='AKIA1', aws_secret_access_key='secret1',
+                                              aws_session_token='token1')
+
+            # Rotated credentials rebuild the client on next use
+            conn._get_boto_credentials.return_value = ('AKIA2', 'secret2', 'token2')
+            conn._get_boto_client('ssm', region_name='us-east-1')
+            self.assertEqual(built[-1], ('ssm', 'us-east-1'))
+            self.assertEqual(b_session.call_count, 2)
+            self.assertEqual(len(cache.construction_times), 2)
+
+            # Hosts using different credentials keep their own clients
+            conn._get_boto_credentials.return_value = ('AKIA1', 'secret1', 'token1')
+            self.assertIs(conn._get_boto_client('ssm', region_name='us-east-1'), ssm)
+            self.assertEqual(len(built), 3)
+
+        # The least recently used credentials are dropped with their clients
+        cache = aws_ssm._BotoClientCache(max_sessions=2)
+        with patch.object(aws_ssm, 'boto_client_cache', cache):
+            for n in (1, 2, 1, 3):
+                conn._get_boto_credentials.return_value = ('AKIA%d' % n, 'secret', None)
+                conn._get_boto_client('ssm', region_name='us-east-1')
+            self.assertEqual([c[0] for c in cache._sessions], ['AKIA1', 'AKIA3'])
+            self.assertEqual(sorted(k[0][0] for k in cache._clients), ['AKIA1', 'AKIA3'])
+
     @patch('os.path.exists')
     def test_plugins_connection_aws_ssm_put_file(self, mock_ospe):
         pc = PlayContext()
@@ -151,6 +359,135 @@ class TestConnectionBaseClass(unittest.TestCase):
         conn._file_transport_command.return_value = (0, 'stdout', 'stderr')
         res, stdout, stderr = conn.fetch_file('/in/file', '/out/file')
 
+    def test_plugins_connection_aws_ssm_put_file_inband(self):
+        pc = PlayContext()
+        new_stdin = StringIO()
+        conn = connection_loader.get('community.aws.aws_ssm', pc, new_stdin)
+        conn._connect = MagicMock()
+        conn.get_option = MagicMock()
+        conn.get_option.side_effect = lambda option: {'inband_transfer_threshold': 1024, 'transfer_batch': False}[option]
+        conn._file_transport_command = MagicMock()
+        conn.exec_command = MagicMock()
+        conn.exec_command.return_value = (0, '', '')
+        tmpdir = tempfile.mkdtemp()
+        try:
+            in_path = os.path.join(tmpdir, 'in')
+            with open(in_path, 'wb') as f:
+                f.write(b'\x00binary payload\n')
+            conn.put_file(in_path, '/out/file')
+        finally:
+            shutil.rmtree(tmpdir)
+
+        conn._file_transport_command.assert_not_called()
+        command = conn.exec_command.call_args[0][0]
+        self.assertTrue(command.startswith("base64 -d > '/out/file' <<'"))
+        self.assertIn(base64.b64encode(b'\x00binary payload\n').decode(), command)
+
+    @patch('random.choice')
+    def test_plugins_connection_aws_ssm_fetch_file_inband(self, r_choice):
+        r_choice.return_value = 'z'
+        pc = PlayContext()
+        new_stdin = StringIO()
+        conn = connection_loader.get('community.aws.aws_ssm', pc, new_stdin)
+        conn._connect = MagicMock()
+        conn.get_option = MagicMock()
+        conn.get_option.side_effect = lambda option: {'inband_transfer_threshold': 1024}[option]
+        conn._file_transport_command = MagicMock()
+        encoded = base64.b64encode(b'remote content' * 10).decode()
+        conn.exec_command = MagicMock()
+        conn.exec_command.return_value = (0, encoded[:76] + '\r\r\n' + encoded[76:], '')
+        tmpdir = tempfile.mkdtemp()
+        try:
+            out_path = os.path.join(tmpdir, 'out')
+            conn.fetch_file('/in/file', out_path)
+            with open(out_path, 'rb') as f:
+                self.assertEqual(f.read(), b'remote content' * 10)
+        finally:
+            shutil.rmtree(tmpdir)
+        conn._file_transport_command.assert_not_called()
+
+        # Files over the threshold still go through the bucket
+        conn.exec_command.return_value = (0, 'z' * conn.MARK_LENGTH, '')
+        conn.fetch_file('/in/file', '/out/file')
+        conn._file_transport_command.assert_called_once_with('/in/file', '/out/file', 'get')
+
+    def test_plugins_connection_aws_ssm_put_file_batch(self):
+        pc = PlayContext()
+        new_stdin = StringIO()
+        conn = connection_loader.get('community.aws.aws_ssm', pc, new_stdin)
+        conn._connect = MagicMock()
+        conn.instance_id = 'i-1234'
+        conn.get_option = MagicMock()
+        conn.get_option.side_effect = lambda option: {'inband_transfer_threshold': 0, 'transfer_batch': True,
+                                                      'bucket_name': 'bucket'}[option]
+        conn._file_transport_command = MagicMock()
+        conn._get_url = MagicMock()
+        conn._get_url.return_value = 'https://bucket/url'
+        conn._s3_client = MagicMock()
+        uploads = []
+        conn._s3_client.upload_fileobj.side_effect = lambda data, bucket, key: uploads.append(data.read())
+        conn.exec_command = MagicMock()
+        conn.exec_command.return_value = (0, '', '')
+        tmpdir = tempfile.mkdtemp()
+        try:
+            for name in ('AnsiballZ_ping.py', 'args'):
+                in_path = os.path.join(tmpdir, name)
+                with open(in_path, 'wb') as f:
+                    f.write(name.encode())
+                conn.put_file(in_path, '/tmp/ansible-tmp/%s' % name)
+                os.remove(in_path)
+        finally:
+            shutil.rmtree(tmpdir)
+
+        conn._file_transport_command.assert_not_called()
+        conn.exec_command.assert_not_called()
+
+        conn._flush_puts()
+        self.assertEqual(len(uploads), 1)
+        tar = tarfile.open(fileobj=BytesIO(uploads[0]))
+        self.assertEqual(tar.getnames(), ['tmp/ansible-tmp/AnsiballZ_ping.py', 'tmp/ansible-tmp/args'])
+        self.assertEqual(tar.extractfile('tmp/ansible-tmp/args').read(), b'args')
+        conn.exec_command.assert_called_once_with(
+            "curl 'https://bucket/url' | tar --no-same-owner -xf - -C /", in_data=None, sudoable=False)
+        conn._s3_client.delete_object.assert_called_once()
+        self.assertEqual(conn._pending_puts, [])
+
+    def test_plugins_connection_aws_ssm_put_file_batch_retry(self):
+        pc = PlayContext()
+        new_stdin = StringIO()
+        conn = connection_loader.get('community.aws.aws_ssm', pc, new_stdin)
+        conn.instance_id = 'i-1234'
+        conn.get_option = MagicMock()
+        conn.get_option.side_effect = lambda option: {'retries': 1, 'bucket_name': 'bucket'}[option]
+        conn._close_session = MagicMock()
+        conn._get_url = MagicMock()
+        conn._get_url.return_value = 'https://bucket/url'
+        conn._s3_client = MagicMock()
+        uploads = []
+        conn._s3_client.upload_fileobj.side_effect = lambda data, bucket, key: uploads.append(data.read())
+        conn._pending_puts = [('/tmp/ansible-tmp/args', b'args')]
+
+        # The extract fails the first time, the user's command only runs once the files are there
+        extract_results = [(1, '', 'curl: (56) Failure'), (0, '', '')]
+        commands = []
+
+        def run(self, cmd, in_data=None, sudoable=True):
+            self._flush_puts()
+            commands.append(cmd)
+            if cmd.startswith('curl'):
+                return extract_results.pop(0)
+            return (0, 'ok', '')
+
+        conn.exec_command = aws_ssm._ssm_retry(run).__get__(conn)
+        with patch.object(aws_ssm.time, 'sleep'):
+            self.assertEqual(conn.exec_command('cat /tmp/ansible-tmp/args'), (0, 'ok', ''))
+
+        self.assertEqual([cmd.split()[0] for cmd in commands], ['curl', 'curl', 'cat'])
+        self.assertEqual(len(uploads), 2)
+        for upload in uploads:
+            self.assertEqual(tarfile.open(fileobj=BytesIO(upload)).getnames(), ['tmp/ansible-tmp/args'])
+        self.assertEqual(conn._pending_puts, [])
+
     @patch('subprocess.check_output')
     @patch('boto3.client')
     def test_plugins_connection_file_transport_command(self, boto_client, s_check_output):
@@ -0,0 +1,66 @@
+# Make coding more python3-ish
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import pytest
+
+from ansible_collections.community.aws.plugins.module_utils import route53
+from ansible_collections.community.aws.tests.unit.utils.clock import FakeClock
+
+
+class FakeRoute53(object):
+    ''' change n is PENDING until the clock reaches its entry in insync_at '''
+
+    def __init__(self, clock, insync_at):
+        self.clock = clock
+        self.insync_at = insync_at
+        self.calls = []
+
+    def get_change(self, Id):
+        self.calls.append(Id)
+        status = 'INSYNC' if self.clock.now >= self.insync_at[Id] else 'PENDING'
+        return dict(ChangeInfo=dict(Id='/change/' + Id, Status=status))
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def test_change_id():
+    assert route53.change_id('/change/C1') == 'C1'
+    assert route53.change_id('C1') == 'C1'
+    assert route53.change_id(dict(Id='/change/C1', Status='PENDING')) == 'C1'
+
+
+def test_wait_for_changes_polls_only_pending_changes(clock):
+    client = FakeRoute53(clock, dict(C1=1000, C2=1005, C3=1010))
+
+    report = route53.wait_for_changes(client, ['/change/C1', 'C2', 'C3', 'C3'], 300, clock=clock.time, sleep=clock.sleep)
+
+    assert report['in_sync']
+    assert report['changes'] == [dict(id='C1', status='INSYNC'), dict(id='C2', status='INSYNC'), dict(id='C3', status='INSYNC')]
+    # exponential backoff between rounds
+    assert clock.sleeps == [2, 3.0, 4.5, 6.75]
+    assert report['polls'] == 5
+    assert report['seconds'] == 16.25
+    assert client.calls.count('C1') == 1
+    assert client.calls.count('C2') == 3
+    assert client.calls.count('C3') == 5
+
+
+def test_wait_for_changes_times_out(clock):
+    client = FakeRoute53(clock, dict(C1=10 ** 6))
+
+    report = route53.wait_for_changes(client, ['C1'], 200, clock=clock.time, sleep=clock.sleep)
+
+    assert not report['in_sync']
+    assert report['changes'] == [dict(id='C1', status='PENDING')]
+    assert max(clock.sleeps) == route53.WAIT_MAX_DELAY
+    assert clock.now == 1200
+
+
+def test_wait_for_no_changes(clock):
+    report = route53.wait_for_changes(FakeRoute53(clock, {}), [], 60, clock=clock.time, sleep=clock.sleep)
+    assert report['in_sync']
+    assert clock.sleeps == []
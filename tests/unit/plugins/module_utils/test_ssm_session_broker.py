@@ -0,0 +1,127 @@
+# Make coding more python3-ish
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+import pytest
+
+from ansible_collections.community.aws.plugins.module_utils import ssm_session_broker
+from ansible_collections.community.aws.plugins.module_utils.ssm_session_broker import BrokerClient, SessionBroker
+
+pytestmark = pytest.mark.skipif(not ssm_session_broker.HAS_FD_PASSING, reason="requires socket.sendmsg")
+
+# Stands in for session-manager-plugin: echoes stdin back on the pty until told to exit
+FAKE_PLUGIN = '''
+import sys
+for line in iter(sys.stdin.readline, ''):
+    if line.strip() == 'exit':
+        break
+    sys.stdout.write(line)
+    sys.stdout.flush()
+'''
+
+
+@pytest.fixture
+def fake_plugin():
+    tmpdir = tempfile.mkdtemp()
+    script = os.path.join(tmpdir, 'session-manager-plugin')
+    with open(script, 'w') as f:
+        f.write(FAKE_PLUGIN)
+    yield tmpdir, [sys.executable, script]
+    shutil.rmtree(tmpdir)
+
+
+@pytest.fixture
+def broker(fake_plugin):
+    tmpdir, cmd = fake_plugin
+    broker = SessionBroker(os.path.join(tmpdir, 'broker.sock'), 60)
+    assert broker.bind()
+    thread = threading.Thread(target=broker.serve)
+    thread.daemon = True
+    thread.start()
+    yield broker, BrokerClient(broker.socket_path, 60), cmd
+    # Let the serve loop wind down on its own once every session is gone
+    broker.idle_ttl = 0
+    thread.join(10)
+
+
+def roundtrip(session, stdout_fd, text):
+    session.stdin.write(text + b'\n')
+    data = b''
+    while b'\n' not in data:
+        data += os.read(stdout_fd, 1024)
+    return data.strip()
+
+
+def test_session_is_reused_after_release(broker):
+    broker, client, cmd = broker
+    key = 'i-1234/us-east-1/abc'
+
+    assert client.acquire(key) is None
+    session, stdout_fd = client.spawn(key, cmd, 's-1')
+    assert roundtrip(session, stdout_fd, b'hello') == b'hello'
+    assert client.release('s-1') == 'released'
+    session.detach()
+    os.close(stdout_fd)
+
+    session_id, reused, stdout_fd = client.acquire(key)
+    assert session_id == 's-1'
+    assert reused.pid == session.pid
+    assert reused.poll() is None
+    assert roundtrip(reused, stdout_fd, b'again') == b'again'
+
+    # Sessions are only handed out for a matching key
+    assert client.acquire('i-1234/us-west-2/abc') is None
+
+    stats = client.stats()
+    assert stats['hits'] == 1
+    assert stats['misses'] == 2
+    assert stats['spawned'] == 1
+    assert stats['leased'] == 1
+
+    assert client.discard('s-1') == 'discarded'
+    reused.detach()
+    os.close(stdout_fd)
+    assert client.stats()['leased'] == 0
+
+
+def test_idle_sessions_expire(fake_plugin):
+    tmpdir, cmd = fake_plugin
+    broker = SessionBroker(os.path.join(tmpdir, 'broker.sock'), 30)
+    reply, fds = broker._op_spawn(dict(key='k', cmd=cmd, session_id='s-1', pid=os.getpid()))
+    assert reply['status'] == 'spawned'
+    # sessions expire after the TTL they were released with rather than the broker's
+    broker._op_release(dict(session_id='s-1', ttl=90))
+
+    broker.reap()
+    assert len(broker.idle['k']) == 1
+
+    broker.idle['k'][0].last_used = time.time() - 60
+    broker.reap()
+    assert len(broker.idle['k']) == 1
+
+    broker.idle['k'][0].last_used = time.time() - 120
+    process = broker.idle['k'][0].process
+    broker.reap()
+    assert broker.idle == {}
+    assert broker.stats['expired'] == 1
+    assert process.poll() is not None
+
+
+def test_sessions_of_dead_lessees_are_discarded(fake_plugin):
+    tmpdir, cmd = fake_plugin
+    broker = SessionBroker(os.path.join(tmpdir, 'broker.sock'), 30)
+    broker._op_spawn(dict(key='k', cmd=cmd, session_id='s-1', pid=os.getpid()))
+
+    gone = ssm_session_broker.subprocess.Popen([sys.executable, '-c', 'pass'])
+    gone.wait()
+    broker.leased['s-1'].lessee = gone.pid
+    broker.reap()
+    assert broker.leased == {}
+    assert broker.stats['discarded'] == 1